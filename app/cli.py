@@ -0,0 +1,133 @@
+"""
+Comandos de linha de comando da aplicação
+
+Uso:
+    python -m app.cli train-local --data emails.jsonl --output models/local
+    python -m app.cli export-audit --output dataset.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+
+from .models.email_models import EmailCategory
+
+
+def _load_labeled(path: str):
+    """Lê um JSONL com {"text": "...", "label": "produtivo" | "improdutivo"} por linha"""
+    texts, labels = [], []
+    with open(path, encoding="utf-8") as data_file:
+        for line_number, line in enumerate(data_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                texts.append(str(record["text"]))
+                labels.append(EmailCategory(record["label"]))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"Linha {line_number} inválida: {str(e)}")
+    return texts, labels
+
+
+def train_local(args) -> int:
+    """Treina o classificador local a partir de emails rotulados"""
+    from .services.local_classifier import LocalClassifier
+    
+    texts, labels = _load_labeled(args.data)
+    examples = list(zip(texts, labels))
+    random.Random(42).shuffle(examples)
+    
+    holdout = int(len(examples) * args.holdout)
+    train, test = examples[holdout:], examples[:holdout]
+    print(f"📚 {len(train)} exemplos de treino, {len(test)} de validação")
+    
+    model = LocalClassifier.train(
+        [text for text, _ in train],
+        [label for _, label in train],
+        n_features=2 ** args.features_bits,
+        epochs=args.epochs
+    )
+    
+    for name, subset in (("treino", train), ("validação", test)):
+        if subset:
+            predictions = model.classify([text for text, _ in subset])
+            hits = sum(1 for (category, _), (_, label) in zip(predictions, subset) if category == label)
+            print(f"🎯 Acurácia ({name}): {hits / len(subset):.3f}")
+    
+    model.save(args.output)
+    print(f"✅ Modelo salvo em: {args.output}")
+    return 0
+
+
+def export_audit(args) -> int:
+    """Exporta o log de auditoria como dataset rotulado (o formato do train-local)
+    
+    Entradas repetidas (mesmo hash do texto) ficam com a classificação mais
+    recente. Resultados de fallback ficam de fora por padrão: vêm das
+    palavras-chave quando o OpenAI falhou e não representam o modelo.
+    """
+    from .services.audit_log import iter_audit_records
+    from .utils.config import settings
+    
+    directory = args.dir or settings.audit_dir
+    tiers = set(args.tiers) if args.tiers else None
+    examples = {}
+    skipped = {"sem texto": 0, "fallback": 0, "tier": 0}
+    for record in iter_audit_records(directory):
+        if not record.get("text"):
+            skipped["sem texto"] += 1
+        elif record.get("fallback") and not args.include_fallback:
+            skipped["fallback"] += 1
+        elif tiers and record.get("tier") not in tiers:
+            skipped["tier"] += 1
+        else:
+            # Sem deduplicar, cada registro tem sua própria chave
+            key = record["input_hash"] if args.dedupe else len(examples)
+            examples.pop(key, None)
+            examples[key] = {
+                "text": record["text"],
+                "label": record["category"],
+                "tier": record.get("tier"),
+                "timestamp": record.get("timestamp")
+            }
+    
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        for example in examples.values():
+            output_file.write(json.dumps(example, ensure_ascii=False) + "\n")
+    
+    labels = {}
+    for example in examples.values():
+        labels[example["label"]] = labels.get(example["label"], 0) + 1
+    print(f"✅ {len(examples)} exemplos exportados para {args.output}: {labels}")
+    print(f"⏭️  Ignorados: {skipped}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Comandos do AutoU Email Classifier")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    train_parser = subparsers.add_parser("train-local", help="Treina o classificador local")
+    train_parser.add_argument("--data", required=True, help="JSONL com campos text e label")
+    train_parser.add_argument("--output", required=True, help="Diretório de saída do modelo")
+    train_parser.add_argument("--features-bits", type=int, default=18, help="log2 do número de features")
+    train_parser.add_argument("--epochs", type=int, default=300)
+    train_parser.add_argument("--holdout", type=float, default=0.1, help="Fração para validação")
+    train_parser.set_defaults(func=train_local)
+    
+    export_parser = subparsers.add_parser("export-audit", help="Exporta o log de auditoria como dataset rotulado")
+    export_parser.add_argument("--output", required=True, help="JSONL de saída (campos text e label)")
+    export_parser.add_argument("--dir", help="Diretório do log (padrão: AUDIT_DIR)")
+    export_parser.add_argument("--tiers", nargs="+", choices=["keywords", "local", "llm"], help="Só estes tiers")
+    export_parser.add_argument("--include-fallback", action="store_true", help="Inclui resultados de fallback")
+    export_parser.add_argument("--no-dedupe", dest="dedupe", action="store_false", help="Mantém textos repetidos")
+    export_parser.set_defaults(func=export_audit)
+    
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,22 +2,66 @@
 Controller para endpoints de email
 """
 
-from fastapi import APIRouter, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File, Form, status
+from fastapi.responses import JSONResponse, StreamingResponse
+import hmac
 
 from ..models.email_models import (
     EmailResponse, 
     HealthResponse, 
     CategoriesResponse,
-    CategoryInfo
+    CategoryInfo,
+    CacheStatsResponse,
+    ClassifierStatsResponse,
+    BatchResponse,
+    JobResponse,
+    JobQueueStatsResponse,
+    SettingsReloadResponse
 )
 from ..services.email_service import EmailService
-from ..utils.config import settings
+from ..services.job_queue import JobQueue, JobQueueFullError
+from ..services.settings_reload import SettingsReloader
+from ..utils.config import SettingsError, settings
+from ..utils.metrics import CONTENT_TYPE, metrics
+from ..utils.streaming import RequestStreamingResponse
 
 # Criar router
 router = APIRouter()
 
-# Instância do service
-email_service = EmailService()
+
+def get_email_service(request: Request) -> EmailService:
+    """Service do worker, criado no lifespan da aplicação"""
+    return request.app.state.email_service
+
+
+def get_ready_email_service(email_service: EmailService = Depends(get_email_service)) -> EmailService:
+    """Service pronto para classificar; durante o aquecimento do worker responde 503"""
+    if not email_service.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Serviço inicializando. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
+    return email_service
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """Fila de jobs do worker; 503 se estiver desabilitada"""
+    job_queue = request.app.state.job_queue
+    if job_queue is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fila de jobs desabilitada (JOBS_ENABLED=false)"
+        )
+    return job_queue
+
+
+def require_admin(request: Request) -> None:
+    """Com ADMIN_TOKEN configurado, as rotas /admin exigem o cabeçalho X-Admin-Token"""
+    if settings.admin_token and not hmac.compare_digest(
+        request.headers.get("x-admin-token", "").encode(), settings.admin_token.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Token de administração inválido")
 
 
 @router.get("/", response_model=HealthResponse)
@@ -38,6 +82,17 @@ async def health_check():
     return HealthResponse.create_healthy()
 
 
+@router.get("/ready", response_model=HealthResponse)
+async def readiness_check(email_service: EmailService = Depends(get_email_service)):
+    """Readiness do worker: 503 até o classificador e o pool de extração estarem aquecidos"""
+    if not email_service.ready:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content=HealthResponse.create_warning("Worker inicializando").dict()
+        )
+    return HealthResponse.create_healthy("Worker pronto para receber requisições")
+
+
 @router.get("/categories", response_model=CategoriesResponse)
 async def get_categories():
     """Retorna as categorias disponíveis para classificação"""
@@ -70,14 +125,18 @@ async def get_categories():
 @router.post("/classify-email", response_model=EmailResponse)
 async def classify_email_endpoint(
     text: str = Form(None),
-    file: UploadFile = File(None)
+    file: UploadFile = File(None),
+    include_reply: bool = True,
+    email_service: EmailService = Depends(get_ready_email_service)
 ):
     """
     Endpoint principal para classificação de emails
     
     Aceita:
     - Texto direto via form
-    - Arquivo (.txt ou .pdf) via upload
+    - Arquivo (.txt, .pdf ou .eml) via upload
+    - `?include_reply=false` para só classificar (a resposta pode ser pedida
+      depois em POST /classifications/{classification_id}/reply)
     
     Retorna:
     - Categoria do email (produtivo/improdutivo)
@@ -85,18 +144,201 @@ async def classify_email_endpoint(
     - Tempo de processamento
     - Tamanho do texto processado
     """
-    return await email_service.process_email_classification(text=text, file=file)
+    return await email_service.process_email_classification(text=text, file=file, include_reply=include_reply)
+
+
+@router.post("/classify-email/stream")
+async def classify_email_stream(
+    text: str = Form(None),
+    file: UploadFile = File(None),
+    email_service: EmailService = Depends(get_ready_email_service)
+):
+    """
+    Classificação com a resposta sugerida em streaming (Server-Sent Events)
+    
+    Aceita as mesmas entradas de /classify-email. Eventos:
+    - `category`: categoria e tier, assim que a categoria é decidida
+    - `token`: trecho da resposta sugerida, à medida que o modelo gera
+    - `done`: EmailResponse completo (a resposta definitiva)
+    - `error`: falha depois do início do streaming
+    """
+    events = await email_service.open_classification_stream(text=text, file=file)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/classify-text", response_model=EmailResponse)
-async def classify_text_only(text: str = Form(...)):
+async def classify_text_only(
+    text: str = Form(...),
+    include_reply: bool = True,
+    email_service: EmailService = Depends(get_ready_email_service)
+):
     """
     Endpoint simplificado para classificação apenas de texto
     
     Args:
         text: Texto do email para classificar
+        include_reply: False para só classificar, sem gerar a resposta
         
     Returns:
         EmailResponse: Resultado da classificação
     """
-    return await email_service.process_email_classification(text=text)
+    return await email_service.process_email_classification(text=text, include_reply=include_reply)
+
+
+@router.post("/classifications/{classification_id}/reply", response_model=EmailResponse)
+async def generate_reply(
+    classification_id: str,
+    email_service: EmailService = Depends(get_ready_email_service)
+):
+    """
+    Gera a resposta sugerida de uma classificação feita com include_reply=false
+    
+    Retorna o EmailResponse completo; 404 se a classificação expirou
+    (REPLY_STORE_TTL_SECONDS).
+    """
+    return await email_service.generate_reply(classification_id)
+
+
+@router.post("/classify-batch", response_model=BatchResponse)
+async def classify_batch(request: Request, email_service: EmailService = Depends(get_ready_email_service)):
+    """
+    Classificação de vários emails em uma única requisição
+    
+    Aceita:
+    - JSON: lista de textos ou de objetos {"id": "...", "text": "..."}
+    - multipart/form-data: vários arquivos no campo "files" e/ou textos no campo "texts"
+    
+    Retorna:
+    - Um resultado por item (EmailResponse ou erro), na ordem de entrada
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        items = [(None, None, upload) for upload in form.getlist("files")]
+        items += [(None, text, None) for text in form.getlist("texts")]
+    else:
+        try:
+            payload = await request.json()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="JSON inválido"
+            )
+        items = email_service.parse_batch_payload(payload)
+    
+    return await email_service.process_batch(items)
+
+
+@router.post("/classify-stream")
+async def classify_stream(request: Request, email_service: EmailService = Depends(get_ready_email_service)):
+    """
+    Classificação em streaming para jobs grandes
+    
+    Aceita:
+    - Corpo NDJSON: uma linha por email, com um texto JSON ou {"id": "...", "text": "..."}
+    
+    Retorna:
+    - NDJSON com um resultado por linha, emitido assim que cada item fica pronto
+    """
+    return RequestStreamingResponse(
+        email_service.stream_classifications(request.stream()),
+        media_type="application/x-ndjson"
+    )
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    response: Response,
+    text: str = Form(None),
+    file: UploadFile = File(None),
+    job_queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Enfileira a classificação de um email e retorna imediatamente
+    
+    Aceita as mesmas entradas de /classify-email. O resultado é consultado
+    em GET /jobs/{id}, com long-polling opcional pelo parâmetro `wait`.
+    """
+    try:
+        job = await job_queue.submit(text=text, file=file)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@router.get("/jobs/stats", response_model=JobQueueStatsResponse)
+async def job_queue_stats(job_queue: JobQueue = Depends(get_job_queue)):
+    """Profundidade da fila e espera do job mais antigo"""
+    return await job_queue.stats()
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, wait: float = 0, job_queue: JobQueue = Depends(get_job_queue)):
+    """
+    Estado de um job
+    
+    Com `wait` (segundos, até JOB_MAX_WAIT), a resposta só volta quando o job
+    termina ou o tempo acaba.
+    """
+    if wait > 0:
+        job = await job_queue.wait(job_id, min(wait, settings.job_max_wait))
+    else:
+        job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+    return job
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def cache_stats(email_service: EmailService = Depends(get_email_service)):
+    """Retorna os contadores de acerto/falha do cache de resultados"""
+    if not email_service.result_cache:
+        return CacheStatsResponse(
+            enabled=False, backend="none", entries=0,
+            hits=0, misses=0, disk_hits=0, hit_rate=0.0
+        )
+    return CacheStatsResponse(enabled=True, **email_service.result_cache.stats())
+
+
+@router.get("/classifier/stats", response_model=ClassifierStatsResponse)
+async def classifier_stats(email_service: EmailService = Depends(get_email_service)):
+    """Retorna quantas classificações cada tier da cascata decidiu"""
+    return ClassifierStatsResponse(**email_service.email_classifier.tier_stats())
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    """Métricas no formato de exposição do Prometheus (somadas entre os workers, se compartilhadas)"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/admin/settings", dependencies=[Depends(require_admin)])
+async def get_settings():
+    """Configurações efetivas deste worker (sem os segredos)"""
+    return settings.public_view()
+
+
+@router.post("/admin/settings/reload", response_model=SettingsReloadResponse, dependencies=[Depends(require_admin)])
+async def reload_settings(request: Request):
+    """Relê ambiente e SETTINGS_FILE, aplica neste worker e avisa os demais
+    
+    Valores inválidos são rejeitados com 422 e a configuração atual continua valendo.
+    """
+    reloader: SettingsReloader = request.app.state.settings_reloader
+    try:
+        result = reloader.reload()
+    except SettingsError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    return SettingsReloadResponse(**result, broadcast=reloader.broadcast())
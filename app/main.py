@@ -2,24 +2,88 @@
 Aplicação principal FastAPI
 """
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
+from starlette.formparsers import MultiPartParser
+import asyncio
+import signal
 import time
 import os
 
 from .controllers.email_controller import router
 from .models.email_models import ErrorResponse, HealthResponse
+from .services.email_service import EmailService
+from .services.job_queue import JobQueue, JobStore
+from .services.settings_reload import SettingsReloader
 from .utils.config import settings
+from .utils.metrics import HTTP_REQUEST_DURATION, metrics
+
+
+async def flush_metrics_periodically(interval: float):
+    """Grava as métricas deste worker no diretório compartilhado para os outros workers lerem"""
+    while True:
+        await asyncio.sleep(interval)
+        metrics.write_snapshot()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Cria os serviços de cada worker na inicialização e os libera ao desligar
+    
+    O aquecimento roda em segundo plano: /health responde desde o início e
+    /ready (e as rotas de classificação) respondem 503 até ele terminar.
+    """
+    if settings.shared_state_dir:
+        os.makedirs(settings.shared_state_dir, exist_ok=True)
+        metrics.enable_shared(os.path.join(settings.shared_state_dir, "metrics"))
+    
+    email_service = EmailService()
+    app.state.email_service = email_service
+    if email_service.audit_log:
+        email_service.audit_log.start()
+    job_queue = None
+    if settings.jobs_enabled:
+        job_queue = JobQueue(JobStore(settings.job_db_path), email_service, settings.job_workers)
+        job_queue.start()
+    app.state.job_queue = job_queue
+    # Recarregamento das configurações: SIGHUP no worker, rota /admin ou aviso de outro worker
+    settings_reloader = SettingsReloader(email_service, settings.shared_state_dir)
+    app.state.settings_reloader = settings_reloader
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, settings_reloader.reload_on_signal)
+        handles_sighup = True
+    except (AttributeError, RuntimeError, NotImplementedError):
+        # Event loop fora da thread principal (ex.: TestClient) ou sem sinais (Windows)
+        handles_sighup = False
+    background_tasks = [asyncio.create_task(email_service.warm_up())]
+    if metrics.shared_dir:
+        metrics.write_snapshot()
+        background_tasks.append(asyncio.create_task(flush_metrics_periodically(settings.metrics_flush_interval)))
+        background_tasks.append(asyncio.create_task(settings_reloader.watch(settings.metrics_flush_interval)))
+    try:
+        yield
+    finally:
+        if handles_sighup:
+            loop.remove_signal_handler(signal.SIGHUP)
+        for task in background_tasks:
+            task.cancel()
+        if job_queue:
+            await job_queue.aclose()
+        await email_service.aclose()
+        metrics.write_snapshot()
 
 # Criar aplicação FastAPI
 app = FastAPI(
     title=settings.app_name,
     description="API para classificação de emails e geração de respostas automáticas",
     version=settings.app_version,
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # CORS para permitir requisições do frontend
@@ -48,6 +112,45 @@ async def serve_frontend():
         return FileResponse(frontend_file)
     return {"message": "Frontend não encontrado"}
 
+# Rotas de upload único: corpos muito maiores que o limite são recusados antes da leitura
+UPLOAD_PATHS = ("/classify-email", "/classify-email/stream", "/jobs")
+# Margem para cabeçalhos do multipart e campos de texto
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+# Os arquivos do multipart ficam no SpooledTemporaryFile do Starlette, usado sem cópia
+# pelo pool de extração; o limiar de memória dele é o UPLOAD_SPOOL_THRESHOLD
+MultiPartParser.max_file_size = settings.upload_spool_threshold
+
+@app.middleware("http")
+async def reject_oversized_uploads(request: Request, call_next):
+    content_length = request.headers.get("content-length", "")
+    if request.url.path in UPLOAD_PATHS:
+        if content_length.isdigit() and int(content_length) > settings.max_file_size + UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Arquivo muito grande. Máximo: {settings.max_file_size // (1024*1024)}MB"}
+            )
+    elif request.url.path == "/classify-batch":
+        # O formulário inteiro é recebido antes da contagem de itens: o limite vale para o corpo todo
+        if content_length.isdigit() and int(content_length) > settings.batch_max_bytes:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Lote muito grande. Máximo: {settings.batch_max_bytes // (1024*1024)}MB"}
+            )
+    return await call_next(request)
+
+def _route_label(request: Request) -> str:
+    """Rota com os parâmetros no lugar dos valores, para não explodir a cardinalidade das métricas"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    # Rotas do próprio Starlette (/docs, /openapi.json) não gravam a rota no scope
+    endpoint = request.scope.get("endpoint")
+    if endpoint is not None:
+        for candidate in request.app.router.routes:
+            if getattr(candidate, "endpoint", None) is endpoint:
+                return candidate.path
+    return "unmatched"
+
 # Middleware para log de requisições e tratamento de erros
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
@@ -56,16 +159,17 @@ async def add_process_time_header(request: Request, call_next):
         response = await call_next(request)
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(round(process_time, 3))
+        HTTP_REQUEST_DURATION.observe(process_time, request.method, _route_label(request), str(response.status_code))
         return response
     except Exception as e:
         # Log do erro
         print(f"Erro na requisição: {request.url} - {str(e)}")
         return JSONResponse(
             status_code=500,
-            content=ErrorResponse(
-                message="Erro interno do servidor. Tente novamente.",
-                details=str(e) if settings.debug else None
-            ).model_dump()
+            content=ErrorResponse.create(
+                "Erro interno do servidor. Tente novamente.",
+                str(e) if settings.debug else ""
+            ).dict()
         )
 
 @app.get("/health", response_model=HealthResponse, summary="Health Check")
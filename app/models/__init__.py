@@ -2,11 +2,34 @@
 Modelos de dados da aplicação
 """
 
-from .email_models import EmailCategory, EmailResponse, HealthResponse, ErrorResponse
+from .email_models import (
+    EmailCategory,
+    EmailResponse,
+    HealthResponse,
+    ErrorResponse,
+    ClassificationResult,
+    CacheStatsResponse,
+    BatchItemResult,
+    BatchResponse,
+    ClassifierStatsResponse,
+    TruncationInfo,
+    JobResponse,
+    JobQueueStatsResponse,
+    SettingsReloadResponse
+)
 
 __all__ = [
     "EmailCategory",
     "EmailResponse", 
     "HealthResponse",
-    "ErrorResponse"
+    "ErrorResponse",
+    "ClassificationResult",
+    "CacheStatsResponse",
+    "BatchItemResult",
+    "BatchResponse",
+    "ClassifierStatsResponse",
+    "TruncationInfo",
+    "JobResponse",
+    "JobQueueStatsResponse",
+    "SettingsReloadResponse"
 ]
@@ -3,7 +3,7 @@ Modelos de dados para emails
 """
 
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from enum import Enum
 import time
 
@@ -14,12 +14,27 @@ class EmailCategory(str, Enum):
     IMPRODUTIVO = "improdutivo"
 
 
+class TruncationInfo(BaseModel):
+    """Corte aplicado ao texto do email para caber no orçamento de tokens do prompt"""
+    original_tokens: int
+    prompt_tokens: int
+    budget_tokens: int
+    truncated: bool
+    quoted_reply_removed: bool
+
+
 class EmailResponse(BaseModel):
     """Modelo de resposta da classificação de email"""
     category: EmailCategory
-    suggested_response: str
+    # None no modo só classificação (include_reply=false)
+    suggested_response: Optional[str] = None
     processing_time: float
     text_length: int
+    cached: bool = False
+    tier: Optional[str] = None
+    truncation: Optional[TruncationInfo] = None
+    # Identificador para gerar a resposta depois (POST /classifications/{id}/reply)
+    classification_id: Optional[str] = None
     
     class Config:
         json_encoders = {
@@ -27,6 +42,90 @@ class EmailResponse(BaseModel):
         }
 
 
+class BatchItemResult(BaseModel):
+    """Resultado de um item do lote"""
+    index: int
+    id: Optional[str] = None
+    status: str
+    result: Optional[EmailResponse] = None
+    error: Optional[str] = None
+    duplicate_of: Optional[int] = None
+
+
+class BatchResponse(BaseModel):
+    """Resposta da classificação em lote"""
+    results: List[BatchItemResult]
+    total: int
+    succeeded: int
+    failed: int
+    unique: int
+    processing_time: float
+
+
+class JobResponse(BaseModel):
+    """Estado de um job de classificação assíncrona (horários em epoch, segundos)"""
+    id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    attempts: int = 0
+    result: Optional[EmailResponse] = None
+    error: Optional[str] = None
+
+
+class JobQueueStatsResponse(BaseModel):
+    """Profundidade e espera da fila de jobs"""
+    queued: int
+    running: int
+    succeeded: int
+    failed: int
+    oldest_queued_seconds: float
+    workers: int
+
+
+class ClassificationResult(BaseModel):
+    """Resultado interno da classificação"""
+    category: EmailCategory
+    # None enquanto a resposta não foi gerada (modo só classificação)
+    suggested_response: Optional[str] = None
+    tier: str = "llm"
+    confidence: Optional[float] = None
+    fallback: bool = False
+    # Preenchido quando o texto foi enviado ao LLM
+    truncation: Optional[TruncationInfo] = None
+
+
+class ClassifierStatsResponse(BaseModel):
+    """Decisões tomadas por cada tier da cascata"""
+    tiers: Dict[str, int]
+    total: int
+    escalation_rate: float
+    coalesced: int
+    in_flight: int
+    circuit_state: str
+
+
+class CacheStatsResponse(BaseModel):
+    """Estatísticas do cache de resultados"""
+    enabled: bool
+    backend: str
+    entries: int
+    hits: int
+    misses: int
+    disk_hits: int
+    hit_rate: float
+
+
+class SettingsReloadResponse(BaseModel):
+    """Resultado de um recarregamento das configurações"""
+    changed: List[str]
+    # Alteradas no arquivo/ambiente, mas só valem depois de reiniciar os workers
+    restart_required: List[str]
+    # Se os outros workers foram avisados (estado compartilhado configurado)
+    broadcast: bool = False
+
+
 class HealthResponse(BaseModel):
     """Modelo de resposta do health check"""
     status: str
@@ -5,9 +5,17 @@ Serviços de negócio da aplicação
 from .email_classifier import EmailClassifier
 from .file_processor import FileProcessor
 from .email_service import EmailService
+from .result_cache import ResultCache
+from .keyword_matcher import KeywordMatcher
+from .local_classifier import LocalClassifier
+from .single_flight import SingleFlight
 
 __all__ = [
     "EmailClassifier",
     "FileProcessor",
-    "EmailService"
+    "EmailService",
+    "ResultCache",
+    "KeywordMatcher",
+    "LocalClassifier",
+    "SingleFlight"
 ]
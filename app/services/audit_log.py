@@ -0,0 +1,173 @@
+"""
+Registro de auditoria das classificações (JSONL comprimido, somente anexação)
+
+As requisições só colocam o registro em um buffer circular em memória; uma
+tarefa em segundo plano grava os registros em lotes, fora do event loop, em
+arquivos .jsonl.gz com rotação por tamanho. Com o buffer cheio, os registros
+mais antigos são descartados e contados em vez de segurar as requisições.
+Cada worker grava os próprios arquivos (o PID vai no nome).
+"""
+
+import asyncio
+import collections
+import gzip
+import hashlib
+import json
+import os
+import time
+from typing import Iterator, List, Optional
+
+from ..utils.metrics import AUDIT_RECORDS, metrics
+from .file_processor import FileProcessor
+
+FILE_PREFIX = "audit-"
+FILE_SUFFIX = ".jsonl.gz"
+
+
+class AuditLog:
+    """Buffer circular de registros + gravação periódica em lotes"""
+    
+    def __init__(
+        self,
+        directory: str,
+        max_buffered: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        rotate_bytes: int = 64 * 1024 * 1024,
+        include_text: bool = True,
+        text_max_chars: int = 20000
+    ):
+        """Prepara o diretório; a gravação começa com start()"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        # Sem o texto, só o hash identifica a entrada (não serve para exportar o dataset)
+        self.include_text = include_text
+        self.text_max_chars = text_max_chars
+        self._buffer: collections.deque = collections.deque(maxlen=max_buffered)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._path: Optional[str] = None
+        self.dropped = 0
+        self.written = 0
+        metrics.register_callback(
+            "autou_audit_buffered_records",
+            "Registros de auditoria aguardando gravação",
+            "gauge",
+            lambda: len(self._buffer)
+        )
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    def resize(self, max_buffered: int) -> None:
+        """Muda a capacidade do buffer; ao encolher, os registros mais antigos são descartados"""
+        if max_buffered == self._buffer.maxlen:
+            return
+        dropped = max(len(self._buffer) - max_buffered, 0)
+        if dropped:
+            self.dropped += dropped
+            AUDIT_RECORDS.inc("dropped", amount=dropped)
+        self._buffer = collections.deque(self._buffer, maxlen=max_buffered)
+    
+    def record(self, text: str, **fields) -> None:
+        """Enfileira um registro sem bloquear; o hash e a limpeza do texto ficam para o flusher"""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+            AUDIT_RECORDS.inc("dropped")
+        fields["timestamp"] = time.time()
+        # Só o início do texto fica retido no buffer (e entra no hash)
+        self._buffer.append((text[:self.text_max_chars], fields))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+    
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+    
+    def _drain(self) -> List[tuple]:
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        return batch
+    
+    async def flush(self) -> None:
+        """Grava tudo o que está no buffer (em uma thread)"""
+        batch = self._drain()
+        if not batch:
+            return
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            AUDIT_RECORDS.inc("dropped", amount=len(batch))
+            print(f"⚠️  Erro ao gravar o log de auditoria: {str(e)}")
+    
+    def _to_line(self, text: str, fields: dict) -> str:
+        cleaned = FileProcessor.clean_text(text)
+        record = {"input_hash": hashlib.sha256(cleaned.encode("utf-8")).hexdigest(), **fields}
+        if self.include_text:
+            record["text"] = cleaned
+        return json.dumps(record, ensure_ascii=False)
+    
+    def _current_path(self) -> str:
+        """Arquivo atual do worker, trocado quando passa de rotate_bytes"""
+        if self._path is None or os.path.getsize(self._path) >= self.rotate_bytes:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self._path = os.path.join(self.directory, f"{FILE_PREFIX}{stamp}-{os.getpid()}{FILE_SUFFIX}")
+            # Rotação no mesmo segundo: sufixo sequencial
+            sequence = 1
+            while os.path.exists(self._path) and os.path.getsize(self._path) >= self.rotate_bytes:
+                self._path = os.path.join(
+                    self.directory, f"{FILE_PREFIX}{stamp}-{os.getpid()}.{sequence}{FILE_SUFFIX}"
+                )
+                sequence += 1
+        return self._path
+    
+    def _write_batch(self, batch: List[tuple]) -> None:
+        payload = "".join(self._to_line(text, fields) + "\n" for text, fields in batch).encode("utf-8")
+        # Cada lote é um membro gzip anexado ao arquivo; gzip.open lê todos em sequência
+        with open(self._current_path(), "ab") as audit_file:
+            audit_file.write(gzip.compress(payload, compresslevel=6))
+        self.written += len(batch)
+        AUDIT_RECORDS.inc("written", amount=len(batch))
+    
+    def stats(self) -> dict:
+        return {"buffered": len(self._buffer), "written": self.written, "dropped": self.dropped}
+    
+    async def aclose(self) -> None:
+        """Para o flusher e grava o que sobrou no buffer"""
+        # Sem cancelar: um lote que já está sendo gravado termina antes do último
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+        metrics.unregister("autou_audit_buffered_records")
+
+
+def iter_audit_records(directory: str) -> Iterator[dict]:
+    """Registros de todos os arquivos do diretório, do arquivo mais antigo ao mais novo"""
+    paths = sorted(
+        (os.path.join(directory, name) for name in os.listdir(directory)
+         if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX)),
+        key=os.path.getmtime
+    )
+    for path in paths:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as audit_file:
+                for line in audit_file:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile) as e:
+            # Lote truncado por uma queda no meio da gravação: o que veio antes é aproveitado
+            print(f"⚠️  {os.path.basename(path)}: {str(e)}")
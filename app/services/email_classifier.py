@@ -2,10 +2,25 @@
 Serviço para classificação de emails e geração de respostas
 """
 
-from openai import OpenAI
-from typing import Tuple
-from ..models.email_models import EmailCategory
+import asyncio
+import json
+import time
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from typing import AsyncIterator, Optional, Tuple, Union
+from ..models.email_models import ClassificationResult, EmailCategory, TruncationInfo
 from ..utils.config import settings
+from ..utils.metrics import EMAIL_TRUNCATIONS, FALLBACKS, STAGE_DURATION
+from .keyword_matcher import KeywordMatcher
+from .llm_resilience import CircuitBreaker, RateLimiter, ResilientCaller
+from .local_classifier import LocalClassifier
+from .result_cache import ResultCache
+from .single_flight import SingleFlight
+from .token_budget import budget_for_model, estimate_tokens, fit_to_budget
+
+# Versão dos prompts: mudar sempre que o texto de algum prompt for alterado
+PROMPT_VERSION = "2"
 
 
 class EmailClassifier:
@@ -13,23 +28,137 @@ class EmailClassifier:
     
     def __init__(self):
         """Inicializa o classificador"""
+        self.client = None
+        self.async_client = None
+        self._http_client = None
+        # Limita quantas chamadas ao OpenAI ficam em voo ao mesmo tempo neste worker
+        self._semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+        self._max_concurrency = settings.openai_max_concurrency
+        # Palavras-chave compiladas uma única vez
+        self.keyword_matcher = KeywordMatcher.from_file(
+            settings.keywords_file,
+            categories=[category.value for category in EmailCategory]
+        )
+        self.local_model = self._load_local_model()
+        # Quantas decisões cada tier da cascata tomou
+        self.tier_counts = {"keywords": 0, "local": 0, "llm": 0}
+        # Emails idênticos classificados ao mesmo tempo compartilham uma única execução
+        self._single_flight = SingleFlight()
+        # Rate limit, retries e circuit breaker (os clientes do SDK não fazem retry próprio)
+        self._rate_limits = (settings.openai_rpm, settings.openai_tpm)
+        self._resilience = ResilientCaller(
+            limiter=RateLimiter(settings.openai_rpm, settings.openai_tpm),
+            breaker=CircuitBreaker(settings.circuit_failure_threshold, settings.circuit_reset_timeout),
+            max_retries=settings.openai_max_retries,
+            base_delay=settings.openai_retry_base_delay,
+            max_delay=settings.openai_retry_max_delay
+        )
+        
         if settings.openai_api_key:
             try:
-                self.client = OpenAI(api_key=settings.openai_api_key)
+                self.client = OpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_base_url,
+                    timeout=settings.openai_timeout,
+                    max_retries=0,
+                    http_client=httpx.Client(timeout=settings.openai_timeout)
+                )
+                # Cliente HTTP compartilhado: um único pool de conexões keep-alive
+                self._http_client = httpx.AsyncClient(
+                    timeout=settings.openai_timeout,
+                    limits=httpx.Limits(
+                        max_connections=settings.openai_max_connections,
+                        max_keepalive_connections=settings.openai_max_connections
+                    )
+                )
+                self.async_client = AsyncOpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_base_url,
+                    timeout=settings.openai_timeout,
+                    max_retries=0,
+                    http_client=self._http_client
+                )
             except Exception as e:
                 print(f"⚠️  Erro ao inicializar OpenAI: {str(e)}")
                 self.client = None
+                self.async_client = None
         else:
-            self.client = None
             print("⚠️  OPENAI_API_KEY não encontrada. Usando classificação por palavras-chave.")
     
-    def classify_email(self, text: str) -> EmailCategory:
-        """Classifica um email"""
+    @staticmethod
+    def _load_local_model():
+        """Carrega o classificador local, se habilitado"""
+        if settings.local_model_mode == "off":
+            return None
+        if not settings.local_model_path:
+            print("⚠️  LOCAL_MODEL_MODE ativo, mas LOCAL_MODEL_PATH não foi definido.")
+            return None
         try:
-            if not self.client:
-                return self._classify_by_keywords(text)
-            
-            prompt = f"""
+            return LocalClassifier.load(settings.local_model_path)
+        except Exception as e:
+            print(f"⚠️  Erro ao carregar o classificador local: {str(e)}")
+            return None
+    
+    def _score_by_keywords(self, text: str) -> Tuple[EmailCategory, float]:
+        """Categoria por palavras-chave e confiança entre 0 e 1
+        
+        A confiança é a margem entre as pontuações suavizada por +1 no
+        denominador: um único "Feliz Natal" (peso 1.5) dá 0.6, enquanto
+        textos sem palavras-chave ou empatados dão 0.
+        """
+        matches = self.keyword_matcher.match(text)
+        produtivo_score = matches.scores.get(EmailCategory.PRODUTIVO.value, 0.0)
+        improdutivo_score = matches.scores.get(EmailCategory.IMPRODUTIVO.value, 0.0)
+        
+        category = EmailCategory.PRODUTIVO if produtivo_score > improdutivo_score else EmailCategory.IMPRODUTIVO
+        confidence = abs(produtivo_score - improdutivo_score) / (produtivo_score + improdutivo_score + 1.0)
+        return category, confidence
+    
+    def _run_cheap_tiers(self, text: str) -> Optional[Tuple[EmailCategory, str, float]]:
+        """Executa os tiers baratos da cascata (palavras-chave e modelo local)
+        
+        Returns:
+            (categoria, tier, confiança) do primeiro tier confiante, ou None
+            quando a decisão deve subir para o LLM
+        """
+        if self.local_model and settings.local_model_mode == "primary":
+            category, confidence = self.local_model.classify([text])[0]
+            return category, "local", confidence
+        
+        if settings.cascade_enabled:
+            category, confidence = self._score_by_keywords(text)
+            if confidence >= settings.cascade_keyword_threshold:
+                return category, "keywords", confidence
+        
+        if self.local_model:
+            category, confidence = self.local_model.classify([text])[0]
+            if confidence >= settings.local_model_threshold:
+                return category, "local", confidence
+        
+        return None
+    
+    def warm_up(self) -> None:
+        """Executa os tiers locais uma vez, para a primeira requisição não pagar a inicialização"""
+        sample = "Preciso de ajuda com o acesso ao sistema."
+        self._score_by_keywords(sample)
+        fit_to_budget(sample, self.email_token_budget)
+        if self.local_model:
+            self.local_model.classify([sample])
+    
+    def _fit_to_budget(self, text: str) -> Tuple[str, TruncationInfo]:
+        """Aplica o orçamento de tokens do modelo ao texto que vai para o prompt"""
+        prompt_text, truncation = fit_to_budget(text, self.email_token_budget)
+        if truncation.truncated or truncation.quoted_reply_removed:
+            EMAIL_TRUNCATIONS.inc("truncated" if truncation.truncated else "quoted_reply_removed")
+        return prompt_text, truncation
+    
+    def _record_tier(self, tier: str) -> None:
+        self.tier_counts[tier] = self.tier_counts.get(tier, 0) + 1
+    
+    @staticmethod
+    def _build_classification_prompt(text: str) -> str:
+        """Monta o prompt de classificação"""
+        return f"""
 Classifique o seguinte email como "produtivo" ou "improdutivo":
 
 PRODUTIVO: Emails que requerem ação (suporte, dúvidas, problemas, solicitações)
@@ -39,16 +168,76 @@ Email: "{text}"
 
 Responda APENAS: produtivo ou improdutivo
 """
+
+    @staticmethod
+    def _build_response_prompt(text: str, category: EmailCategory) -> str:
+        """Monta o prompt de geração de resposta"""
+        if category == EmailCategory.PRODUTIVO:
+            return f"Gere uma resposta profissional para este email produtivo: '{text}'. Seja conciso (máximo 3 linhas)."
+        return f"Gere uma resposta educada para este email improdutivo: '{text}'. Seja breve (máximo 2 linhas)."
+    
+    @staticmethod
+    def _build_combined_prompt(text: str) -> str:
+        """Monta o prompt que classifica e gera a resposta em uma única chamada"""
+        return f"""
+Classifique o seguinte email como "produtivo" ou "improdutivo" e sugira uma resposta:
+
+PRODUTIVO: Emails que requerem ação (suporte, dúvidas, problemas, solicitações)
+IMPRODUTIVO: Emails que não requerem ação (felicitações, agradecimentos, spam)
+
+Para emails produtivos, gere uma resposta profissional e concisa (máximo 3 linhas).
+Para emails improdutivos, gere uma resposta educada e breve (máximo 2 linhas).
+
+Email: "{text}"
+
+Responda APENAS com um objeto JSON no formato:
+{{"category": "produtivo" ou "improdutivo", "response": "resposta sugerida"}}
+"""
+
+    @staticmethod
+    def _parse_combined_result(content: str) -> Tuple[EmailCategory, str]:
+        """Valida estritamente o JSON da chamada única
+
+        Raises:
+            ValueError: se o conteúdo não for um JSON com categoria e resposta válidas
+        """
+        data = json.loads(content or "")
+        if not isinstance(data, dict):
+            raise ValueError("Resposta estruturada não é um objeto JSON")
+        
+        category = EmailCategory(str(data.get("category", "")).strip().lower())
+        response = data.get("response")
+        if not isinstance(response, str) or not response.strip():
+            raise ValueError("Resposta estruturada sem campo 'response'")
+        
+        return category, response.strip()
+    
+    @staticmethod
+    def _parse_category(result: str) -> EmailCategory:
+        """Converte a resposta do modelo em categoria"""
+        result = result.lower().strip()
+        # "improdutivo" contém "produtivo", então precisa ser verificado primeiro
+        if "improdutivo" in result:
+            return EmailCategory.IMPRODUTIVO
+        return EmailCategory.PRODUTIVO if "produtivo" in result else EmailCategory.IMPRODUTIVO
+    
+    def classify_email(self, text: str) -> EmailCategory:
+        """Classifica um email"""
+        try:
+            cheap = self._run_cheap_tiers(text)
+            if cheap:
+                return cheap[0]
+            
+            if not self.client:
+                return self._classify_by_keywords(text)
             
-            response = self.client.chat.completions.create(
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=10,
-                temperature=0.1
+            prompt_text, _ = self._fit_to_budget(text)
+            response = self._create_completion_sync(
+                messages=[{"role": "user", "content": self._build_classification_prompt(prompt_text)}],
+                **settings.completion_params("classify")
             )
             
-            result = response.choices[0].message.content.lower().strip()
-            return EmailCategory.PRODUTIVO if "produtivo" in result else EmailCategory.IMPRODUTIVO
+            return self._parse_category(response.choices[0].message.content)
         
         except Exception as e:
             print(f"Erro na classificação: {str(e)}")
@@ -56,23 +245,8 @@ Responda APENAS: produtivo ou improdutivo
     
     def _classify_by_keywords(self, text: str) -> EmailCategory:
         """Classificação por palavras-chave"""
-        text_lower = text.lower()
-        
-        produtivo_keywords = [
-            "problema", "erro", "bug", "não funciona", "ajuda", "suporte",
-            "solicitação", "pedido", "reclamação", "dúvida", "questão",
-            "atualização", "status", "andamento", "prazo", "urgente"
-        ]
-        
-        improdutivo_keywords = [
-            "feliz natal", "feliz ano novo", "parabéns", "obrigado",
-            "agradecimento", "spam", "promoção", "oferta"
-        ]
-        
-        produtivo_count = sum(1 for keyword in produtivo_keywords if keyword in text_lower)
-        improdutivo_count = sum(1 for keyword in improdutivo_keywords if keyword in text_lower)
-        
-        return EmailCategory.PRODUTIVO if produtivo_count > improdutivo_count else EmailCategory.IMPRODUTIVO
+        category, _ = self._score_by_keywords(text)
+        return category
     
     def generate_response(self, text: str, category: EmailCategory) -> str:
         """Gera resposta automática"""
@@ -80,16 +254,10 @@ Responda APENAS: produtivo ou improdutivo
             if not self.client:
                 return self._get_template_response(category)
             
-            if category == EmailCategory.PRODUTIVO:
-                prompt = f"Gere uma resposta profissional para este email produtivo: '{text}'. Seja conciso (máximo 3 linhas)."
-            else:
-                prompt = f"Gere uma resposta educada para este email improdutivo: '{text}'. Seja breve (máximo 2 linhas)."
-            
-            response = self.client.chat.completions.create(
-                model=settings.openai_model,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.7
+            prompt_text, _ = self._fit_to_budget(text)
+            response = self._create_completion_sync(
+                messages=[{"role": "user", "content": self._build_response_prompt(prompt_text, category)}],
+                **settings.completion_params("reply")
             )
             
             return response.choices[0].message.content.strip()
@@ -105,8 +273,408 @@ Responda APENAS: produtivo ou improdutivo
         else:
             return "Obrigado pela sua mensagem. Agradecemos o contato e desejamos um ótimo dia!"
     
+    def _classify_and_generate_single_call(self, text: str) -> Tuple[EmailCategory, str]:
+        """Classifica e gera resposta com uma única completion estruturada"""
+        prompt_text, _ = self._fit_to_budget(text)
+        response = self._create_completion_sync(
+            messages=[{"role": "user", "content": self._build_combined_prompt(prompt_text)}],
+            response_format={"type": "json_object"},
+            **settings.completion_params("combined")
+        )
+        return self._parse_combined_result(response.choices[0].message.content)
+    
     def classify_and_generate_response(self, text: str) -> Tuple[EmailCategory, str]:
         """Classifica email e gera resposta"""
+        cheap = self._run_cheap_tiers(text)
+        if cheap:
+            category = cheap[0]
+            if settings.cascade_template_reply:
+                return category, self._get_template_response(category)
+            return category, self.generate_response(text, category)
+        
+        if self.client and settings.openai_single_call:
+            try:
+                return self._classify_and_generate_single_call(text)
+            except Exception as e:
+                print(f"Erro na chamada única, usando duas chamadas: {str(e)}")
+        
         category = self.classify_email(text)
         response = self.generate_response(text, category)
-        return category, response
\ No newline at end of file
+        return category, response
+    
+    @staticmethod
+    def _estimate_tokens(kwargs: dict) -> int:
+        """Estimativa de tokens para a cota de TPM (prompt + resposta máxima)"""
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in kwargs.get("messages", []))
+        return prompt_tokens + kwargs.get("max_tokens", 0)
+    
+    def _create_completion_sync(self, **kwargs):
+        """Chamada síncrona ao OpenAI com a camada de resiliência"""
+        return self._resilience.call_sync(
+            lambda: self.client.chat.completions.create(model=settings.openai_model, **kwargs),
+            self._estimate_tokens(kwargs)
+        )
+    
+    async def _create_completion(self, **kwargs):
+        """Chamada assíncrona ao OpenAI com timeout, concorrência limitada e a camada de resiliência"""
+        async def send():
+            async with self._semaphore:
+                return await self.async_client.chat.completions.create(
+                    model=settings.openai_model,
+                    timeout=settings.openai_timeout,
+                    **kwargs
+                )
+        
+        return await self._resilience.call(send, self._estimate_tokens(kwargs))
+    
+    async def _classify_llm_async(self, text: str) -> EmailCategory:
+        """Classificação via OpenAI (propaga erros); `text` já deve estar no orçamento"""
+        response = await self._create_completion(
+            messages=[{"role": "user", "content": self._build_classification_prompt(text)}],
+            **settings.completion_params("classify")
+        )
+        return self._parse_category(response.choices[0].message.content)
+    
+    async def _generate_llm_async(self, text: str, category: EmailCategory) -> str:
+        """Geração de resposta via OpenAI (propaga erros); `text` já deve estar no orçamento"""
+        response = await self._create_completion(
+            messages=[{"role": "user", "content": self._build_response_prompt(text, category)}],
+            **settings.completion_params("reply")
+        )
+        return response.choices[0].message.content.strip()
+    
+    async def _stream_llm_async(self, text: str, category: EmailCategory) -> AsyncIterator[str]:
+        """Geração de resposta via OpenAI em streaming, trecho a trecho (propaga erros)
+        
+        `text` já deve estar no orçamento. A vaga do semáforo é pega a cada
+        tentativa (não durante o backoff entre elas) e, depois que o stream
+        abre, fica ocupada até o fim dele.
+        """
+        kwargs = {
+            "messages": [{"role": "user", "content": self._build_response_prompt(text, category)}],
+            **settings.completion_params("reply")
+        }
+        # O mesmo semáforo do início ao fim, mesmo que um recarregamento troque o do classificador
+        semaphore = self._semaphore
+        
+        async def open_stream():
+            await semaphore.acquire()
+            try:
+                return await self.async_client.chat.completions.create(
+                    model=settings.openai_model,
+                    timeout=settings.openai_timeout,
+                    stream=True,
+                    **kwargs
+                )
+            except BaseException:
+                semaphore.release()
+                raise
+        
+        stream = await self._resilience.call(open_stream, self._estimate_tokens(kwargs))
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.response.aclose()
+            semaphore.release()
+    
+    async def classify_email_async(self, text: str) -> EmailCategory:
+        """Classifica um email sem bloquear o event loop"""
+        try:
+            cheap = self._run_cheap_tiers(text)
+            if cheap:
+                return cheap[0]
+            
+            if not self.async_client:
+                return self._classify_by_keywords(text)
+            
+            prompt_text, _ = self._fit_to_budget(text)
+            return await self._classify_llm_async(prompt_text)
+        
+        except Exception as e:
+            print(f"Erro na classificação: {str(e)}")
+            FALLBACKS.inc("keywords")
+            return self._classify_by_keywords(text)
+    
+    async def generate_response_async(self, text: str, category: EmailCategory) -> str:
+        """Gera resposta automática sem bloquear o event loop"""
+        try:
+            if not self.async_client:
+                return self._get_template_response(category)
+            
+            prompt_text, _ = self._fit_to_budget(text)
+            return await self._generate_llm_async(prompt_text, category)
+        
+        except Exception as e:
+            print(f"Erro na geração: {str(e)}")
+            FALLBACKS.inc("template")
+            return self._get_template_response(category)
+    
+    async def _classify_and_generate_single_call_async(self, text: str) -> Tuple[EmailCategory, str]:
+        """Classifica e gera resposta com uma única completion estruturada (versão assíncrona)
+        
+        `text` já deve estar no orçamento de tokens.
+        """
+        response = await self._create_completion(
+            messages=[{"role": "user", "content": self._build_combined_prompt(text)}],
+            response_format={"type": "json_object"},
+            **settings.completion_params("combined")
+        )
+        return self._parse_combined_result(response.choices[0].message.content)
+    
+    async def classify_detailed_async(self, text: str) -> ClassificationResult:
+        """Classifica email e gera resposta, coalescendo textos idênticos em andamento
+        
+        A chave é a mesma do cache de resultados (texto normalizado e
+        configuração do classificador), então chamadas concorrentes com o
+        mesmo email aguardam uma única execução e recebem o mesmo resultado
+        ou a mesma exceção.
+        """
+        key = ResultCache.build_key(text, self.cache_namespace)
+        return await self._single_flight.run(key, lambda: self._classify_detailed_async(text))
+    
+    async def classify_category_async(
+        self,
+        text: str
+    ) -> Tuple[ClassificationResult, Optional[str], Optional[TruncationInfo]]:
+        """Só a categoria, sem gerar resposta (coalescendo textos idênticos em andamento)
+        
+        Returns:
+            (resultado sem suggested_response, texto do email já no orçamento
+            de tokens para gerar a resposta depois com generate_reply_async,
+            corte aplicado a esse texto). O texto é None quando a resposta
+            será o template.
+        """
+        key = ResultCache.build_key(text, self.cache_namespace)
+        return await self._single_flight.run("category:" + key, lambda: self._classify_category_async(text))
+    
+    async def generate_reply_async(self, key: str, prompt_text: Optional[str], result: ClassificationResult) -> ClassificationResult:
+        """Gera a resposta de uma classificação feita antes por classify_category_async
+        
+        Args:
+            key: Identificador da classificação (coalesce pedidos simultâneos)
+            prompt_text: Texto do email já no orçamento de tokens (None se a resposta for o template)
+            result: Classificação sem resposta, com o corte aplicado a `prompt_text`
+        """
+        if prompt_text is None:
+            # O texto não foi guardado porque a classificação previa o template; se a
+            # configuração mudou depois (recarregamento, outro worker), o template continua valendo
+            return result.copy(update={"suggested_response": self._get_template_response(result.category)})
+        return await self._single_flight.run("reply:" + key, lambda: self._add_reply_async(result, prompt_text, prompt_text))
+    
+    async def _classify_detailed_async(self, text: str) -> ClassificationResult:
+        """Classifica email e gera resposta pela cascata de tiers
+        
+        Os tiers baratos decidem primeiro; o LLM só é chamado quando eles
+        não têm confiança suficiente. O resultado informa o tier que decidiu
+        e se houve fallback por erro do OpenAI.
+        """
+        result, prompt_text = await self._run_cascade_async(text, combined=True)
+        return await self._add_reply_async(result, text, prompt_text)
+    
+    async def _classify_category_async(
+        self,
+        text: str
+    ) -> Tuple[ClassificationResult, Optional[str], Optional[TruncationInfo]]:
+        result, prompt_text = await self._run_cascade_async(text, combined=False)
+        reply_truncation = result.truncation
+        if prompt_text is None and not self._uses_template_reply(result):
+            prompt_text, reply_truncation = self._fit_to_budget(text)
+        return result, prompt_text, reply_truncation
+    
+    async def _run_cascade_async(self, text: str, combined: bool) -> Tuple[ClassificationResult, Optional[str]]:
+        """Decide a categoria pela cascata de tiers
+        
+        Com `combined` e OPENAI_SINGLE_CALL, a chamada única ao LLM já traz a
+        resposta sugerida; nos demais casos ela fica vazia.
+        
+        Returns:
+            (resultado, texto enviado ao LLM ou None se o LLM não foi chamado)
+        """
+        # A etapa de classificação inclui os tiers baratos mesmo quando o LLM decide
+        classification_start = time.perf_counter()
+        cheap = self._run_cheap_tiers(text)
+        if cheap:
+            STAGE_DURATION.observe(time.perf_counter() - classification_start, "classification")
+            category, tier, confidence = cheap
+            self._record_tier(tier)
+            return ClassificationResult(category=category, tier=tier, confidence=confidence), None
+        
+        if not self.async_client:
+            category, confidence = self._score_by_keywords(text)
+            STAGE_DURATION.observe(time.perf_counter() - classification_start, "classification")
+            self._record_tier("keywords")
+            return ClassificationResult(category=category, tier="keywords", confidence=confidence), None
+        
+        prompt_text, truncation = self._fit_to_budget(text)
+        
+        if combined and settings.openai_single_call:
+            try:
+                # Classificação e resposta saem da mesma chamada
+                with STAGE_DURATION.time("classification_and_response"):
+                    category, response = await self._classify_and_generate_single_call_async(prompt_text)
+                self._record_tier("llm")
+                return ClassificationResult(
+                    category=category, suggested_response=response, tier="llm", truncation=truncation
+                ), prompt_text
+            except Exception as e:
+                print(f"Erro na chamada única, usando duas chamadas: {str(e)}")
+        
+        tier = "llm"
+        fallback = False
+        try:
+            category = await self._classify_llm_async(prompt_text)
+        except Exception as e:
+            print(f"Erro na classificação: {str(e)}")
+            FALLBACKS.inc("keywords")
+            category = self._classify_by_keywords(text)
+            tier = "keywords"
+            fallback = True
+        STAGE_DURATION.observe(time.perf_counter() - classification_start, "classification")
+        self._record_tier(tier)
+        return ClassificationResult(
+            category=category, tier=tier, fallback=fallback, truncation=truncation
+        ), prompt_text
+    
+    async def stream_reply_async(
+        self,
+        result: ClassificationResult,
+        text: str,
+        prompt_text: Optional[str] = None
+    ) -> AsyncIterator[Union[str, ClassificationResult]]:
+        """Gera a resposta sugerida em trechos, à medida que o modelo os produz
+        
+        O template (sem OpenAI ou decisão dos tiers baratos) sai de uma vez.
+        Se o OpenAI falhar, o template substitui a resposta, como em
+        _add_reply_async. O último item é o ClassificationResult completo,
+        cuja suggested_response é a definitiva.
+        """
+        if result.suggested_response is not None:
+            yield result.suggested_response
+            yield result
+            return
+        if self._uses_template_reply(result):
+            template = self._get_template_response(result.category)
+            yield template
+            yield result.copy(update={"suggested_response": template})
+            return
+        
+        truncation = result.truncation
+        if prompt_text is None:
+            prompt_text, truncation = self._fit_to_budget(text)
+        parts = []
+        fallback = result.fallback
+        try:
+            with STAGE_DURATION.time("response_generation"):
+                async for delta in self._stream_llm_async(prompt_text, result.category):
+                    parts.append(delta)
+                    yield delta
+            response = "".join(parts).strip()
+        except Exception as e:
+            print(f"Erro na geração: {str(e)}")
+            FALLBACKS.inc("template")
+            response = self._get_template_response(result.category)
+            fallback = True
+            if not parts:
+                yield response
+        yield result.copy(update={"suggested_response": response, "fallback": fallback, "truncation": truncation})
+    
+    def _uses_template_reply(self, result: ClassificationResult) -> bool:
+        """Sem OpenAI, ou decisão dos tiers baratos com CASCADE_TEMPLATE_REPLY, a resposta é o template"""
+        if not self.async_client:
+            return True
+        return settings.cascade_template_reply and result.tier != "llm" and not result.fallback
+    
+    async def _add_reply_async(
+        self,
+        result: ClassificationResult,
+        text: str,
+        prompt_text: Optional[str] = None
+    ) -> ClassificationResult:
+        """Completa o resultado com a resposta sugerida (template ou LLM)
+        
+        `prompt_text` é o texto já no orçamento; None quando o LLM ainda não
+        foi chamado e o orçamento precisa ser aplicado a `text`.
+        """
+        if result.suggested_response is not None:
+            return result
+        if self._uses_template_reply(result):
+            return result.copy(update={"suggested_response": self._get_template_response(result.category)})
+        
+        truncation = result.truncation
+        if prompt_text is None:
+            prompt_text, truncation = self._fit_to_budget(text)
+        try:
+            with STAGE_DURATION.time("response_generation"):
+                response = await self._generate_llm_async(prompt_text, result.category)
+            fallback = result.fallback
+        except Exception as e:
+            print(f"Erro na geração: {str(e)}")
+            FALLBACKS.inc("template")
+            response = self._get_template_response(result.category)
+            fallback = True
+        return result.copy(update={"suggested_response": response, "fallback": fallback, "truncation": truncation})
+    
+    async def classify_and_generate_response_async(self, text: str) -> Tuple[EmailCategory, str]:
+        """Classifica email e gera resposta (versão assíncrona)"""
+        result = await self.classify_detailed_async(text)
+        return result.category, result.suggested_response
+    
+    def tier_stats(self) -> dict:
+        """Decisões por tier, fração que subiu para o LLM e chamadas coalescidas"""
+        total = sum(self.tier_counts.values())
+        return {
+            "tiers": dict(self.tier_counts),
+            "total": total,
+            "escalation_rate": round(self.tier_counts.get("llm", 0) / total, 4) if total else 0.0,
+            "coalesced": self._single_flight.coalesced,
+            "in_flight": self._single_flight.in_flight,
+            "circuit_state": self._resilience.breaker.state
+        }
+    
+    @property
+    def email_token_budget(self) -> int:
+        """Tokens do email que cabem no prompt, conforme o modelo configurado (relido a cada uso)"""
+        return budget_for_model(settings.openai_model, settings.email_token_budgets, settings.email_token_budget)
+    
+    @property
+    def cache_namespace(self) -> str:
+        """Identifica modelo, versão de prompt e modo para as chaves de cache"""
+        namespace = "keywords"
+        if self.async_client:
+            mode = "single" if settings.openai_single_call else "double"
+            namespace = f"{settings.openai_model}:{PROMPT_VERSION}:{mode}:budget-{self.email_token_budget}"
+            # Respostas geradas com outros parâmetros não são reaproveitadas
+            reply = settings.completion_params("combined" if settings.openai_single_call else "reply")
+            namespace += f":reply-{reply['max_tokens']}-{reply['temperature']}"
+        if self.local_model:
+            namespace += f":local-{settings.local_model_mode}-{settings.local_model_threshold}-{self.local_model.version}"
+        if settings.cascade_enabled:
+            namespace += f":cascade-{settings.cascade_keyword_threshold}-{settings.cascade_template_reply}"
+        return namespace
+    
+    def apply_settings(self) -> None:
+        """Aplica os limites de concorrência e resiliência depois de um settings.reload()
+        
+        Modelo, orçamento, parâmetros das completions e limiares da cascata já
+        são lidos a cada chamada. O semáforo e o rate limiter são trocados por
+        novos só quando os limites mudam: chamadas em andamento terminam com
+        os antigos.
+        """
+        if settings.openai_max_concurrency != self._max_concurrency:
+            self._semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+            self._max_concurrency = settings.openai_max_concurrency
+        if (settings.openai_rpm, settings.openai_tpm) != self._rate_limits:
+            self._resilience.limiter = RateLimiter(settings.openai_rpm, settings.openai_tpm)
+            self._rate_limits = (settings.openai_rpm, settings.openai_tpm)
+        self._resilience.breaker.failure_threshold = settings.circuit_failure_threshold
+        self._resilience.breaker.reset_timeout = settings.circuit_reset_timeout
+        self._resilience.max_retries = settings.openai_max_retries
+        self._resilience.base_delay = settings.openai_retry_base_delay
+        self._resilience.max_delay = settings.openai_retry_max_delay
+    
+    async def aclose(self) -> None:
+        """Fecha o pool de conexões HTTP compartilhado"""
+        if self._http_client:
+            await self._http_client.aclose()
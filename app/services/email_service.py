@@ -3,12 +3,33 @@ Service para lógica de negócio de emails
 """
 
 from fastapi import HTTPException, status, UploadFile
+from contextlib import aclosing
+from typing import Any, AsyncIterator, List, Optional, Tuple
+import asyncio
+import json
+import os
 import time
 
-from ..models.email_models import EmailResponse
+from ..models.email_models import (
+    BatchItemResult,
+    BatchResponse,
+    ClassificationResult,
+    EmailCategory,
+    EmailResponse
+)
+from .audit_log import AuditLog
 from .email_classifier import EmailClassifier
+from .extraction_pool import ExtractionPool, ExtractionTimeoutError
 from .file_processor import FileProcessor
+from .result_cache import ResultCache
+from .upload_reader import UploadTooLargeError, open_upload
 from ..utils.config import settings
+from ..utils.metrics import CACHE_REQUESTS, CLASSIFICATIONS, STAGE_DURATION, metrics
+from ..utils.streaming import sse_event
+
+
+# Valores do gauge de estado do circuit breaker
+CIRCUIT_STATES = {"closed": 0, "open": 1, "half_open": 2}
 
 
 class EmailService:
@@ -18,9 +39,87 @@ class EmailService:
         """Inicializa o service"""
         self.email_classifier = EmailClassifier()
         self.file_processor = FileProcessor()
+        self.extraction_pool = ExtractionPool(
+            max_workers=settings.extraction_workers,
+            timeout=settings.extraction_timeout,
+            txt_threshold=settings.extraction_txt_threshold
+        )
+        self.result_cache = ResultCache(
+            max_entries=settings.cache_max_entries,
+            ttl_seconds=settings.cache_ttl_seconds,
+            sqlite_path=settings.cache_sqlite_path
+        ) if settings.cache_enabled else None
+        # Classificações feitas sem resposta, pelo identificador, até a resposta ser pedida
+        self.reply_store = ResultCache(
+            max_entries=settings.reply_store_max_entries,
+            ttl_seconds=settings.reply_store_ttl_seconds,
+            sqlite_path=settings.reply_store_sqlite_path
+        )
+        # Registro de cada classificação para revisão e retreino (gravado em segundo plano)
+        self.audit_log = AuditLog(
+            settings.audit_dir,
+            max_buffered=settings.audit_max_buffered,
+            batch_size=settings.audit_batch_size,
+            flush_interval=settings.audit_flush_interval,
+            rotate_bytes=settings.audit_rotate_bytes,
+            include_text=settings.audit_include_text,
+            text_max_chars=settings.audit_text_max_chars
+        ) if settings.audit_enabled else None
+        # Pronto para receber tráfego depois do warm_up()
+        self.ready = False
+        self._register_metrics()
+    
+    def _register_metrics(self) -> None:
+        """Expõe no /metrics os valores que já são contados pelos próprios componentes"""
+        classifier = self.email_classifier
+        metrics.register_callback(
+            "autou_coalesced_requests_total",
+            "Classificações que aguardaram uma chamada idêntica já em andamento",
+            "counter",
+            lambda: classifier.tier_stats()["coalesced"]
+        )
+        metrics.register_callback(
+            "autou_in_flight_classifications",
+            "Classificações distintas em andamento",
+            "gauge",
+            lambda: classifier.tier_stats()["in_flight"]
+        )
+        metrics.register_callback(
+            "autou_circuit_breaker_state",
+            "Estado do circuit breaker do OpenAI (0 = fechado, 1 = aberto, 2 = half-open)",
+            "gauge",
+            lambda: CIRCUIT_STATES[classifier.tier_stats()["circuit_state"]]
+        )
+        if self.result_cache:
+            cache = self.result_cache
+            metrics.register_callback(
+                "autou_cache_entries",
+                "Entradas no cache de resultados em memória",
+                "gauge",
+                lambda: cache.stats()["entries"]
+            )
+    
+    async def warm_up(self) -> None:
+        """Aquece o classificador e o pool de extração e marca o service como pronto"""
+        start = time.time()
+        self.email_classifier.warm_up()
+        try:
+            await self.extraction_pool.warm_up()
+        except Exception as e:
+            # O pool é recriado sob demanda; não vale segurar o worker fora do ar por isso
+            print(f"⚠️  Erro ao aquecer o pool de extração: {str(e)}")
+        self.ready = True
+        print(f"✅ Worker {os.getpid()} pronto em {time.time() - start:.2f}s")
     
     def validate_input(self, text: str = None, file: UploadFile = None) -> None:
         """Valida a entrada do usuário"""
+        if text is not None and not isinstance(text, str):
+            # Itens JSON do lote e do streaming podem trazer qualquer tipo em "text"
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Campo 'text' deve ser uma string"
+            )
+        
         if not text and not file:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -48,39 +147,543 @@ class EmailService:
     async def process_email_classification(
         self, 
         text: str = None, 
-        file: UploadFile = None
+        file: UploadFile = None,
+        include_reply: bool = True
     ) -> EmailResponse:
-        """Processa classificação de email completa"""
+        """Processa classificação de email completa
+        
+        Com `include_reply=False` só a categoria é calculada; a resposta fica
+        para POST /classifications/{classification_id}/reply.
+        """
         start_time = time.time()
         
-        # Validar entrada
+        # Validar e processar entrada
+        email_text = await self._extract_email_text(text, file)
+        
+        if not include_reply:
+            return await self._process_category_only(email_text, start_time)
+        
+        # Classificar e gerar resposta
+        try:
+            classification, cached = await self._classify_with_cache(email_text)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro na classificação: {str(e)}"
+            )
+        
+        # Retornar resposta
+        return EmailResponse(
+            category=classification.category,
+            suggested_response=classification.suggested_response,
+            processing_time=round(time.time() - start_time, 3),
+            text_length=len(email_text),
+            cached=cached,
+            tier=classification.tier,
+            truncation=classification.truncation
+        )
+    
+    async def _extract_email_text(self, text: str = None, file: UploadFile = None) -> str:
+        """Valida a entrada e extrai o texto do email (texto direto ou arquivo)"""
         self.validate_input(text, file)
         
-        # Processar entrada
         if file:
-            file_content = await file.read()
-            if not self.file_processor.validate_file_size(file_content):
+            try:
+                with STAGE_DURATION.time("upload_read"):
+                    upload = open_upload(file, max_size=settings.max_file_size)
+            except UploadTooLargeError:
                 raise HTTPException(
                     status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                     detail=f"Arquivo muito grande. Máximo: {settings.max_file_size // (1024*1024)}MB"
                 )
-            email_text = self.file_processor.process_file_content(file_content, file.filename)
-        else:
-            email_text = text.strip()
+            try:
+                return await self.extraction_pool.process_upload(upload)
+            except ExtractionTimeoutError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=str(e)
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e)
+                )
         
-        # Classificar e gerar resposta
+        return self.file_processor.strip_boilerplate(text).strip()
+    
+    async def _classify_with_cache(self, email_text: str) -> Tuple[ClassificationResult, bool]:
+        """Classifica consultando antes o cache de resultados
+        
+        Returns:
+            (resultado da classificação, se veio do cache)
+        """
+        start_time = time.time()
+        result, cached = await self._lookup_or_classify(email_text)
+        CLASSIFICATIONS.inc(result.category.value, result.tier)
+        self._audit(email_text, result, cached, start_time)
+        return result, cached
+    
+    def _audit(self, email_text: str, result: ClassificationResult, cached: bool, start_time: float) -> None:
+        """Registra a classificação no log de auditoria (só enfileira; não bloqueia)"""
+        if self.audit_log is None:
+            return
+        model = {
+            "llm": settings.openai_model,
+            "local": settings.local_model_path,
+            "keywords": os.path.basename(settings.keywords_file)
+        }.get(result.tier)
+        self.audit_log.record(
+            email_text,
+            category=result.category.value,
+            tier=result.tier,
+            model=model,
+            latency=round(time.time() - start_time, 4),
+            cached=cached,
+            fallback=result.fallback,
+            reply=result.suggested_response is not None
+        )
+    
+    async def _cached_result(self, cache_key: str) -> Optional[ClassificationResult]:
+        """Resultado completo (categoria e resposta) do cache, se houver"""
+        cached_value = await self.result_cache.get(cache_key)
+        if cached_value is None:
+            CACHE_REQUESTS.inc("miss")
+            return None
+        CACHE_REQUESTS.inc("hit")
+        return ClassificationResult(
+            category=EmailCategory(cached_value["category"]),
+            suggested_response=cached_value["suggested_response"],
+            tier=cached_value.get("tier", "llm"),
+            truncation=cached_value.get("truncation")
+        )
+    
+    async def _store_result(self, cache_key: str, result: ClassificationResult) -> None:
+        # Resultados degradados (fallback por erro do OpenAI) não são reaproveitados
+        if self.result_cache and not result.fallback:
+            await self.result_cache.set(cache_key, {
+                "category": result.category.value,
+                "suggested_response": result.suggested_response,
+                "tier": result.tier,
+                "truncation": result.truncation.dict() if result.truncation else None
+            })
+    
+    async def _lookup_or_classify(self, email_text: str) -> Tuple[ClassificationResult, bool]:
+        if not self.result_cache:
+            return await self.email_classifier.classify_detailed_async(email_text), False
+        
+        cache_key = ResultCache.build_key(email_text, self.email_classifier.cache_namespace)
+        cached = await self._cached_result(cache_key)
+        if cached is not None:
+            return cached, True
+        
+        result = await self.email_classifier.classify_detailed_async(email_text)
+        await self._store_result(cache_key, result)
+        return result, False
+    
+    async def _process_category_only(self, email_text: str, start_time: float) -> EmailResponse:
+        """Só a categoria; o texto no orçamento fica guardado para a resposta ser gerada depois
+        
+        O identificador da classificação é a própria chave do cache: se a
+        resposta completa já estiver em cache, ela volta sem custo.
+        """
+        classification_id = ResultCache.build_key(email_text, self.email_classifier.cache_namespace)
         try:
-            category, suggested_response = self.email_classifier.classify_and_generate_response(email_text)
+            classification, cached = await self._classify_category_with_cache(classification_id, email_text)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro na classificação: {str(e)}"
             )
+        CLASSIFICATIONS.inc(classification.category.value, classification.tier)
+        self._audit(email_text, classification, cached, start_time)
+        
+        return EmailResponse(
+            category=classification.category,
+            suggested_response=classification.suggested_response,
+            processing_time=round(time.time() - start_time, 3),
+            text_length=len(email_text),
+            cached=cached,
+            tier=classification.tier,
+            truncation=classification.truncation,
+            classification_id=classification_id
+        )
+    
+    async def _classify_category_with_cache(
+        self,
+        classification_id: str,
+        email_text: str
+    ) -> Tuple[ClassificationResult, bool]:
+        if self.result_cache:
+            cached = await self._cached_result(classification_id)
+            if cached is not None:
+                return cached, True
+        
+        pending = await self.reply_store.get(classification_id)
+        if pending is not None and not pending["fallback"]:
+            return self._pending_result(pending, pending["truncation"]), True
+        
+        result, prompt_text, reply_truncation = await self.email_classifier.classify_category_async(email_text)
+        await self.reply_store.set(classification_id, {
+            "category": result.category.value,
+            "tier": result.tier,
+            "fallback": result.fallback,
+            "truncation": result.truncation.dict() if result.truncation else None,
+            "prompt_text": prompt_text,
+            "reply_truncation": reply_truncation.dict() if reply_truncation else None,
+            "text_length": len(email_text)
+        })
+        return result, False
+    
+    @staticmethod
+    def _pending_result(pending: dict, truncation: Optional[dict]) -> ClassificationResult:
+        return ClassificationResult(
+            category=EmailCategory(pending["category"]),
+            tier=pending["tier"],
+            fallback=pending["fallback"],
+            truncation=truncation
+        )
+    
+    async def generate_reply(self, classification_id: str) -> EmailResponse:
+        """Gera a resposta sugerida de uma classificação feita com include_reply=False"""
+        start_time = time.time()
+        
+        # A resposta completa pode já estar no cache (inclusive de outra requisição)
+        result = await self._cached_result(classification_id) if self.result_cache else None
+        pending = await self.reply_store.get(classification_id)
+        if result is None and pending is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Classificação não encontrada ou expirada"
+            )
+        
+        cached = result is not None
+        if not cached:
+            try:
+                result = await self.email_classifier.generate_reply_async(
+                    classification_id,
+                    pending["prompt_text"],
+                    self._pending_result(pending, pending["reply_truncation"])
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Erro na geração da resposta: {str(e)}"
+                )
+            await self._store_result(classification_id, result)
         
-        # Retornar resposta
         return EmailResponse(
-            category=category,
-            suggested_response=suggested_response,
+            category=result.category,
+            suggested_response=result.suggested_response,
             processing_time=round(time.time() - start_time, 3),
-            text_length=len(email_text)
-        )
\ No newline at end of file
+            text_length=pending["text_length"] if pending else 0,
+            cached=cached,
+            tier=result.tier,
+            truncation=result.truncation,
+            classification_id=classification_id
+        )
+    
+    async def open_classification_stream(self, text: str = None, file: UploadFile = None) -> AsyncIterator[str]:
+        """Extrai o texto do email e retorna os eventos SSE da classificação
+        
+        Erros de entrada são levantados aqui, antes do streaming começar,
+        para saírem com o status HTTP certo.
+        """
+        start_time = time.time()
+        email_text = await self._extract_email_text(text, file)
+        return self._stream_classification(email_text, start_time)
+    
+    async def _stream_classification(self, email_text: str, start_time: float) -> AsyncIterator[str]:
+        """Eventos SSE: `category` assim que a categoria é decidida, `token` a cada
+        trecho da resposta e `done` com o EmailResponse completo (a resposta
+        definitiva, que substitui os trechos se o OpenAI falhar no meio)"""
+        try:
+            cache_key = ResultCache.build_key(email_text, self.email_classifier.cache_namespace)
+            cached = await self._cached_result(cache_key) if self.result_cache else None
+            if cached is not None:
+                result, prompt_text = cached, None
+            else:
+                result, prompt_text, reply_truncation = await self.email_classifier.classify_category_async(email_text)
+                result = result.copy(update={"truncation": reply_truncation})
+            CLASSIFICATIONS.inc(result.category.value, result.tier)
+            yield sse_event("category", json.dumps({
+                "category": result.category.value,
+                "tier": result.tier,
+                "cached": cached is not None
+            }))
+            
+            async with aclosing(self.email_classifier.stream_reply_async(result, email_text, prompt_text)) as replies:
+                async for item in replies:
+                    if isinstance(item, ClassificationResult):
+                        result = item
+                    else:
+                        yield sse_event("token", json.dumps({"text": item}, ensure_ascii=False))
+            if cached is None:
+                await self._store_result(cache_key, result)
+            self._audit(email_text, result, cached is not None, start_time)
+            
+            response = EmailResponse(
+                category=result.category,
+                suggested_response=result.suggested_response,
+                processing_time=round(time.time() - start_time, 3),
+                text_length=len(email_text),
+                cached=cached is not None,
+                tier=result.tier,
+                truncation=result.truncation
+            )
+            yield sse_event("done", response.json())
+        except Exception as e:
+            yield sse_event("error", json.dumps({"detail": f"Erro na classificação: {str(e)}"}, ensure_ascii=False))
+    
+    @staticmethod
+    def parse_batch_payload(payload: Any) -> List[Tuple[Optional[str], Optional[str], Optional[UploadFile]]]:
+        """Converte o JSON do lote em itens (id, texto, arquivo)
+        
+        Aceita uma lista de strings ou de objetos {"id": ..., "text": ...}.
+        """
+        if isinstance(payload, dict):
+            payload = payload.get("items")
+        if not isinstance(payload, list):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O corpo deve ser uma lista JSON de emails"
+            )
+        
+        return [EmailService._parse_batch_entry(entry) + (None,) for entry in payload]
+    
+    @staticmethod
+    def _parse_batch_entry(entry: Any) -> Tuple[Optional[str], Any]:
+        """(id, texto) de um item do lote ou de uma linha NDJSON
+        
+        O texto volta como veio no JSON; um "text" que não é string é
+        rejeitado por validate_input, como erro do item.
+        """
+        if isinstance(entry, dict):
+            item_id = entry.get("id")
+            return (str(item_id) if item_id is not None else None), entry.get("text")
+        return None, entry if isinstance(entry, str) else None
+    
+    async def process_batch(
+        self,
+        items: List[Tuple[Optional[str], Optional[str], Optional[UploadFile]]]
+    ) -> BatchResponse:
+        """Classifica um lote de emails com deduplicação e concorrência limitada
+        
+        Falhas são reportadas por item, sem derrubar o lote inteiro.
+        """
+        start_time = time.time()
+        
+        if not items:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O lote está vazio"
+            )
+        if len(items) > settings.batch_max_items:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Lote muito grande. Máximo: {settings.batch_max_items} itens"
+            )
+        
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        texts: List[Optional[str]] = [None] * len(items)
+        
+        semaphore = asyncio.Semaphore(settings.batch_concurrency)
+        
+        async def extract_item(index: int) -> None:
+            item_id, text, file = items[index]
+            async with semaphore:
+                try:
+                    texts[index] = await self._extract_email_text(text, file)
+                except HTTPException as e:
+                    results[index] = BatchItemResult(index=index, id=item_id, status="error", error=str(e.detail))
+                except ValueError as e:
+                    results[index] = BatchItemResult(index=index, id=item_id, status="error", error=str(e))
+        
+        # Validar e extrair o texto de cada item, em paralelo (os arquivos vão para o pool de extração)
+        await asyncio.gather(*(extract_item(index) for index in range(len(items))))
+        
+        # Deduplicar textos idênticos dentro do lote
+        unique: dict = {}
+        for index, email_text in enumerate(texts):
+            if email_text is not None:
+                unique.setdefault(self.file_processor.clean_text(email_text), []).append(index)
+        
+        async def classify_group(indexes: List[int]) -> None:
+            async with semaphore:
+                group_start = time.time()
+                try:
+                    classification, cached = await self._classify_with_cache(texts[indexes[0]])
+                except Exception as e:
+                    for index in indexes:
+                        results[index] = BatchItemResult(
+                            index=index, id=items[index][0], status="error",
+                            error=f"Erro na classificação: {str(e)}"
+                        )
+                    return
+                
+                elapsed = round(time.time() - group_start, 3)
+                for index in indexes:
+                    results[index] = BatchItemResult(
+                        index=index,
+                        id=items[index][0],
+                        status="ok",
+                        duplicate_of=indexes[0] if index != indexes[0] else None,
+                        result=EmailResponse(
+                            category=classification.category,
+                            suggested_response=classification.suggested_response,
+                            processing_time=elapsed,
+                            text_length=len(texts[index]),
+                            cached=cached,
+                            tier=classification.tier,
+                            truncation=classification.truncation
+                        )
+                    )
+        
+        await asyncio.gather(*(classify_group(indexes) for indexes in unique.values()))
+        
+        succeeded = sum(1 for result in results if result.status == "ok")
+        return BatchResponse(
+            results=results,
+            total=len(items),
+            succeeded=succeeded,
+            failed=len(items) - succeeded,
+            unique=len(unique),
+            processing_time=round(time.time() - start_time, 3)
+        )
+    
+    @staticmethod
+    async def _iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """Quebra o corpo da requisição em linhas à medida que os blocos chegam"""
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end == -1:
+                    break
+                line = bytes(buffer[start:end]).strip()
+                if line:
+                    yield line
+                start = end + 1
+            del buffer[:start]
+            if len(buffer) > settings.stream_max_line_bytes:
+                raise ValueError(f"Linha maior que {settings.stream_max_line_bytes} bytes")
+        
+        line = bytes(buffer).strip()
+        if line:
+            yield line
+    
+    async def _classify_stream_line(self, index: int, line: bytes) -> str:
+        """Classifica uma linha NDJSON e devolve a linha de resultado"""
+        item_id = None
+        try:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                raise ValueError("Linha não é um JSON válido")
+            
+            item_id, text = self._parse_batch_entry(entry)
+            
+            start_time = time.time()
+            email_text = await self._extract_email_text(text)
+            classification, cached = await self._classify_with_cache(email_text)
+            result = BatchItemResult(
+                index=index,
+                id=item_id,
+                status="ok",
+                result=EmailResponse(
+                    category=classification.category,
+                    suggested_response=classification.suggested_response,
+                    processing_time=round(time.time() - start_time, 3),
+                    text_length=len(email_text),
+                    cached=cached,
+                    tier=classification.tier,
+                    truncation=classification.truncation
+                )
+            )
+        except HTTPException as e:
+            result = BatchItemResult(index=index, id=item_id, status="error", error=str(e.detail))
+        except Exception as e:
+            result = BatchItemResult(index=index, id=item_id, status="error", error=str(e))
+        
+        return result.json() + "\n"
+    
+    async def stream_classifications(self, chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+        """Classifica emails NDJSON de forma incremental, emitindo cada resultado assim que fica pronto
+        
+        No máximo settings.stream_concurrency itens ficam em processamento ou
+        aguardando envio; enquanto a janela está cheia o corpo da requisição
+        não é lido, o que propaga a contrapressão até o cliente.
+        """
+        window = asyncio.Semaphore(settings.stream_concurrency)
+        output: asyncio.Queue = asyncio.Queue(maxsize=settings.stream_concurrency)
+        tasks: set = set()
+        
+        async def worker(index: int, line: bytes) -> None:
+            try:
+                await output.put(await self._classify_stream_line(index, line))
+            finally:
+                window.release()
+        
+        async def reader() -> None:
+            index = 0
+            try:
+                async for line in self._iter_ndjson_lines(chunks):
+                    await window.acquire()
+                    task = asyncio.create_task(worker(index, line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    index += 1
+            except Exception as e:
+                error = BatchItemResult(index=index, status="error", error=str(e))
+                await output.put(error.json() + "\n")
+            
+            if tasks:
+                await asyncio.wait(set(tasks))
+            await output.put(None)
+        
+        reader_task = asyncio.create_task(reader())
+        try:
+            while True:
+                line = await output.get()
+                if line is None:
+                    break
+                yield line
+        finally:
+            reader_task.cancel()
+            for task in list(tasks):
+                task.cancel()
+    
+    def apply_settings(self) -> None:
+        """Leva aos componentes já criados os valores de um settings.reload()
+        
+        Limites lidos a cada requisição (tamanhos, lotes, streaming, cascata)
+        não precisam disso; aqui entram os que ficam guardados nos objetos.
+        """
+        self.email_classifier.apply_settings()
+        self.extraction_pool.timeout = settings.extraction_timeout
+        self.extraction_pool.txt_threshold = settings.extraction_txt_threshold
+        self.extraction_pool.resize(settings.extraction_workers)
+        for cache, max_entries, ttl_seconds in (
+            (self.result_cache, settings.cache_max_entries, settings.cache_ttl_seconds),
+            (self.reply_store, settings.reply_store_max_entries, settings.reply_store_ttl_seconds)
+        ):
+            if cache:
+                cache.max_entries = max_entries
+                cache.ttl_seconds = ttl_seconds
+        if self.audit_log:
+            self.audit_log.batch_size = settings.audit_batch_size
+            self.audit_log.flush_interval = settings.audit_flush_interval
+            self.audit_log.rotate_bytes = settings.audit_rotate_bytes
+            self.audit_log.text_max_chars = settings.audit_text_max_chars
+            self.audit_log.resize(settings.audit_max_buffered)
+    
+    async def aclose(self) -> None:
+        """Libera os recursos do service"""
+        if self.audit_log:
+            await self.audit_log.aclose()
+        await self.email_classifier.aclose()
+        self.extraction_pool.shutdown()
+        if self.result_cache:
+            self.result_cache.close()
+        self.reply_store.close()
@@ -0,0 +1,238 @@
+"""
+Leitura de mensagens RFC 822 (.eml) direto do buffer
+
+A árvore MIME é percorrida procurando os delimitadores no próprio buffer
+(bytes ou mmap): de cada parte só os cabeçalhos são lidos, e o conteúdo é
+decodificado apenas para o corpo escolhido e para os anexos que serão
+extraídos. Partes binárias (imagens, planilhas...) são puladas sem serem
+copiadas nem decodificadas.
+"""
+
+import binascii
+import re
+from email.parser import BytesHeaderParser
+from email.policy import default as default_policy
+from typing import Callable, Iterator, List, Optional
+
+from .text_encoding import decode_text
+from .text_normalizer import strip_html
+
+# Limites contra mensagens malformadas ou artificialmente aninhadas
+MAX_DEPTH = 10
+MAX_PARTS = 200
+
+IDENTITY_ENCODINGS = ("7bit", "8bit", "binary")
+
+# Quebras de linha e lixo; o "=" fica, senão o último grupo (com padding) se perde
+BASE64_NOISE = re.compile(rb"[^A-Za-z0-9+/=]")
+
+_header_parser = BytesHeaderParser(policy=default_policy)
+
+
+class MimePart:
+    """Uma parte folha da mensagem: cabeçalhos já interpretados e o intervalo do conteúdo no buffer"""
+    
+    def __init__(self, headers, start: int, end: int):
+        self.headers = headers
+        self.start = start
+        self.end = end
+    
+    @property
+    def content_type(self) -> str:
+        return self.headers.get_content_type()
+    
+    @property
+    def filename(self) -> Optional[str]:
+        return self.headers.get_filename()
+    
+    @property
+    def is_attachment(self) -> bool:
+        return self.headers.get_content_disposition() == "attachment" or bool(self.filename)
+
+
+def _header_end(buffer, start: int, end: int) -> tuple:
+    """(fim dos cabeçalhos, início do conteúdo); sem linha em branco, tudo é cabeçalho"""
+    for blank_line in (b"\n", b"\r\n"):
+        if buffer[start:start + len(blank_line)] == blank_line:
+            return start, start + len(blank_line)
+    best = (end, end)
+    for separator in (b"\r\n\r\n", b"\n\n"):
+        position = buffer.find(separator, start, end)
+        if 0 <= position < best[0]:
+            best = (position, position + len(separator))
+    return best
+
+
+def _find_delimiter(buffer, delimiter: bytes, start: int, end: int) -> int:
+    """Próximo delimitador de multipart no início de uma linha, ou -1"""
+    position = buffer.find(delimiter, start, end)
+    while position > start and buffer[position - 1:position] != b"\n":
+        position = buffer.find(delimiter, position + 1, end)
+    return position
+
+
+def _iter_subparts(buffer, boundary: bytes, start: int, end: int) -> Iterator[tuple]:
+    """Intervalos (início, fim) das partes de um multipart, sem o preâmbulo e o epílogo"""
+    delimiter = b"--" + boundary
+    position = _find_delimiter(buffer, delimiter, start, end)
+    while position >= 0:
+        after = position + len(delimiter)
+        if buffer[after:after + 2] == b"--":
+            return
+        line_end = buffer.find(b"\n", after, end)
+        if line_end < 0:
+            return
+        part_start = line_end + 1
+        next_position = _find_delimiter(buffer, delimiter, part_start, end)
+        if next_position < 0:
+            # Sem o delimitador de fechamento: a parte vai até o fim
+            yield part_start, end
+            return
+        # A quebra de linha antes do delimitador pertence a ele
+        part_end = next_position - 1
+        if buffer[part_end - 1:part_end] == b"\r":
+            part_end -= 1
+        yield part_start, max(part_end, part_start)
+        position = next_position
+
+
+def _transfer_encoding(headers) -> str:
+    return str(headers.get("content-transfer-encoding", "7bit")).strip().lower()
+
+
+def iter_parts(buffer, start: int = 0, end: Optional[int] = None, depth: int = 0) -> Iterator[MimePart]:
+    """Partes folha da mensagem, em ordem, descendo em multipart/* e message/rfc822"""
+    end = len(buffer) if end is None else end
+    header_end, body_start = _header_end(buffer, start, end)
+    headers = _header_parser.parsebytes(bytes(buffer[start:header_end]))
+    content_type = headers.get_content_type()
+    
+    if depth < MAX_DEPTH and headers.get_content_maintype() == "multipart":
+        boundary = headers.get_param("boundary")
+        if boundary:
+            for part_start, part_end in _iter_subparts(buffer, str(boundary).encode("latin-1"), body_start, end):
+                yield from iter_parts(buffer, part_start, part_end, depth + 1)
+            return
+    if depth < MAX_DEPTH and content_type == "message/rfc822" and _transfer_encoding(headers) in IDENTITY_ENCODINGS:
+        # Email encaminhado como anexo: o conteúdo é outra mensagem
+        yield from iter_parts(buffer, body_start, end, depth + 1)
+        return
+    yield MimePart(headers, body_start, end)
+
+
+def decode_payload(buffer, part: MimePart, limit: Optional[int] = None) -> bytes:
+    """Conteúdo da parte sem o Content-Transfer-Encoding; com `limit`, só os primeiros bytes"""
+    encoding = _transfer_encoding(part.headers)
+    end = part.end
+    if encoding == "base64":
+        # 4 caracteres por 3 bytes, com folga para as quebras de linha
+        if limit is not None:
+            end = min(end, part.start + limit * 2 + 4)
+        encoded = BASE64_NOISE.sub(b"", buffer[part.start:end])
+        decoded = binascii.a2b_base64(encoded[:len(encoded) // 4 * 4])
+    elif encoding == "quoted-printable":
+        if limit is not None:
+            end = min(end, part.start + limit * 3)
+        decoded = binascii.a2b_qp(buffer[part.start:end])
+    else:
+        if limit is not None:
+            end = min(end, part.start + limit)
+        decoded = bytes(buffer[part.start:end])
+    return decoded if limit is None else decoded[:limit]
+
+
+def decode_part_text(buffer, part: MimePart, limit: int) -> str:
+    """Texto de uma parte text/*, no charset declarado ou, sem ele, detectado"""
+    payload = decode_payload(buffer, part, limit)
+    charset = part.headers.get_content_charset()
+    if charset:
+        try:
+            return payload.decode(charset, "replace")
+        except LookupError:
+            pass
+    return decode_text(payload)
+
+
+def _utf8_size(text: str) -> int:
+    """Bytes do texto em UTF-8, a unidade do orçamento de extract_eml_text"""
+    return len(text.encode("utf-8"))
+
+
+def _is_pdf(part: MimePart) -> bool:
+    return part.content_type == "application/pdf" or (part.filename or "").lower().endswith(".pdf")
+
+
+def _is_txt(part: MimePart) -> bool:
+    return part.content_type == "text/plain" or (part.filename or "").lower().endswith(".txt")
+
+
+def extract_eml_text(
+    buffer,
+    max_bytes: int,
+    extract_pdf: Optional[Callable[[bytes, int], str]] = None,
+    include_attachments: bool = True
+) -> str:
+    """Assunto, remetente, corpo e anexos de texto de uma mensagem .eml
+
+    O corpo é o primeiro text/plain que não é anexo; sem ele, o primeiro
+    text/html (convertido em texto). Depois do corpo, anexos .txt e, com
+    `extract_pdf`, anexos .pdf são extraídos em ordem enquanto houver
+    orçamento: `max_bytes` limita o total do texto extraído, contado em
+    bytes UTF-8 (acentos contam 2). Com `include_attachments=False`, nenhum
+    anexo é decodificado.
+    """
+    end = len(buffer)
+    header_end, _ = _header_end(buffer, 0, end)
+    headers = _header_parser.parsebytes(bytes(buffer[:header_end]))
+    
+    # Só os intervalos: nada é decodificado neste passo
+    parts = []
+    for part in iter_parts(buffer, 0, end):
+        parts.append(part)
+        if len(parts) >= MAX_PARTS:
+            break
+    
+    body = next((part for part in parts if part.content_type == "text/plain" and not part.is_attachment), None)
+    if body is None:
+        body = next((part for part in parts if part.content_type == "text/html" and not part.is_attachment), None)
+    
+    sections: List[str] = []
+    subject = str(headers.get("subject", "") or "").strip()
+    sender = str(headers.get("from", "") or "").strip()
+    if subject:
+        sections.append(f"Assunto: {subject}")
+    if sender:
+        sections.append(f"Remetente: {sender}")
+    
+    budget = max_bytes
+    if body is not None:
+        text = decode_part_text(buffer, body, budget)
+        if body.content_type == "text/html":
+            text = strip_html(text)
+        sections.append(text)
+        budget -= _utf8_size(text)
+    
+    # Sem anexos, o corpo é a única parte decodificada
+    for part in (parts if include_attachments else []):
+        if budget <= 0:
+            break
+        if part is body or not part.is_attachment:
+            continue
+        try:
+            if _is_pdf(part):
+                if extract_pdf is None:
+                    continue
+                # O PDF precisa estar inteiro para ser lido; o orçamento limita o texto extraído
+                text = extract_pdf(decode_payload(buffer, part), budget)
+            elif _is_txt(part):
+                text = decode_part_text(buffer, part, budget)
+            else:
+                continue
+        except (ValueError, binascii.Error) as e:
+            print(f"⚠️  Anexo {part.filename or part.content_type} ignorado: {str(e)}")
+            continue
+        if text.strip():
+            sections.append(f"Anexo {part.filename or ''}: {text}")
+            budget -= _utf8_size(text)
+    
+    return "\n".join(sections)
@@ -0,0 +1,197 @@
+"""
+Pool de processos para extração de texto de arquivos
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from ..utils.config import settings
+from ..utils.metrics import (
+    PDF_EARLY_STOPS,
+    PDF_EXTRACTION_SECONDS,
+    PDF_PAGES_READ,
+    PDF_PEAK_RSS,
+    STAGE_DURATION
+)
+from .file_processor import FileProcessor
+from .upload_reader import SpooledUpload
+
+
+# Configurações lidas pela extração. Os processos do pool têm a própria cópia de
+# `settings`, lida na importação, então os valores atuais vão junto com cada job
+# (senão um settings.reload() no worker da API não chegaria até eles)
+EXTRACTION_SETTINGS = (
+    "pdf_max_pages", "pdf_max_chars", "pdf_max_read_pages",
+    "eml_max_body_bytes", "eml_attachments",
+    "clean_strip_html", "clean_strip_quotes", "clean_strip_signatures",
+)
+
+
+class ExtractionTimeoutError(Exception):
+    """A extração excedeu o tempo limite"""
+
+
+def _current_limits() -> dict:
+    return {name: getattr(settings, name) for name in EXTRACTION_SETTINGS}
+
+
+def _process_timed(limits: Optional[dict], func, *args) -> Tuple[str, dict]:
+    """Executa o processamento coletando a duração das etapas (roda no processo do pool)"""
+    if limits:
+        for name, value in limits.items():
+            setattr(settings, name, value)
+    timings: dict = {}
+    text = func(*args, timings=timings)
+    return text, timings
+
+
+def _warm_up_process() -> int:
+    """Tarefa vazia: importar este módulo no processo do pool já carrega o FileProcessor"""
+    return os.getpid()
+
+
+class ExtractionPool:
+    """Executa a extração (CPU-bound) fora do event loop, em processos separados"""
+    
+    def __init__(self, max_workers: int, timeout: float, txt_threshold: int):
+        """Inicializa o pool
+
+        Args:
+            max_workers: Número de processos; 0 executa a extração no próprio processo
+            timeout: Tempo máximo de cada extração, em segundos
+            txt_threshold: Arquivos TXT menores que isso são processados sem o pool
+        """
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.txt_threshold = txt_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Só entra no pool quem tem um processo livre, então o timeout mede execução e não fila
+        self._slots = asyncio.Semaphore(max(max_workers, 1))
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    def _restart(self) -> None:
+        """Derruba os processos (inclusive um parser travado) e recria o pool sob demanda
+        
+        Extrações que estavam em andamento nos outros processos falham com ValueError.
+        """
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    def resize(self, max_workers: int) -> None:
+        """Muda o número de processos; o pool novo é criado sob demanda
+        
+        Diferente de _restart, as extrações em andamento terminam nos
+        processos antigos, que são encerrados em seguida.
+        """
+        if max_workers == self.max_workers:
+            return
+        self.max_workers = max_workers
+        self._slots = asyncio.Semaphore(max(max_workers, 1))
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def start(self) -> None:
+        """Cria os processos antecipadamente"""
+        if self.max_workers > 0:
+            self._get_executor()
+    
+    async def warm_up(self) -> None:
+        """Sobe os processos do pool e carrega neles os módulos de extração"""
+        if self.max_workers <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            await asyncio.gather(*(
+                loop.run_in_executor(executor, _warm_up_process) for _ in range(self.max_workers)
+            ))
+        except BrokenProcessPool:
+            self._restart()
+            raise
+    
+    def _should_offload(self, size: int, filename: str) -> bool:
+        if self.max_workers <= 0:
+            return False
+        if filename.lower().endswith(".txt"):
+            return size >= self.txt_threshold
+        return True
+    
+    async def _run(self, size: int, filename: str, func, *args) -> str:
+        text, timings = await self._run_timed(size, filename, func, *args)
+        # As etapas rodam no processo do pool; as medidas são registradas aqui, no worker da API
+        pdf = timings.pop("pdf", None)
+        for stage, duration in timings.items():
+            STAGE_DURATION.observe(duration, stage)
+        if pdf:
+            PDF_EXTRACTION_SECONDS.observe(pdf["seconds"])
+            PDF_PAGES_READ.observe(pdf["pages_read"])
+            if pdf["truncated"]:
+                PDF_EARLY_STOPS.inc()
+            if "peak_rss_bytes" in pdf:
+                PDF_PEAK_RSS.observe(pdf["peak_rss_bytes"])
+        return text
+    
+    async def _run_timed(self, size: int, filename: str, func, *args) -> Tuple[str, dict]:
+        if not self._should_offload(size, filename):
+            return _process_timed(None, func, *args)
+        
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), _process_timed, _current_limits(), func, *args)
+            try:
+                return await asyncio.wait_for(future, timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self._restart()
+                raise ExtractionTimeoutError(
+                    f"Tempo limite de {self.timeout:g}s excedido ao extrair texto do arquivo"
+                )
+            except BrokenProcessPool:
+                self._restart()
+                raise ValueError("Falha no processo de extração do arquivo")
+    
+    async def process_file_content(self, file_content: bytes, filename: str) -> str:
+        """Extrai e limpa o texto do arquivo, no pool quando compensa
+        
+        Raises:
+            ValueError: arquivo inválido ou falha no processo de extração
+            ExtractionTimeoutError: extração excedeu o tempo limite
+        """
+        return await self._run(
+            len(file_content), filename,
+            FileProcessor.process_file_content, file_content, filename
+        )
+    
+    async def process_upload(self, upload: SpooledUpload) -> str:
+        """Extrai o texto de um upload; em disco, o pool recebe só o caminho do arquivo temporário"""
+        if upload.path is not None:
+            try:
+                return await self._run(
+                    upload.size, upload.filename,
+                    FileProcessor.process_file_path, upload.path, upload.filename
+                )
+            except OSError as e:
+                # /proc/<pid>/fd inacessível para o processo do pool (ex.: /proc montado com hidepid)
+                print(f"⚠️  Arquivo do upload inacessível pelo caminho, enviando o conteúdo: {str(e)}")
+        return await self.process_file_content(upload.getvalue(), upload.filename)
+    
+    def shutdown(self) -> None:
+        """Encerra os processos do pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
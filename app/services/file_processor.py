@@ -4,53 +4,141 @@ Serviço para processamento de arquivos de email
 
 import PyPDF2
 from io import BytesIO
-import re
+from typing import BinaryIO, Iterator, Optional, Union
+import mmap
+import os
+import time
 from ..utils.config import settings
+from ..utils.memory import peak_rss_bytes, reset_peak_rss
+from .eml_parser import extract_eml_text
+from .text_encoding import decode_text
+from .text_normalizer import normalize_text, strip_boilerplate
 
 
 class FileProcessor:
     """Classe para processamento de arquivos"""
     
     @staticmethod
-    def extract_text_from_pdf(file_content: bytes) -> str:
-        """Extrai texto de arquivo PDF"""
+    def iter_pdf_pages(file_content: Union[bytes, BinaryIO]) -> Iterator[str]:
+        """Gera o texto de cada página do PDF sob demanda (páginas sem texto são puladas)"""
+        if isinstance(file_content, (bytes, bytearray)):
+            file_content = BytesIO(file_content)
+        pdf_reader = PyPDF2.PdfReader(file_content)
+        if len(pdf_reader.pages) > settings.pdf_max_pages:
+            raise ValueError(f"PDF com mais de {settings.pdf_max_pages} páginas")
+        for page in pdf_reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                yield page_text
+    
+    @classmethod
+    def extract_text_from_pdf(
+        cls,
+        file_content: Union[bytes, BinaryIO],
+        max_chars: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        stats: Optional[dict] = None
+    ) -> str:
+        """Extrai texto de arquivo PDF (bytes ou arquivo binário aberto)
+        
+        A leitura para assim que `max_chars` caracteres ou `max_pages` páginas
+        com texto forem extraídos, sem extrair a página seguinte, então o custo
+        não depende do total de páginas. Se `stats` for informado, recebe
+        "pages_read" e "truncated" (a leitura parou em um dos limites).
+        """
+        parts = []
+        chars = 0
+        truncated = False
         try:
-            pdf_reader = PyPDF2.PdfReader(BytesIO(file_content))
-            text = ""
-            for page in pdf_reader.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            return text.strip()
+            pages = cls.iter_pdf_pages(file_content)
+            for page_text in pages:
+                parts.append(page_text)
+                chars += len(page_text) + 1
+                # Parar já aqui: o próximo passo do gerador extrairia mais uma página
+                if (max_chars is not None and chars >= max_chars) or (max_pages is not None and len(parts) >= max_pages):
+                    truncated = True
+                    break
+            pages.close()
         except Exception as e:
             raise ValueError(f"Erro ao extrair texto do PDF: {str(e)}")
+        
+        if stats is not None:
+            stats["pages_read"] = len(parts)
+            stats["truncated"] = truncated
+        return "\n".join(parts).strip()
+    
+    @classmethod
+    def _extract_pdf_measured(cls, file_content: Union[bytes, BinaryIO], timings: Optional[dict]) -> str:
+        """Extrai o PDF com os limites das configurações, medindo tempo e pico de memória"""
+        if timings is None:
+            return cls.extract_text_from_pdf(
+                file_content, max_chars=settings.pdf_max_chars, max_pages=settings.pdf_max_read_pages
+            )
+        
+        stats: dict = {}
+        reset = reset_peak_rss()
+        start = time.perf_counter()
+        text = cls.extract_text_from_pdf(
+            file_content, max_chars=settings.pdf_max_chars, max_pages=settings.pdf_max_read_pages, stats=stats
+        )
+        stats["seconds"] = time.perf_counter() - start
+        # Sem reset, o pico é o do processo inteiro e não representa este PDF
+        peak = peak_rss_bytes() if reset else None
+        if peak is not None:
+            stats["peak_rss_bytes"] = peak
+        timings["pdf"] = stats
+        return text
     
     @staticmethod
-    def extract_text_from_txt(file_content: bytes) -> str:
-        """Extrai texto de arquivo TXT"""
+    def extract_text_from_txt(file_content: Union[bytes, memoryview, mmap.mmap]) -> str:
+        """Extrai texto de arquivo TXT (bytes ou qualquer buffer, como um mmap)
+        
+        O encoding (BOM, UTF-8 ou Windows-1252) é detectado pelo início do
+        arquivo e o conteúdo é decodificado uma única vez.
+        """
         try:
-            encodings = ['utf-8', 'latin-1', 'cp1252']
-            for encoding in encodings:
-                try:
-                    return file_content.decode(encoding)
-                except UnicodeDecodeError:
-                    continue
-            return file_content.decode('utf-8', errors='replace')
+            return decode_text(file_content)
         except Exception as e:
             raise ValueError(f"Erro ao extrair texto do arquivo TXT: {str(e)}")
     
+    @classmethod
+    def extract_text_from_eml(cls, file_content: Union[bytes, mmap.mmap]) -> str:
+        """Extrai assunto, remetente, corpo e anexos PDF/TXT de uma mensagem .eml
+        
+        O corpo decodificado e os anexos extraídos somam no máximo
+        EML_MAX_BODY_BYTES; anexos PDF passam pelo extract_text_from_pdf.
+        Com EML_ATTACHMENTS=false, nenhum anexo entra no texto.
+        """
+        def extract_pdf(content: bytes, budget: int) -> str:
+            return cls.extract_text_from_pdf(
+                content, max_chars=min(budget, settings.pdf_max_chars), max_pages=settings.pdf_max_read_pages
+            )
+        try:
+            return extract_eml_text(
+                file_content, settings.eml_max_body_bytes, extract_pdf,
+                include_attachments=settings.eml_attachments
+            )
+        except Exception as e:
+            raise ValueError(f"Erro ao extrair texto do email .eml: {str(e)}")
+    
     @staticmethod
-    def clean_text(text: str) -> str:
+    def _boilerplate_options() -> dict:
+        """Remoções opcionais de HTML, histórico citado e assinatura (relidas a cada uso)"""
+        return {
+            "html_markup": settings.clean_strip_html,
+            "quotes": settings.clean_strip_quotes,
+            "signatures": settings.clean_strip_signatures
+        }
+    
+    @classmethod
+    def strip_boilerplate(cls, text: str) -> str:
+        """Remove HTML, histórico citado e assinatura conforme as configurações"""
+        return strip_boilerplate(text, **cls._boilerplate_options())
+    
+    @classmethod
+    def clean_text(cls, text: str) -> str:
         """Limpa e normaliza o texto"""
-        if not text:
-            return ""
-        
-        # Remover quebras de linha excessivas e espaços
-        text = re.sub(r'\n+', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)]', '', text)
-        
-        return text.strip()
+        return normalize_text(text, **cls._boilerplate_options())
     
     @staticmethod
     def validate_email_content(text: str) -> bool:
@@ -61,21 +149,67 @@ class FileProcessor:
         return len(words) >= 3
     
     @classmethod
-    def process_file_content(cls, file_content: bytes, filename: str) -> str:
-        """Processa o conteúdo de um arquivo"""
+    def process_file_content(cls, file_content: bytes, filename: str, timings: Optional[dict] = None) -> str:
+        """Processa o conteúdo de um arquivo
+        
+        Se `timings` for informado, recebe a duração (em segundos) das etapas
+        "extraction" e "clean_text" e, para PDFs, as estatísticas em "pdf".
+        """
         if not filename:
             raise ValueError("Nome do arquivo é obrigatório")
         
         filename_lower = filename.lower()
+        start = time.perf_counter()
         
         if filename_lower.endswith('.pdf'):
-            text = cls.extract_text_from_pdf(file_content)
+            text = cls._extract_pdf_measured(file_content, timings)
         elif filename_lower.endswith('.txt'):
             text = cls.extract_text_from_txt(file_content)
+        elif filename_lower.endswith('.eml'):
+            text = cls.extract_text_from_eml(file_content)
         else:
-            raise ValueError("Formato não suportado. Use .pdf ou .txt")
+            raise ValueError("Formato não suportado. Use .pdf, .txt ou .eml")
+        
+        extracted = time.perf_counter()
+        cleaned_text = cls.clean_text(text)
+        if timings is not None:
+            timings["extraction"] = extracted - start
+            timings["clean_text"] = time.perf_counter() - extracted
+        
+        if not cls.validate_email_content(cleaned_text):
+            raise ValueError("O arquivo não contém conteúdo válido de email")
+        
+        return cleaned_text
+    
+    @classmethod
+    def process_file_path(cls, path: str, filename: str, timings: Optional[dict] = None) -> str:
+        """Processa um arquivo em disco sem carregá-lo inteiro em um BytesIO"""
+        if not filename:
+            raise ValueError("Nome do arquivo é obrigatório")
+        
+        filename_lower = filename.lower()
+        start = time.perf_counter()
+        
+        with open(path, "rb") as file:
+            if filename_lower.endswith('.pdf'):
+                text = cls._extract_pdf_measured(file, timings)
+            elif filename_lower.endswith(('.txt', '.eml')):
+                if os.fstat(file.fileno()).st_size == 0:
+                    text = ""
+                else:
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        if filename_lower.endswith('.txt'):
+                            text = cls.extract_text_from_txt(mapped)
+                        else:
+                            text = cls.extract_text_from_eml(mapped)
+            else:
+                raise ValueError("Formato não suportado. Use .pdf, .txt ou .eml")
         
+        extracted = time.perf_counter()
         cleaned_text = cls.clean_text(text)
+        if timings is not None:
+            timings["extraction"] = extracted - start
+            timings["clean_text"] = time.perf_counter() - extracted
         
         if not cls.validate_email_content(cleaned_text):
             raise ValueError("O arquivo não contém conteúdo válido de email")
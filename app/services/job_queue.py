@@ -0,0 +1,369 @@
+"""
+Fila persistente de jobs de classificação
+
+Os jobs ficam em um SQLite local: sobrevivem ao reinício dos workers e são
+consumidos por todos os workers do uvicorn que apontam para o mesmo arquivo.
+Cada job em execução tem um prazo (lease); se o worker morrer no meio, o job
+volta a ser elegível depois do prazo e outro worker o retoma.
+"""
+
+import asyncio
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from fastapi import HTTPException, UploadFile, status
+
+from ..models.email_models import EmailResponse, JobQueueStatsResponse, JobResponse
+from ..utils.config import settings
+from ..utils.metrics import JOB_WAIT, JOBS_FINISHED, metrics
+from .upload_reader import UploadTooLargeError, open_upload
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Intervalo de consulta ao SQLite para jobs de outros workers
+POLL_INTERVAL = 0.5
+# Intervalo entre as limpezas de jobs antigos
+PURGE_INTERVAL = 60.0
+# Intervalo de atualização dos contadores servidos por /jobs/stats e pelos gauges
+STATS_INTERVAL = 1.0
+# Folga do lease sobre JOB_TIMEOUT: um job cancelado no limite ainda está terminando
+# (gravando o resultado, removendo a entrada) e não pode ser pego por outro worker
+LEASE_MARGIN = 30.0
+
+
+class JobQueueFullError(Exception):
+    """A fila atingiu o número máximo de jobs aguardando"""
+
+
+class JobStore:
+    """Tabela de jobs em SQLite (WAL), acessada por threads com um lock, como no ResultCache"""
+    
+    def __init__(self, path: str):
+        """Abre (ou cria) o banco de jobs"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, text TEXT, filename TEXT, input_path TEXT, "
+            "result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL, lease_until REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+    
+    def _execute(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    def insert(self, job_id: str, text: Optional[str], filename: Optional[str],
+               input_path: Optional[str], created_at: float) -> None:
+        self._execute(
+            "INSERT INTO jobs (id, status, text, filename, input_path, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, text, filename, input_path, created_at)
+        )
+    
+    def claim(self, lease_seconds: float, max_attempts: int) -> Optional[sqlite3.Row]:
+        """Marca como em execução o job mais antigo elegível e o retorna
+
+        Elegíveis: jobs na fila e jobs cujo lease venceu (worker que morreu).
+        Jobs com lease vencido que já esgotaram as tentativas falham aqui.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, lease_until = NULL "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "Job interrompido repetidamente", now, RUNNING, now, max_attempts)
+            )
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1) RETURNING *",
+                (RUNNING, now, now + lease_seconds, QUEUED, RUNNING, now)
+            ).fetchone()
+    
+    def finish(self, job_id: str, job_status: str, result: Optional[str], error: Optional[str]) -> None:
+        """Grava o resultado e descarta a entrada do job"""
+        self._execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL, "
+            "text = NULL, input_path = NULL WHERE id = ? AND status = ?",
+            (job_status, result, error, time.time(), job_id, RUNNING)
+        )
+    
+    def requeue(self, job_id: str) -> None:
+        """Devolve à fila um job interrompido pelo desligamento do worker"""
+        self._execute(
+            "UPDATE jobs SET status = ?, started_at = NULL, lease_until = NULL WHERE id = ? AND status = ?",
+            (QUEUED, job_id, RUNNING)
+        )
+    
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        rows = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+    
+    def counts(self) -> Dict[str, int]:
+        rows = self._execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+        return {row[0]: row[1] for row in rows}
+    
+    def oldest_queued(self) -> Optional[float]:
+        rows = self._execute("SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,))
+        return rows[0][0] if rows else None
+    
+    def purge(self, finished_before: float) -> int:
+        """Remove jobs concluídos antes do instante informado"""
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (SUCCEEDED, FAILED, finished_before)
+            ).rowcount
+    
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _to_response(row: sqlite3.Row) -> JobResponse:
+    return JobResponse(
+        id=row["id"],
+        status=row["status"],
+        created_at=row["created_at"],
+        started_at=row["started_at"],
+        finished_at=row["finished_at"],
+        attempts=row["attempts"],
+        result=EmailResponse.parse_raw(row["result"]) if row["result"] else None,
+        error=row["error"]
+    )
+
+
+class JobQueue:
+    """Executa em segundo plano, com concorrência limitada, as classificações enfileiradas"""
+    
+    def __init__(self, store: JobStore, email_service, workers: int):
+        """Inicializa a fila
+
+        Args:
+            store: Persistência dos jobs
+            email_service: Service que executa process_email_classification
+            workers: Jobs executados ao mesmo tempo neste processo
+        """
+        self.store = store
+        self.email_service = email_service
+        self.workers = workers
+        self.input_dir = os.path.splitext(store.path)[0] + "-inputs"
+        os.makedirs(self.input_dir, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        # Long-polls deste processo aguardando cada job
+        self._done: Dict[str, asyncio.Event] = {}
+        self._running: set = set()
+        self._tasks: list = []
+        self._last_purge = 0.0
+        # Último retrato da fila (contagens por status e job mais antigo), lido fora do event loop
+        self._counts: Dict[str, int] = {}
+        self._oldest_queued: Optional[float] = None
+        self._register_metrics()
+    
+    def _register_metrics(self) -> None:
+        metrics.register_callback(
+            "autou_job_queue_depth",
+            "Jobs aguardando execução",
+            "gauge",
+            lambda: self._counts.get(QUEUED, 0)
+        )
+        metrics.register_callback(
+            "autou_job_oldest_queued_seconds",
+            "Há quanto tempo o job mais antigo da fila está esperando",
+            "gauge",
+            self._oldest_queued_seconds
+        )
+    
+    def _oldest_queued_seconds(self) -> float:
+        oldest = self._oldest_queued
+        return max(time.time() - oldest, 0.0) if oldest else 0.0
+    
+    def _read_stats(self) -> tuple:
+        return self.store.counts(), self.store.oldest_queued()
+    
+    async def refresh_stats(self) -> None:
+        """Atualiza o retrato da fila consultando o SQLite em uma thread"""
+        self._counts, self._oldest_queued = await asyncio.to_thread(self._read_stats)
+    
+    async def _refresh_stats_periodically(self) -> None:
+        # Os gauges são lidos no event loop durante o /metrics: servem o último retrato
+        while True:
+            try:
+                await self.refresh_stats()
+            except sqlite3.Error as e:
+                print(f"⚠️  Erro ao ler as estatísticas da fila: {str(e)}")
+            await asyncio.sleep(STATS_INTERVAL)
+    
+    def start(self) -> None:
+        """Inicia os workers da fila no event loop atual"""
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._refresh_stats_periodically()))
+    
+    async def _store_input(self, job_id: str, file: UploadFile) -> str:
+        """Copia o arquivo do upload para o diretório de entradas dos jobs"""
+        try:
+            upload = open_upload(file, max_size=settings.max_file_size)
+        except UploadTooLargeError:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo muito grande. Máximo: {settings.max_file_size // (1024*1024)}MB"
+            )
+        
+        path = os.path.join(self.input_dir, job_id + os.path.splitext(file.filename)[1].lower())
+        # A entrada precisa sobreviver à requisição: é a única cópia do arquivo do Starlette
+        def copy() -> None:
+            with open(path, "wb") as input_file:
+                shutil.copyfileobj(upload.file, input_file, settings.upload_chunk_size)
+        await asyncio.to_thread(copy)
+        return path
+    
+    async def submit(self, text: Optional[str] = None, file: Optional[UploadFile] = None) -> JobResponse:
+        """Valida a entrada e enfileira o job
+
+        Raises:
+            HTTPException: entrada inválida
+            JobQueueFullError: fila cheia
+        """
+        self.email_service.validate_input(text, file)
+        counts = await asyncio.to_thread(self.store.counts)
+        if counts.get(QUEUED, 0) >= settings.job_max_queued:
+            raise JobQueueFullError(f"Fila de jobs cheia ({settings.job_max_queued} aguardando)")
+        
+        job_id = uuid.uuid4().hex
+        input_path = await self._store_input(job_id, file) if file else None
+        created_at = time.time()
+        await asyncio.to_thread(
+            self.store.insert, job_id, None if file else text, file.filename if file else None,
+            input_path, created_at
+        )
+        self._wakeup.set()
+        return JobResponse(id=job_id, status=QUEUED, created_at=created_at)
+    
+    async def get(self, job_id: str) -> Optional[JobResponse]:
+        row = await asyncio.to_thread(self.store.get, job_id)
+        return _to_response(row) if row else None
+    
+    async def wait(self, job_id: str, timeout: float) -> Optional[JobResponse]:
+        """Long-polling: retorna quando o job terminar ou o tempo acabar"""
+        deadline = time.monotonic() + timeout
+        done = self._done.setdefault(job_id, asyncio.Event())
+        try:
+            while True:
+                job = await self.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job.status in (SUCCEEDED, FAILED) or remaining <= 0:
+                    return job
+                # Jobs deste processo avisam pelo evento; os de outros workers, pela consulta
+                try:
+                    await asyncio.wait_for(done.wait(), min(remaining, POLL_INTERVAL))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._done.pop(job_id, None)
+    
+    async def _worker(self) -> None:
+        while True:
+            # Limpar antes de consultar: um submit durante a consulta não se perde
+            self._wakeup.clear()
+            try:
+                row = await asyncio.to_thread(
+                    self.store.claim, settings.job_timeout + LEASE_MARGIN, settings.job_max_attempts
+                )
+            except sqlite3.Error as e:
+                print(f"⚠️  Erro ao buscar job na fila: {str(e)}")
+                row = None
+            if row is None:
+                await self._purge_old_jobs()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(row)
+    
+    async def _run(self, row: sqlite3.Row) -> None:
+        job_id = row["id"]
+        if row["attempts"] == 1:
+            JOB_WAIT.observe(row["started_at"] - row["created_at"])
+        self._running.add(job_id)
+        
+        input_file = None
+        result = error = None
+        try:
+            upload = None
+            if row["input_path"]:
+                input_file = open(row["input_path"], "rb")
+                upload = UploadFile(file=input_file, filename=row["filename"])
+            response = await asyncio.wait_for(
+                self.email_service.process_email_classification(text=row["text"], file=upload),
+                timeout=settings.job_timeout
+            )
+            job_status, result = SUCCEEDED, response.json()
+        except HTTPException as e:
+            job_status, error = FAILED, str(e.detail)
+        except asyncio.TimeoutError:
+            job_status, error = FAILED, f"Tempo limite de {settings.job_timeout:g}s excedido"
+        except Exception as e:
+            job_status, error = FAILED, str(e)
+        finally:
+            # Cancelado no desligamento, o job continua em _running para o aclose() devolvê-lo à fila
+            if input_file is not None:
+                input_file.close()
+        
+        await asyncio.to_thread(self.store.finish, job_id, job_status, result, error)
+        self._running.discard(job_id)
+        if row["input_path"]:
+            try:
+                os.unlink(row["input_path"])
+            except FileNotFoundError:
+                pass
+        JOBS_FINISHED.inc(job_status)
+        done = self._done.get(job_id)
+        if done is not None:
+            done.set()
+    
+    async def _purge_old_jobs(self) -> None:
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        await asyncio.to_thread(self.store.purge, now - settings.job_retention_seconds)
+    
+    async def stats(self) -> JobQueueStatsResponse:
+        await self.refresh_stats()
+        counts = self._counts
+        return JobQueueStatsResponse(
+            queued=counts.get(QUEUED, 0),
+            running=counts.get(RUNNING, 0),
+            succeeded=counts.get(SUCCEEDED, 0),
+            failed=counts.get(FAILED, 0),
+            oldest_queued_seconds=round(self._oldest_queued_seconds(), 3),
+            workers=self.workers
+        )
+    
+    async def aclose(self) -> None:
+        """Para os workers e devolve à fila os jobs interrompidos"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for job_id in list(self._running):
+            self.store.requeue(job_id)
+        # Os gauges leem o SQLite: saem antes do último snapshot de métricas
+        metrics.unregister("autou_job_queue_depth")
+        metrics.unregister("autou_job_oldest_queued_seconds")
+        self.store.close()
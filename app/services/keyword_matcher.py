@@ -0,0 +1,130 @@
+"""
+Motor de palavras-chave compilado para a classificação sem IA
+"""
+
+import json
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+
+def _build_fold_table() -> bytes:
+    """Tabela de bytes.translate (Latin-1) que remove acentos e passa para minúsculas"""
+    table = bytearray(range(256))
+    for code in range(256):
+        base = unicodedata.normalize("NFKD", chr(code))[0].lower()
+        if len(base) == 1 and ord(base) < 128:
+            table[code] = ord(base)
+    return bytes(table)
+
+
+FOLD_TABLE = _build_fold_table()
+
+
+def fold_text(text: str) -> bytes:
+    """Normaliza o texto para comparação sem acentos e sem maiúsculas
+    
+    Cada caractere vira exatamente um byte (o que não cabe em Latin-1 vira
+    "?"), então as posições no texto normalizado são as mesmas do original.
+    """
+    return text.encode("latin-1", "replace").translate(FOLD_TABLE)
+
+
+def _trie_pattern(words: List[bytes]) -> bytes:
+    """Monta uma alternação em forma de trie, bem mais rápida no re que uma lista plana"""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for byte in word:
+            node = node.setdefault(byte, {})
+        node[None] = True
+    
+    def build(node: dict) -> bytes:
+        terminal = None in node
+        branches = [
+            (rb"\s+" if byte == ord(" ") else re.escape(bytes([byte]))) + build(child)
+            for byte, child in sorted((k, v) for k, v in node.items() if k is not None)
+        ]
+        if not branches:
+            return b""
+        pattern = branches[0] if len(branches) == 1 else b"(?:" + b"|".join(branches) + b")"
+        return b"(?:" + pattern + b")?" if terminal else pattern
+    
+    return build(trie)
+
+
+class KeywordMatches:
+    """Resultado de uma varredura de palavras-chave"""
+    
+    def __init__(self, categories: List[str]):
+        self.scores: Dict[str, float] = {category: 0.0 for category in categories}
+        self.counts: Dict[str, int] = {}
+        self.positions: Dict[str, List[Tuple[int, int]]] = {}
+    
+    @property
+    def total_matches(self) -> int:
+        return sum(self.counts.values())
+
+
+class KeywordMatcher:
+    """Casa todas as palavras-chave de todas as categorias em uma única passada
+    
+    As palavras-chave viram uma única regex com limites de palavra, compilada
+    uma vez e aplicada sobre o texto sem acentos. Um "*" no fim da
+    palavra-chave aceita qualquer sufixo ("erro*" casa "erro", "erros" e "errou").
+    """
+    
+    def __init__(self, keywords: Dict[str, Dict[str, float]]):
+        """Compila o matcher
+        
+        Args:
+            keywords: {categoria: {palavra-chave: peso}}
+        """
+        self.categories = list(keywords)
+        # palavra normalizada -> (categoria, palavra-chave original, peso, aceita sufixo)
+        self._keywords: Dict[bytes, Tuple[str, str, float, bool]] = {}
+        
+        for category, weighted in keywords.items():
+            for keyword, weight in weighted.items():
+                wildcard = keyword.endswith("*")
+                literal = b" ".join(fold_text(keyword.rstrip("*")).split())
+                if literal:
+                    self._keywords[literal] = (category, keyword, float(weight), wildcard)
+        
+        body = _trie_pattern(list(self._keywords)) or b"(?!)"
+        self._pattern = re.compile(rb"\b(" + body + rb")(\w*)")
+    
+    @classmethod
+    def from_file(cls, path: str, categories: List[str] = None) -> "KeywordMatcher":
+        """Carrega as palavras-chave ponderadas de um arquivo JSON"""
+        with open(path, encoding="utf-8") as keywords_file:
+            keywords = json.load(keywords_file)
+        
+        if not isinstance(keywords, dict):
+            raise ValueError(f"Arquivo de palavras-chave inválido: {path}")
+        for category, weighted in keywords.items():
+            if categories is not None and category not in categories:
+                raise ValueError(f"Categoria desconhecida no arquivo de palavras-chave: {category}")
+            if not isinstance(weighted, dict):
+                raise ValueError(f"Palavras-chave de '{category}' devem ser um objeto {{palavra: peso}}")
+        
+        return cls(keywords)
+    
+    def match(self, text: str) -> KeywordMatches:
+        """Conta ocorrências, posições e pontuação por categoria em uma passada"""
+        matches = KeywordMatches(self.categories)
+        keywords = self._keywords
+        
+        for found in self._pattern.finditer(fold_text(text)):
+            literal, suffix = found.groups()
+            info = keywords.get(literal) or keywords.get(b" ".join(literal.split()))
+            if info is None:
+                continue
+            category, keyword, weight, wildcard = info
+            if suffix and not wildcard:
+                continue
+            matches.scores[category] += weight
+            matches.counts[keyword] = matches.counts.get(keyword, 0) + 1
+            matches.positions.setdefault(keyword, []).append(found.span())
+        
+        return matches
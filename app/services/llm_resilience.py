@@ -0,0 +1,291 @@
+"""
+Camada de resiliência para as chamadas ao OpenAI
+
+Ritmo pela cota de RPM/TPM (token bucket), novas tentativas com backoff
+exponencial e jitter em 429/5xx, e circuit breaker que corta as chamadas
+durante uma queda e libera uma sondagem depois do tempo de espera.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+from ..utils.metrics import (
+    CIRCUIT_REJECTIONS,
+    OPENAI_ERRORS,
+    OPENAI_RATE_LIMIT_WAIT,
+    OPENAI_RETRIES
+)
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a chamada nem foi feita"""
+
+
+class TokenBucket:
+    """Token bucket por reserva: quem pede mais do que há recebe quanto tempo esperar"""
+    
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """Inicializa o bucket cheio
+
+        Args:
+            rate_per_minute: Reposição por minuto
+            capacity: Rajada máxima; por padrão, um décimo da cota por minuto
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else max(rate_per_minute / 10.0, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def reserve(self, amount: float) -> float:
+        """Consome `amount` tokens e retorna quantos segundos esperar antes de usar"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        return max(0.0, -self._tokens / self.rate)
+    
+    def refund(self, amount: float) -> None:
+        """Devolve tokens reservados a mais (ex.: uso real menor que a estimativa)"""
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class RateLimiter:
+    """Cotas de requisições e tokens por minuto; 0 desativa cada uma"""
+    
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+    
+    def reserve(self, tokens: int) -> float:
+        """Reserva uma requisição com `tokens` estimados; retorna a espera em segundos"""
+        wait = max(0.0, self._paused_until - time.monotonic())
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+    
+    def refund(self, tokens: int) -> None:
+        if self.tokens and tokens > 0:
+            self.tokens.refund(tokens)
+    
+    def pause(self, seconds: float) -> None:
+        """Segura todas as chamadas (ex.: Retry-After de um 429)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """Abre após falhas seguidas e libera uma sondagem (half-open) após o tempo de espera"""
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+    
+    def allow(self) -> bool:
+        """Se a chamada pode ser feita; no half-open, só uma sondagem por vez"""
+        state = self.state
+        if state == self.CLOSED or self.failure_threshold <= 0:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+    
+    def record_success(self) -> None:
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+    
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold > 0:
+            if self._state != self.OPEN:
+                print(f"⚠️  Circuit breaker do OpenAI aberto após {self._failures} falha(s)")
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+    
+    def release(self) -> None:
+        """Libera a sondagem sem resultado (chamada cancelada)"""
+        self._probe_in_flight = False
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None) if isinstance(error, openai.APIStatusError) else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx e falhas de conexão; timeouts não, para não multiplicar a espera"""
+    if isinstance(error, openai.APITimeoutError):
+        return False
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = _status_code(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def is_outage(error: Exception) -> bool:
+    """Erros que indicam indisponibilidade do serviço (contam para o circuit breaker)
+
+    Um 429 não conta: o serviço está de pé e o ritmo é tratado pelo rate limiter.
+    """
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = _status_code(error)
+    return status is not None and status >= 500
+
+
+def _retry_after(error: Exception) -> float:
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except ValueError:
+        return 0.0
+
+
+def _retry_reason(error: Exception) -> str:
+    status = _status_code(error)
+    if status == 429:
+        return "rate_limited"
+    if status is not None:
+        return "server_error"
+    return "connection"
+
+
+class ResilientCaller:
+    """Aplica rate limit, retries e circuit breaker a uma chamada ao OpenAI"""
+    
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        breaker: CircuitBreaker,
+        max_retries: int,
+        base_delay: float,
+        max_delay: float
+    ):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Backoff exponencial com jitter completo, respeitando o Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = min(_retry_after(error), self.max_delay)
+        if retry_after:
+            # Um 429 vale para todo o worker: as próximas chamadas também esperam
+            self.limiter.pause(retry_after)
+        return max(delay, retry_after)
+    
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            CIRCUIT_REJECTIONS.inc()
+            raise CircuitOpenError("Circuit breaker do OpenAI aberto")
+    
+    def _check_still_closed(self) -> None:
+        # Outra chamada abriu o circuito durante o backoff: não insistir
+        if self.breaker.state == CircuitBreaker.OPEN:
+            CIRCUIT_REJECTIONS.inc()
+            raise CircuitOpenError("Circuit breaker do OpenAI aberto")
+    
+    def _on_error(self, error: Exception, attempt: int) -> Optional[float]:
+        """Registra o erro e retorna a espera antes da próxima tentativa, ou None para desistir"""
+        OPENAI_ERRORS.inc(type(error).__name__)
+        if attempt < self.max_retries and is_retryable(error):
+            OPENAI_RETRIES.inc(_retry_reason(error))
+            return self._backoff(attempt, error)
+        if is_outage(error):
+            self.breaker.record_failure()
+        elif _status_code(error) == 429:
+            self.breaker.release()
+        else:
+            # Erros do cliente (400, 401...) mostram que o serviço responde
+            self.breaker.record_success()
+        return None
+    
+    def _on_success(self, response: Any, estimated_tokens: int) -> None:
+        self.breaker.record_success()
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self.limiter.refund(estimated_tokens - usage.total_tokens)
+    
+    async def call(self, func: Callable[[], Awaitable[Any]], estimated_tokens: int) -> Any:
+        """Executa func() com as proteções
+
+        Raises:
+            CircuitOpenError: circuito aberto, sem chamada ao OpenAI
+            Exception: o último erro do OpenAI, depois das tentativas
+        """
+        self._admit()
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self.limiter.reserve(estimated_tokens)
+                if wait:
+                    OPENAI_RATE_LIMIT_WAIT.observe(wait)
+                    await asyncio.sleep(wait)
+                try:
+                    response = await func()
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        settled = True
+                        raise
+                    await asyncio.sleep(delay)
+                    self._check_still_closed()
+                    continue
+                self._on_success(response, estimated_tokens)
+                settled = True
+                return response
+        finally:
+            if not settled:
+                self.breaker.release()
+    
+    def call_sync(self, func: Callable[[], Any], estimated_tokens: int) -> Any:
+        """Versão síncrona de call()"""
+        self._admit()
+        settled = False
+        try:
+            for attempt in range(self.max_retries + 1):
+                wait = self.limiter.reserve(estimated_tokens)
+                if wait:
+                    OPENAI_RATE_LIMIT_WAIT.observe(wait)
+                    time.sleep(wait)
+                try:
+                    response = func()
+                except Exception as e:
+                    delay = self._on_error(e, attempt)
+                    if delay is None:
+                        settled = True
+                        raise
+                    time.sleep(delay)
+                    self._check_still_closed()
+                    continue
+                self._on_success(response, estimated_tokens)
+                settled = True
+                return response
+        finally:
+            if not settled:
+                self.breaker.release()
@@ -0,0 +1,159 @@
+"""
+Classificador local: features com hashing + TF-IDF e modelo linear em NumPy
+"""
+
+import json
+import os
+import re
+import time
+import zlib
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from ..models.email_models import EmailCategory
+from .keyword_matcher import fold_text
+
+TOKEN_PATTERN = re.compile(rb"\w\w+")
+
+
+class HashingVectorizer:
+    """Converte textos em vetores esparsos (unigramas e bigramas com hashing)"""
+    
+    def __init__(self, n_features: int = 2 ** 18, ngrams: int = 2):
+        self.n_features = n_features
+        self.ngrams = ngrams
+    
+    def _features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        tokens = TOKEN_PATTERN.findall(fold_text(text))
+        grams = list(tokens)
+        for n in range(2, self.ngrams + 1):
+            grams.extend(b" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        hashes = np.fromiter(map(zlib.crc32, grams), dtype=np.int64, count=len(grams))
+        indices, counts = np.unique(hashes % self.n_features, return_counts=True)
+        return indices, (1.0 + np.log(counts)).astype(np.float32)
+    
+    def transform(self, texts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        """Vetoriza um lote de textos
+
+        Returns:
+            (índices, valores, documento de cada valor, número de documentos)
+        """
+        all_indices, all_values, all_docs = [], [], []
+        n_docs = 0
+        for doc, text in enumerate(texts):
+            indices, values = self._features(text)
+            all_indices.append(indices)
+            all_values.append(values)
+            all_docs.append(np.full(len(indices), doc, dtype=np.int64))
+            n_docs += 1
+        
+        if not n_docs:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, np.empty(0, dtype=np.float32), empty, 0
+        return np.concatenate(all_indices), np.concatenate(all_values), np.concatenate(all_docs), n_docs
+
+
+def _l2_normalize(values: np.ndarray, docs: np.ndarray, n_docs: int) -> np.ndarray:
+    norms = np.sqrt(np.bincount(docs, weights=values.astype(np.float64) ** 2, minlength=n_docs))
+    norms[norms == 0] = 1.0
+    return (values / norms[docs]).astype(np.float32)
+
+
+class LocalClassifier:
+    """Regressão logística sobre features TF-IDF com hashing
+
+    A probabilidade prevista é a de o email ser produtivo.
+    """
+    
+    WEIGHTS_FILE = "weights.npy"
+    IDF_FILE = "idf.npy"
+    META_FILE = "meta.json"
+    
+    def __init__(self, weights: np.ndarray, idf: np.ndarray, bias: float, meta: dict):
+        self.weights = weights
+        self.idf = idf
+        self.bias = bias
+        self.meta = meta
+        self.vectorizer = HashingVectorizer(n_features=len(weights), ngrams=meta.get("ngrams", 2))
+    
+    @property
+    def version(self) -> str:
+        """Identificador do modelo treinado (usado nas chaves de cache)"""
+        return str(self.meta.get("trained_at", "0"))
+    
+    def _vectorize(self, texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+        indices, values, docs, n_docs = self.vectorizer.transform(texts)
+        values = values * self.idf[indices]
+        return indices, _l2_normalize(values, docs, n_docs), docs, n_docs
+    
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Probabilidade de cada texto ser produtivo, calculada em lote"""
+        indices, values, docs, n_docs = self._vectorize(texts)
+        scores = np.bincount(docs, weights=self.weights[indices] * values, minlength=n_docs) + self.bias
+        return 1.0 / (1.0 + np.exp(-scores))
+    
+    def classify(self, texts: Sequence[str]) -> List[Tuple[EmailCategory, float]]:
+        """Classifica um lote, retornando (categoria, confiança) por texto"""
+        results = []
+        for probability in self.predict_proba(texts):
+            if probability >= 0.5:
+                results.append((EmailCategory.PRODUTIVO, float(probability)))
+            else:
+                results.append((EmailCategory.IMPRODUTIVO, float(1.0 - probability)))
+        return results
+    
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[EmailCategory],
+        n_features: int = 2 ** 18,
+        epochs: int = 300,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4
+    ) -> "LocalClassifier":
+        """Treina o modelo com gradiente descendente em lote completo"""
+        vectorizer = HashingVectorizer(n_features=n_features)
+        indices, values, docs, n_docs = vectorizer.transform(texts)
+        if not n_docs:
+            raise ValueError("Nenhum exemplo para treinar")
+        
+        # IDF suavizado a partir da frequência de documentos de cada feature
+        document_frequency = np.bincount(indices, minlength=n_features)
+        idf = (np.log((1 + n_docs) / (1 + document_frequency)) + 1.0).astype(np.float32)
+        values = _l2_normalize(values * idf[indices], docs, n_docs)
+        
+        targets = np.array([1.0 if label == EmailCategory.PRODUTIVO else 0.0 for label in labels])
+        weights = np.zeros(n_features, dtype=np.float64)
+        bias = 0.0
+        
+        for _ in range(epochs):
+            scores = np.bincount(docs, weights=weights[indices] * values, minlength=n_docs) + bias
+            errors = 1.0 / (1.0 + np.exp(-scores)) - targets
+            gradient = np.bincount(indices, weights=errors[docs] * values, minlength=n_features) / n_docs
+            weights -= learning_rate * (gradient + l2 * weights)
+            bias -= learning_rate * errors.mean()
+        
+        meta = {"ngrams": vectorizer.ngrams, "n_samples": n_docs, "trained_at": int(time.time())}
+        return cls(weights.astype(np.float32), idf, float(bias), meta)
+    
+    def save(self, path: str) -> None:
+        """Salva o modelo em um diretório (arrays .npy para leitura via mmap)"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, self.WEIGHTS_FILE), np.asarray(self.weights, dtype=np.float32))
+        np.save(os.path.join(path, self.IDF_FILE), np.asarray(self.idf, dtype=np.float32))
+        with open(os.path.join(path, self.META_FILE), "w", encoding="utf-8") as meta_file:
+            json.dump({**self.meta, "bias": self.bias}, meta_file, indent=2)
+    
+    @classmethod
+    def load(cls, path: str) -> "LocalClassifier":
+        """Carrega o modelo com os pesos mapeados em memória (compartilhados entre processos)"""
+        with open(os.path.join(path, cls.META_FILE), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        weights = np.load(os.path.join(path, cls.WEIGHTS_FILE), mmap_mode="r")
+        idf = np.load(os.path.join(path, cls.IDF_FILE), mmap_mode="r")
+        return cls(weights, idf, float(meta.pop("bias")), meta)
@@ -0,0 +1,134 @@
+"""
+Cache de resultados de classificação endereçado por conteúdo
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .file_processor import FileProcessor
+
+
+class ResultCache:
+    """Cache LRU em memória com TTL e backend SQLite opcional compartilhado entre workers"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float, sqlite_path: Optional[str] = None):
+        """Inicializa o cache"""
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+    
+    @staticmethod
+    def build_key(text: str, *parts: str) -> str:
+        """Gera a chave a partir do texto normalizado e dos identificadores (modelo, prompt...)"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        digest.update(FileProcessor.clean_text(text).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _memory_get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def _memory_set(self, key: str, value: dict, expires_at: float) -> None:
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _disk_get(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM results WHERE key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def _disk_set(self, key: str, value: dict, expires_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._writes += 1
+            # Limpeza periódica das entradas expiradas
+            if self._writes % 1000 == 0:
+                self._db.execute("DELETE FROM results WHERE expires_at < ?", (time.time(),))
+    
+    async def get(self, key: str) -> Optional[dict]:
+        """Busca um resultado: memória primeiro, depois o backend em disco"""
+        value = self._memory_get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        
+        if self._db is not None:
+            stored = await asyncio.to_thread(self._disk_get, key)
+            if stored is not None:
+                value, expires_at = stored
+                self._memory_set(key, value, expires_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+        
+        self.misses += 1
+        return None
+    
+    async def set(self, key: str, value: dict) -> None:
+        """Armazena um resultado em memória e, se configurado, em disco"""
+        expires_at = time.time() + self.ttl_seconds
+        self._memory_set(key, value, expires_at)
+        if self._db is not None:
+            await asyncio.to_thread(self._disk_set, key, value, expires_at)
+    
+    def stats(self) -> dict:
+        """Contadores de acertos e falhas"""
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory+sqlite" if self._db is not None else "memory",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+    
+    def close(self) -> None:
+        """Fecha a conexão com o backend em disco"""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
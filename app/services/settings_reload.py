@@ -0,0 +1,77 @@
+"""
+Recarregamento das configurações sem reiniciar a aplicação
+
+Cada worker do uvicorn tem a própria cópia de `settings`, então o
+recarregamento acontece em cada um: pelo SIGHUP enviado ao worker, pela rota
+/admin/settings/reload (no worker que a atendeu) e, com estado compartilhado,
+por um arquivo de aviso no diretório compartilhado que os outros workers
+verificam periodicamente.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from ..utils.config import SettingsError, settings
+from ..utils.metrics import SETTINGS_RELOADS
+from .email_service import EmailService
+
+MARKER_NAME = "settings-reload"
+
+
+class SettingsReloader:
+    """Relê as configurações e as aplica aos serviços do worker"""
+    
+    def __init__(self, email_service: EmailService, shared_dir: Optional[str] = None):
+        self.email_service = email_service
+        self.marker_path = os.path.join(shared_dir, MARKER_NAME) if shared_dir else None
+        # Avisos anteriores à inicialização do worker já estão nos valores lidos
+        self._seen_mtime = self._marker_mtime()
+    
+    def _marker_mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.marker_path) if self.marker_path else 0.0
+        except OSError:
+            return 0.0
+    
+    def reload(self) -> dict:
+        """Recarrega neste worker; com valores inválidos, mantém os atuais e propaga o SettingsError"""
+        try:
+            result = settings.reload()
+        except SettingsError as e:
+            SETTINGS_RELOADS.inc("rejected")
+            print(f"⚠️  Recarregamento das configurações rejeitado: {str(e)}")
+            raise
+        self.email_service.apply_settings()
+        SETTINGS_RELOADS.inc("applied")
+        print(f"🔄 Configurações recarregadas (worker {os.getpid()}): "
+              f"{', '.join(result['changed']) or 'nenhuma alteração'}")
+        if result["restart_required"]:
+            print(f"⚠️  Exigem reinício: {', '.join(result['restart_required'])}")
+        return result
+    
+    def broadcast(self) -> bool:
+        """Avisa os outros workers pelo diretório compartilhado; False sem estado compartilhado"""
+        if not self.marker_path:
+            return False
+        with open(self.marker_path, "w") as marker_file:
+            marker_file.write(str(os.getpid()))
+        # Este worker já recarregou: o próprio aviso não conta
+        self._seen_mtime = self._marker_mtime()
+        return True
+    
+    def reload_on_signal(self) -> None:
+        """Handler do SIGHUP: erros já foram registrados em reload()"""
+        try:
+            self.reload()
+        except SettingsError:
+            pass
+    
+    async def watch(self, interval: float) -> None:
+        """Recarrega quando outro worker grava um aviso mais novo que o último visto"""
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._marker_mtime()
+            if mtime > self._seen_mtime:
+                self._seen_mtime = mtime
+                self.reload_on_signal()
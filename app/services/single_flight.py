@@ -0,0 +1,43 @@
+"""
+Coalescência de chamadas idênticas em andamento (single-flight)
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Executa uma única vez o trabalho de chamadas concorrentes com a mesma chave
+
+    A primeira chamada cria a tarefa; as seguintes, enquanto ela não termina,
+    aguardam o mesmo resultado (ou recebem a mesma exceção). O cancelamento de
+    um chamador não cancela a tarefa compartilhada pelos demais.
+    """
+    
+    def __init__(self):
+        """Inicializa sem chamadas em andamento"""
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.coalesced = 0
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+    
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Marca a exceção como lida mesmo se todos os chamadores foram cancelados
+        if not task.cancelled():
+            task.exception()
+    
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa func() ou aguarda a execução já em andamento para a chave"""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        
+        return await asyncio.shield(task)
@@ -0,0 +1,79 @@
+"""
+Detecção de encoding e decodificação dos arquivos de texto
+
+O encoding é decidido por um prefixo limitado do arquivo (BOM e validade
+UTF-8) e o conteúdo é decodificado uma única vez, direto do buffer
+(bytes, memoryview ou mmap), sem cópias intermediárias. O que não é UTF-8
+é lido como Windows-1252, o encoding dos arquivos salvos no Windows em
+português: os bytes 0x80-0x9F viram aspas curvas, travessões e "€" em vez
+dos caracteres de controle do Latin-1, e os cinco bytes que o Windows-1252
+não define caem no Latin-1.
+"""
+
+import codecs
+import mmap
+from typing import Union
+
+# Bytes examinados para decidir o encoding
+SNIFF_BYTES = 64 * 1024
+
+# UTF-32 antes do UTF-16: o BOM do UTF-32-LE começa com o do UTF-16-LE
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+UTF8 = "utf-8"
+WINDOWS_1252 = "cp1252"
+LATIN1_FALLBACK = "autou-latin-1-fallback"
+
+
+def _latin1_fallback(error: UnicodeDecodeError):
+    """Bytes que o Windows-1252 não define (0x81, 0x8D, 0x8F, 0x90, 0x9D) são lidos como Latin-1"""
+    return error.object[error.start:error.end].decode("latin-1"), error.end
+
+
+codecs.register_error(LATIN1_FALLBACK, _latin1_fallback)
+
+
+def _errors_for(encoding: str) -> str:
+    if encoding == WINDOWS_1252:
+        return LATIN1_FALLBACK
+    # UTF-16/32 com BOM: unidades inválidas viram U+FFFD em vez de derrubar o upload
+    return "strict" if encoding.startswith(UTF8) else "replace"
+
+
+def detect_encoding(prefix: Union[bytes, memoryview]) -> str:
+    """Encoding de um arquivo a partir do seu início (idealmente SNIFF_BYTES bytes)
+
+    Um prefixo cortado no meio de um caractere UTF-8 continua sendo UTF-8.
+    """
+    head = bytes(prefix[:4])
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder(UTF8)().decode(prefix, final=False)
+        return UTF8
+    except UnicodeDecodeError:
+        return WINDOWS_1252
+
+
+def decode_text(content: Union[bytes, memoryview, mmap.mmap]) -> str:
+    """Decodifica o conteúdo inteiro de um arquivo de texto, detectando o encoding
+
+    Se o prefixo é UTF-8 mas um trecho adiante não é, a parte válida fica em
+    UTF-8 e o restante é lido como Windows-1252.
+    """
+    view = memoryview(content)
+    encoding = detect_encoding(view[:SNIFF_BYTES])
+    try:
+        return str(view, encoding, _errors_for(encoding))
+    except UnicodeDecodeError as error:
+        return str(view[:error.start], encoding) + str(view[error.start:], WINDOWS_1252, LATIN1_FALLBACK)
+    finally:
+        view.release()
+
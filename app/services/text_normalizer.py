@@ -0,0 +1,147 @@
+"""
+Normalização do texto dos emails: espaços, caracteres e remoção opcional de boilerplate
+"""
+
+import html
+import re
+from typing import Optional
+
+from .keyword_matcher import fold_text
+
+# Caracteres mantidos pelo clean_text: palavras, espaços e pontuação básica
+DISALLOWED_CHAR = re.compile(r"[^\w\s.,!?:;\-()]")
+DISALLOWED_RUN = re.compile(r"[^\w\s.,!?:;\-()]+")
+
+# Com poucos caracteres distintos a remover, um str.replace por caractere (varredura
+# em C) é mais rápido que a regex; acima disso, uma única passada da regex compensa
+MAX_REPLACE_PASSES = 8
+
+# Início do histórico citado em respostas e encaminhamentos. O texto pode ter
+# passado pelo clean_text (sem quebras de linha nem ">"), então os padrões não
+# dependem do início da linha. Blocos "De:/Data:" sem "Enviado:" ficam de fora
+# porque também aparecem nos cabeçalhos do próprio email.
+QUOTED_REPLY_PATTERN = re.compile(
+    r"(?:"
+    r"\bEm\s.{0,120}?\sescreveu\s*:"
+    r"|\bOn\s.{0,120}?\swrote\s*:"
+    r"|-{2,}\s*(?:Mensagem original|Original Message|Mensagem encaminhada|Forwarded message)\s*-{0,}"
+    r"|\bDe\s*:.{0,200}?\bEnviad[ao](?:\s+em)?\s*:"
+    r"|\bFrom\s*:.{0,200}?\bSent\s*:"
+    r"|(?:^|\n)\s*>"
+    r")",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Palavras que todo marcador acima contém (texto sem acentos e em minúsculas).
+# Procurá-las com bytes.find é muito mais rápido que rodar a regex no texto todo;
+# a regex só confirma a vizinhança de cada ocorrência.
+QUOTE_ANCHORS = (
+    b"escreveu", b"wrote", b"enviad", b"sent", b"mensagem original", b"original message",
+    b"mensagem encaminhada", b"forwarded message", b">"
+)
+# Distância máxima entre o início do marcador e a palavra-âncora
+QUOTE_LOOKBEHIND = 240
+
+# Despedidas e rodapés que abrem a assinatura ("Obrigado" fica de fora: é conteúdo)
+SIGNATURE_PATTERN = re.compile(
+    r"(?:^|\n)[ \t]*(?:"
+    r"--[ \t]*\n"
+    r"|(?:Atenciosamente|Att|Atte|Abra[çc]os?|Cordialmente|Sauda[çc][õo]es|"
+    r"Best regards|Kind regards|Regards|Cheers)[ \t.,!]*\n"
+    r"|Enviado do meu \w+|Sent from my \w+"
+    r")",
+    re.IGNORECASE
+)
+
+# Assinaturas ficam no fim: só esse trecho final é examinado
+SIGNATURE_MAX_CHARS = 1000
+
+HTML_HINT = re.compile(r"<(?:html|body|div|p|br|table|span|font)\b", re.IGNORECASE)
+HTML_INVISIBLE = re.compile(r"<!--.*?-->|<(script|style|head|title)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+HTML_BREAK = re.compile(r"<\s*(?:br|/p|/div|/tr|/li|/h[1-6]|/blockquote)\b[^>]*>", re.IGNORECASE)
+HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def strip_html(text: str) -> str:
+    """Converte HTML em texto: remove scripts, estilos e tags e decodifica entidades"""
+    if not HTML_HINT.search(text):
+        return text
+    text = HTML_INVISIBLE.sub("", text)
+    text = HTML_BREAK.sub("\n", text)
+    return html.unescape(HTML_TAG.sub(" ", text))
+
+
+def find_quoted_reply(text: str, end: Optional[int] = None) -> Optional[int]:
+    """Posição onde começa o histórico citado (procurando até `end`), ou None"""
+    end = len(text) if end is None else min(end, len(text))
+    folded = fold_text(text[:end])
+    # Próxima ocorrência de cada âncora, atualizada só quando ficar para trás
+    next_positions = {anchor: folded.find(anchor) for anchor in QUOTE_ANCHORS}
+    position = 0
+    while True:
+        for anchor, found in next_positions.items():
+            if 0 <= found < position:
+                next_positions[anchor] = folded.find(anchor, position)
+        candidates = [found for found in next_positions.values() if found >= 0]
+        if not candidates:
+            return None
+        anchor_at = min(candidates)
+        quoted = QUOTED_REPLY_PATTERN.search(text, max(anchor_at - QUOTE_LOOKBEHIND, 0), min(anchor_at + 40, end))
+        if quoted:
+            return quoted.start()
+        position = anchor_at + 1
+
+
+def strip_quoted_replies(text: str) -> str:
+    """Remove o histórico citado a partir do primeiro marcador de resposta/encaminhamento"""
+    start = find_quoted_reply(text)
+    if start is not None and text[:start].strip():
+        return text[:start]
+    return text
+
+
+def strip_signature(text: str) -> str:
+    """Remove a assinatura que começa no trecho final do email"""
+    tail_start = max(len(text) - SIGNATURE_MAX_CHARS, 0)
+    signature = SIGNATURE_PATTERN.search(text, tail_start)
+    if signature and text[:signature.start()].strip():
+        return text[:signature.start()]
+    return text
+
+
+def strip_boilerplate(text: str, html_markup: bool = False, quotes: bool = False, signatures: bool = False) -> str:
+    """Remove HTML, histórico citado e assinatura, conforme as opções
+
+    Precisa das quebras de linha originais, então roda antes do colapso de espaços.
+    """
+    if html_markup:
+        text = strip_html(text)
+    if quotes:
+        text = strip_quoted_replies(text)
+    if signatures:
+        text = strip_signature(text)
+    return text
+
+
+def collapse_and_filter(text: str) -> str:
+    """Colapsa espaços em branco e remove caracteres fora da lista permitida
+
+    Equivale a trocar cada sequência de espaços (inclusive quebras de linha) por
+    um espaço e depois apagar os caracteres não permitidos, mas sem criar uma
+    cópia do texto por etapa: split/join faz o colapso em C, e a remoção só
+    percorre o texto para os caracteres que de fato aparecem nele.
+    """
+    text = " ".join(text.split())
+    disallowed = [char for char in set(text) if DISALLOWED_CHAR.match(char)]
+    if len(disallowed) > MAX_REPLACE_PASSES:
+        return DISALLOWED_RUN.sub("", text).strip()
+    for char in disallowed:
+        text = text.replace(char, "")
+    return text.strip()
+
+
+def normalize_text(text: str, html_markup: bool = False, quotes: bool = False, signatures: bool = False) -> str:
+    """Normaliza o texto do email (veja strip_boilerplate e collapse_and_filter)"""
+    if not text:
+        return ""
+    return collapse_and_filter(strip_boilerplate(text, html_markup, quotes, signatures))
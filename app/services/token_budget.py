@@ -0,0 +1,80 @@
+"""
+Orçamento de tokens do texto do email antes da montagem dos prompts
+"""
+
+import re
+from typing import Dict, Tuple
+
+from ..models.email_models import TruncationInfo
+from .text_normalizer import find_quoted_reply
+
+# Estimativa conservadora para português (acentos e palavras longas rendem menos caracteres por token)
+CHARS_PER_TOKEN = 3.5
+
+TRUNCATION_MARKER = " [...]"
+
+# O assunto termina na quebra de linha ou, em texto já normalizado, no próximo cabeçalho
+SUBJECT_PATTERN = re.compile(
+    r"\b(?:Assunto|Subject)\s*:\s*([^\n]{1,200}?)"
+    r"(?=\s+(?:De|From|Para|To|Cc|Data|Date|Enviado|Sent)\s*:|\n|$)",
+    re.IGNORECASE
+)
+
+# Até onde procurar o assunto (cabeçalhos ficam no topo)
+SUBJECT_SEARCH_CHARS = 2000
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local de tokens, sem tokenizer (O(1))"""
+    return int(len(text) / CHARS_PER_TOKEN + 0.999)
+
+
+def budget_for_model(model: str, budgets: Dict[str, int], default: int) -> int:
+    """Orçamento do modelo; aceita prefixos ("gpt-4o" vale para "gpt-4o-2024-08-06")"""
+    if model in budgets:
+        return int(budgets[model])
+    matches = [prefix for prefix in budgets if model.startswith(prefix)]
+    return int(budgets[max(matches, key=len)]) if matches else default
+
+
+def _extract_subject(head: str) -> Tuple[str, str]:
+    """Separa a linha de assunto do restante do texto"""
+    found = SUBJECT_PATTERN.search(head[:SUBJECT_SEARCH_CHARS])
+    if not found:
+        return "", head
+    subject = found.group(1).strip()
+    return subject, head[:found.start()] + head[found.end():]
+
+
+def fit_to_budget(text: str, max_tokens: int) -> Tuple[str, TruncationInfo]:
+    """Reduz o email ao orçamento mantendo as partes mais informativas
+
+    Remove o histórico citado, mantém o início do corpo até o orçamento e,
+    quando corta, preserva o assunto no topo. Só o começo do texto é
+    examinado, então o custo não cresce com o tamanho do upload.
+
+    Returns:
+        (texto para o prompt, informação do corte aplicado)
+    """
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    # Um histórico que começa muito depois do orçamento seria cortado de qualquer forma
+    quoted_start = find_quoted_reply(text, max_chars * 2)
+    quoted_reply_removed = bool(quoted_start is not None and text[:quoted_start].strip())
+    body = text[:quoted_start] if quoted_reply_removed else text
+    
+    truncated = len(body) > max_chars
+    if truncated:
+        subject, head = _extract_subject(body[:max(max_chars, SUBJECT_SEARCH_CHARS)])
+        prefix = f"Assunto: {subject}\n" if subject else ""
+        available = max(max_chars - len(prefix) - len(TRUNCATION_MARKER), 0)
+        fitted = prefix + head.strip()[:available].rstrip() + TRUNCATION_MARKER
+    else:
+        fitted = body.strip()
+    
+    return fitted, TruncationInfo(
+        original_tokens=estimate_tokens(text),
+        prompt_tokens=estimate_tokens(fitted),
+        budget_tokens=max_tokens,
+        truncated=truncated,
+        quoted_reply_removed=quoted_reply_removed
+    )
@@ -0,0 +1,76 @@
+"""
+Acesso aos uploads já recebidos pelo Starlette, sem cópia
+
+O Starlette recebe o corpo multipart inteiro antes do handler rodar e guarda
+cada arquivo em um SpooledTemporaryFile (em memória até
+UPLOAD_SPOOL_THRESHOLD, em disco acima disso). Aqui esse arquivo é usado
+como está: o limite de tamanho é conferido pelo tamanho já recebido e o pool
+de extração abre o mesmo arquivo temporário, em vez de uma segunda cópia.
+
+A recusa antecipada (antes de receber o corpo) é feita pelo middleware de
+Content-Length; requisições chunked, sem Content-Length, só são limitadas
+depois de recebidas.
+"""
+
+import os
+import sys
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+
+
+class UploadTooLargeError(Exception):
+    """O upload ultrapassou o tamanho máximo permitido"""
+
+
+def _on_disk(file: BinaryIO) -> bool:
+    # fileno() de um SpooledTemporaryFile ainda em memória o passaria para o disco
+    return getattr(file, "_rolled", True)
+
+
+def _shared_path(file: BinaryIO) -> Optional[str]:
+    """Caminho pelo qual outro processo do mesmo usuário abre o arquivo temporário
+
+    O arquivo do Starlette não tem nome no sistema de arquivos; no Linux, o
+    descritor aberto aparece em /proc/<pid>/fd. Em outros sistemas, None.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    path = f"/proc/{os.getpid()}/fd/{file.fileno()}"
+    return path if os.path.exists(path) else None
+
+
+class SpooledUpload:
+    """Conteúdo de um upload: o arquivo temporário do Starlette, em memória ou em disco"""
+    
+    def __init__(self, filename: str, size: int, file: BinaryIO):
+        self.filename = filename
+        self.size = size
+        self.file = file
+        self._path = _shared_path(file) if _on_disk(file) else None
+    
+    @property
+    def path(self) -> Optional[str]:
+        """Caminho do arquivo temporário para o pool de extração, se o conteúdo está em disco"""
+        return self._path
+    
+    def getvalue(self) -> bytes:
+        """Conteúdo inteiro em memória (uploads pequenos, ou em disco sem caminho compartilhável)"""
+        self.file.seek(0)
+        return self.file.read()
+
+
+def open_upload(file: UploadFile, max_size: int) -> SpooledUpload:
+    """Confere o tamanho de um upload já recebido e o prepara para a extração
+
+    Raises:
+        UploadTooLargeError: se o upload for maior que max_size
+    """
+    size = getattr(file, "size", None)
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    if size > max_size:
+        raise UploadTooLargeError(f"Upload de {size} bytes excede o limite de {max_size}")
+    file.file.seek(0)
+    return SpooledUpload(file.filename, size, file.file)
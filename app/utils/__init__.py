@@ -3,7 +3,12 @@ Utilitários da aplicação
 """
 
 from .config import Settings
+from .streaming import RequestStreamingResponse
+from .metrics import MetricsRegistry, metrics
 
 __all__ = [
-    "Settings"
+    "Settings",
+    "RequestStreamingResponse",
+    "MetricsRegistry",
+    "metrics"
 ]
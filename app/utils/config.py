@@ -1,30 +1,405 @@
 """
 Configurações da aplicação
+
+Os valores vêm das variáveis de ambiente e, opcionalmente, de um arquivo
+indicado em SETTINGS_FILE (formato .env ou JSON), que tem precedência sobre
+o ambiente. Todos os valores são validados juntos: uma configuração
+inválida gera um SettingsError listando cada problema, na inicialização ou
+em settings.reload(), que mantém os valores antigos nesse caso.
 """
 
+import json
 import os
-from typing import Optional, List
+import tempfile
+from typing import Dict, List, Optional
+
+from dotenv import dotenv_values
+
+
+class SettingsError(ValueError):
+    """Configuração inválida; a mensagem lista todos os valores com problema"""
+
+
+def load_sources() -> Dict[str, str]:
+    """Variáveis de ambiente sobrepostas pelo arquivo de SETTINGS_FILE, se houver"""
+    values = dict(os.environ)
+    path = values.get("SETTINGS_FILE")
+    if not path:
+        return values
+    try:
+        if path.endswith(".json"):
+            with open(path, encoding="utf-8") as settings_file:
+                data = json.load(settings_file)
+            if not isinstance(data, dict):
+                raise SettingsError(f"SETTINGS_FILE: {path} deve conter um objeto JSON")
+            # Listas e objetos voltam a ser texto JSON, como viriam do ambiente
+            file_values = {
+                key: json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+                for key, value in data.items() if value is not None
+            }
+        else:
+            file_values = {key: value for key, value in dotenv_values(path).items() if value is not None}
+    except (OSError, ValueError) as e:
+        if isinstance(e, SettingsError):
+            raise
+        raise SettingsError(f"SETTINGS_FILE: não foi possível ler {path}: {str(e)}")
+    values.update(file_values)
+    return values
+
+
+class _Source:
+    """Leitura tipada dos valores, acumulando os erros em vez de parar no primeiro"""
+    
+    def __init__(self, values: Dict[str, str]):
+        self.values = values
+        self.errors: List[str] = []
+    
+    def get_str(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.values.get(name, default)
+    
+    def _convert(self, name: str, default, convert, expected: str):
+        raw = self.values.get(name)
+        if raw is None or raw.strip() == "":
+            raw = default
+        try:
+            return convert(raw)
+        except (TypeError, ValueError):
+            self.errors.append(f"{name}: {raw!r} não é {expected}")
+            return convert(default)
+    
+    def get_int(self, name: str, default: str) -> int:
+        return self._convert(name, default, lambda raw: int(str(raw).strip()), "um inteiro")
+    
+    def get_float(self, name: str, default: str) -> float:
+        return self._convert(name, default, lambda raw: float(str(raw).strip()), "um número")
+    
+    def get_bool(self, name: str, default: str) -> bool:
+        def convert(raw) -> bool:
+            value = str(raw).strip().lower()
+            if value in ("true", "1", "yes", "on"):
+                return True
+            if value in ("false", "0", "no", "off"):
+                return False
+            raise ValueError(value)
+        return self._convert(name, default, convert, "true/false")
+    
+    def get_list(self, name: str, default: str) -> List[str]:
+        """Lista separada por vírgulas"""
+        raw = self.values.get(name)
+        raw = default if raw is None else raw
+        return [item.strip() for item in raw.split(",") if item.strip()]
+    
+    def get_json(self, name: str, default: str = "{}") -> dict:
+        """Objeto JSON (ex.: valores por modelo)"""
+        raw = self.values.get(name) or default
+        try:
+            value = json.loads(raw)
+        except ValueError as e:
+            self.errors.append(f"{name}: JSON inválido ({str(e)})")
+            return json.loads(default)
+        if not isinstance(value, dict):
+            self.errors.append(f"{name}: deve ser um objeto JSON")
+            return json.loads(default)
+        return value
+
+
+# Mudanças nestas chaves só valem depois de reiniciar os workers: são lidas uma vez,
+# na criação de clientes, pools, arquivos e do app (CORS, debug)
+RESTART_REQUIRED = {
+    "app_name", "app_version", "debug", "cors_origins", "admin_token",
+    "openai_api_key", "openai_base_url", "openai_max_connections",
+    "keywords_file", "local_model_mode", "local_model_path",
+    "web_concurrency", "shared_state_dir", "metrics_flush_interval",
+    "jobs_enabled", "job_db_path", "job_workers",
+    "audit_enabled", "audit_dir", "audit_include_text",
+    "cache_enabled", "cache_sqlite_path", "reply_store_sqlite_path",
+    "upload_spool_threshold", "settings_file",
+}
+
+# Parâmetros das completions por tipo de chamada, ajustáveis por modelo em OPENAI_MODEL_PARAMS
+COMPLETION_KINDS = ("classify", "reply", "combined")
+
+# Limites mínimos (e máximos) validados depois da leitura
+MINIMUMS = {
+    "openai_timeout": 0.1, "openai_max_concurrency": 1, "openai_max_connections": 1,
+    "email_token_budget": 1, "openai_rpm": 0, "openai_tpm": 0, "openai_max_retries": 0,
+    "openai_retry_base_delay": 0, "openai_retry_max_delay": 0,
+    "circuit_failure_threshold": 1, "circuit_reset_timeout": 0,
+    "web_concurrency": 1, "metrics_flush_interval": 0.1,
+    "job_workers": 1, "job_timeout": 1, "job_max_attempts": 1, "job_max_queued": 1,
+    "job_max_wait": 0, "job_retention_seconds": 0,
+    "audit_max_buffered": 1, "audit_batch_size": 1, "audit_flush_interval": 0.1,
+    "audit_rotate_bytes": 1024, "audit_text_max_chars": 1,
+    "cache_max_entries": 1, "cache_ttl_seconds": 0,
+    "reply_store_max_entries": 1, "reply_store_ttl_seconds": 0,
+    "batch_max_items": 1, "batch_concurrency": 1, "batch_max_bytes": 1024,
+    "stream_concurrency": 1, "stream_max_line_bytes": 1024,
+    "max_file_size": 1024, "upload_spool_threshold": 0, "upload_chunk_size": 1024,
+    "pdf_max_pages": 1, "pdf_max_chars": 1, "pdf_max_read_pages": 1,
+    "eml_max_body_bytes": 1, "extraction_workers": 0, "extraction_timeout": 0.1,
+    "extraction_txt_threshold": 0,
+    "openai_classify_max_tokens": 1, "openai_reply_max_tokens": 1, "openai_combined_max_tokens": 1,
+}
+RANGES = {
+    "cascade_keyword_threshold": (0.0, 1.0),
+    "local_model_threshold": (0.0, 1.0),
+    "openai_classify_temperature": (0.0, 2.0),
+    "openai_reply_temperature": (0.0, 2.0),
+    "openai_combined_temperature": (0.0, 2.0),
+}
+LOCAL_MODEL_MODES = ("off", "primary", "prefilter")
 
 
 class Settings:
     """Configurações da aplicação"""
     
-    def __init__(self):
+    def __init__(self, values: Optional[Dict[str, str]] = None):
+        """Lê e valida as configurações
+        
+        Args:
+            values: Valores já carregados (padrão: ambiente + SETTINGS_FILE)
+        
+        Raises:
+            SettingsError: Se algum valor for inválido
+        """
+        env = _Source(load_sources() if values is None else values)
+        self.settings_file: Optional[str] = env.get_str("SETTINGS_FILE") or None
+        
         # API Settings
-        self.app_name: str = "AutoU Email Classifier"
-        self.app_version: str = "1.0.0"
-        self.debug: bool = False
+        self.app_name: str = env.get_str("APP_NAME", "AutoU Email Classifier")
+        self.app_version: str = env.get_str("APP_VERSION", "1.0.0")
+        self.debug: bool = env.get_bool("DEBUG", "false")
+        # Token exigido (cabeçalho X-Admin-Token) nas rotas /admin; vazio deixa as rotas abertas
+        self.admin_token: Optional[str] = env.get_str("ADMIN_TOKEN") or None
         
         # OpenAI Settings
-        self.openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
-        self.openai_model: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.openai_api_key: Optional[str] = env.get_str("OPENAI_API_KEY")
+        self.openai_model: str = env.get_str("OPENAI_MODEL", "gpt-3.5-turbo")
+        self.openai_base_url: Optional[str] = env.get_str("OPENAI_BASE_URL") or None
+        self.openai_timeout: float = env.get_float("OPENAI_TIMEOUT", "15")
+        self.openai_max_concurrency: int = env.get_int("OPENAI_MAX_CONCURRENCY", "20")
+        self.openai_max_connections: int = env.get_int("OPENAI_MAX_CONNECTIONS", "50")
+        # Classificação e resposta em uma única completion estruturada (JSON)
+        self.openai_single_call: bool = env.get_bool("OPENAI_SINGLE_CALL", "false")
+        # max_tokens e temperature de cada tipo de chamada
+        self.openai_classify_max_tokens: int = env.get_int("OPENAI_CLASSIFY_MAX_TOKENS", "10")
+        self.openai_classify_temperature: float = env.get_float("OPENAI_CLASSIFY_TEMPERATURE", "0.1")
+        self.openai_reply_max_tokens: int = env.get_int("OPENAI_REPLY_MAX_TOKENS", "100")
+        self.openai_reply_temperature: float = env.get_float("OPENAI_REPLY_TEMPERATURE", "0.7")
+        self.openai_combined_max_tokens: int = env.get_int("OPENAI_COMBINED_MAX_TOKENS", "150")
+        self.openai_combined_temperature: float = env.get_float("OPENAI_COMBINED_TEMPERATURE", "0.3")
+        # Ajustes por modelo em JSON, com as chaves acima sem o prefixo "openai_"
+        # (ex.: OPENAI_MODEL_PARAMS={"gpt-4o": {"reply_max_tokens": 200}}); prefixos de nome valem
+        self.openai_model_params: dict = env.get_json("OPENAI_MODEL_PARAMS")
+        
+        # Limpeza opcional do texto antes da classificação
+        self.clean_strip_html: bool = env.get_bool("CLEAN_STRIP_HTML", "false")
+        self.clean_strip_quotes: bool = env.get_bool("CLEAN_STRIP_QUOTES", "false")
+        self.clean_strip_signatures: bool = env.get_bool("CLEAN_STRIP_SIGNATURES", "false")
+        
+        # Orçamento de tokens do texto do email no prompt, com valores por modelo em JSON
+        # (ex.: EMAIL_TOKEN_BUDGETS={"gpt-4o": 6000}); prefixos de nome valem
+        self.email_token_budget: int = env.get_int("EMAIL_TOKEN_BUDGET", "1500")
+        self.email_token_budgets: dict = env.get_json("EMAIL_TOKEN_BUDGETS")
+        
+        # Resiliência: cota por minuto (0 = sem limite local), retries e circuit breaker
+        self.openai_rpm: int = env.get_int("OPENAI_RPM", "0")
+        self.openai_tpm: int = env.get_int("OPENAI_TPM", "0")
+        self.openai_max_retries: int = env.get_int("OPENAI_MAX_RETRIES", "2")
+        self.openai_retry_base_delay: float = env.get_float("OPENAI_RETRY_BASE_DELAY", "0.5")
+        self.openai_retry_max_delay: float = env.get_float("OPENAI_RETRY_MAX_DELAY", "8")
+        self.circuit_failure_threshold: int = env.get_int("CIRCUIT_FAILURE_THRESHOLD", "5")
+        self.circuit_reset_timeout: float = env.get_float("CIRCUIT_RESET_TIMEOUT", "30")
+        
+        # Classificação por palavras-chave
+        self.keywords_file: str = env.get_str(
+            "KEYWORDS_FILE",
+            os.path.join(os.path.dirname(__file__), "..", "data", "keywords.json")
+        )
+        
+        # Cascata: palavras-chave decidem sozinhas acima do limiar de confiança
+        self.cascade_enabled: bool = env.get_bool("CASCADE_ENABLED", "true")
+        self.cascade_keyword_threshold: float = env.get_float("CASCADE_KEYWORD_THRESHOLD", "0.6")
+        # Decisões dos tiers baratos usam a resposta template, sem chamar o LLM
+        self.cascade_template_reply: bool = env.get_bool("CASCADE_TEMPLATE_REPLY", "true")
+        
+        # Classificador local (TF-IDF + modelo linear)
+        # off: desligado | primary: substitui o OpenAI na classificação |
+        # prefilter: decide sozinho quando a confiança passa do limiar
+        self.local_model_mode: str = env.get_str("LOCAL_MODEL_MODE", "off").lower()
+        self.local_model_path: Optional[str] = env.get_str("LOCAL_MODEL_PATH") or None
+        self.local_model_threshold: float = env.get_float("LOCAL_MODEL_THRESHOLD", "0.85")
+        
+        # Workers do uvicorn (o próprio uvicorn lê WEB_CONCURRENCY quando --workers não é passado)
+        self.web_concurrency: int = env.get_int("WEB_CONCURRENCY", "1")
+        # Diretório do estado compartilhado entre workers: métricas e, por padrão, o cache SQLite
+        self.shared_state_dir: Optional[str] = env.get_str("SHARED_STATE_DIR") or (
+            os.path.join(tempfile.gettempdir(), "autou-state") if self.web_concurrency > 1 else None
+        )
+        # Intervalo, em segundos, entre as gravações das métricas de cada worker no diretório compartilhado
+        self.metrics_flush_interval: float = env.get_float("METRICS_FLUSH_INTERVAL", "5")
+        
+        # Fila de jobs assíncronos (POST /jobs), persistida em SQLite
+        self.jobs_enabled: bool = env.get_bool("JOBS_ENABLED", "true")
+        self.job_db_path: str = env.get_str("JOB_DB_PATH") or os.path.join(
+            self.shared_state_dir or tempfile.gettempdir(), "autou_jobs.sqlite3"
+        )
+        # Jobs executados ao mesmo tempo por worker do uvicorn
+        self.job_workers: int = env.get_int("JOB_WORKERS", "4")
+        # Tempo máximo de um job; um job de um worker que morreu é retomado depois desse prazo (mais uma folga)
+        self.job_timeout: float = env.get_float("JOB_TIMEOUT", "300")
+        self.job_max_attempts: int = env.get_int("JOB_MAX_ATTEMPTS", "3")
+        self.job_max_queued: int = env.get_int("JOB_MAX_QUEUED", "10000")
+        # Espera máxima do long-polling em GET /jobs/{id}?wait=...
+        self.job_max_wait: float = env.get_float("JOB_MAX_WAIT", "30")
+        self.job_retention_seconds: float = env.get_float("JOB_RETENTION_SECONDS", "86400")
+        
+        # Log de auditoria das classificações (JSONL comprimido, gravado em lotes)
+        self.audit_enabled: bool = env.get_bool("AUDIT_ENABLED", "true")
+        self.audit_dir: str = env.get_str("AUDIT_DIR") or os.path.join(
+            self.shared_state_dir or tempfile.gettempdir(), "autou-audit"
+        )
+        # Registros em memória aguardando gravação; acima disso, os mais antigos são descartados
+        self.audit_max_buffered: int = env.get_int("AUDIT_MAX_BUFFERED", "10000")
+        self.audit_batch_size: int = env.get_int("AUDIT_BATCH_SIZE", "500")
+        self.audit_flush_interval: float = env.get_float("AUDIT_FLUSH_INTERVAL", "2")
+        self.audit_rotate_bytes: int = env.get_int("AUDIT_ROTATE_BYTES", str(64 * 1024 * 1024))
+        # O texto normalizado vai no registro (necessário para exportar o dataset); sem ele, só o hash
+        self.audit_include_text: bool = env.get_bool("AUDIT_INCLUDE_TEXT", "true")
+        self.audit_text_max_chars: int = env.get_int("AUDIT_TEXT_MAX_CHARS", "20000")
+        
+        # Cache Settings
+        self.cache_enabled: bool = env.get_bool("CACHE_ENABLED", "true")
+        self.cache_max_entries: int = env.get_int("CACHE_MAX_ENTRIES", "10000")
+        self.cache_ttl_seconds: float = env.get_float("CACHE_TTL_SECONDS", "86400")
+        # Caminho de um arquivo SQLite para compartilhar o cache entre workers
+        self.cache_sqlite_path: Optional[str] = env.get_str("CACHE_SQLITE_PATH") or (
+            os.path.join(self.shared_state_dir, "cache.sqlite3") if self.shared_state_dir else None
+        )
+        
+        # Classificações sem resposta (include_reply=false) guardadas para gerar a resposta depois
+        self.reply_store_max_entries: int = env.get_int("REPLY_STORE_MAX_ENTRIES", "10000")
+        self.reply_store_ttl_seconds: float = env.get_float("REPLY_STORE_TTL_SECONDS", "3600")
+        self.reply_store_sqlite_path: Optional[str] = env.get_str("REPLY_STORE_SQLITE_PATH") or (
+            os.path.join(self.shared_state_dir, "replies.sqlite3") if self.shared_state_dir else None
+        )
+        
+        # Batch Settings
+        self.batch_max_items: int = env.get_int("BATCH_MAX_ITEMS", "1000")
+        self.batch_concurrency: int = env.get_int("BATCH_CONCURRENCY", "10")
+        # Corpo máximo de POST /classify-batch (JSON ou multipart), recusado antes da leitura
+        self.batch_max_bytes: int = env.get_int("BATCH_MAX_BYTES", str(50 * 1024 * 1024))
+        
+        # Streaming (NDJSON) Settings
+        self.stream_concurrency: int = env.get_int("STREAM_CONCURRENCY", "10")
+        self.stream_max_line_bytes: int = env.get_int("STREAM_MAX_LINE_BYTES", str(1024 * 1024))
         
         # File Processing Settings
-        self.max_file_size: int = 10 * 1024 * 1024  # 10MB
-        self.allowed_extensions: List[str] = [".txt", ".pdf"]
+        self.max_file_size: int = env.get_int("MAX_FILE_SIZE", str(10 * 1024 * 1024))  # 10MB
+        self.allowed_extensions: List[str] = [
+            extension.lower() for extension in env.get_list("ALLOWED_EXTENSIONS", ".txt,.pdf,.eml")
+        ]
+        # Arquivos do multipart acima do limiar são recebidos em um arquivo temporário
+        # (no diretório de TMPDIR) em vez da memória
+        self.upload_spool_threshold: int = env.get_int("UPLOAD_SPOOL_THRESHOLD", str(1024 * 1024))
+        # Blocos da cópia das entradas dos jobs para o diretório da fila
+        self.upload_chunk_size: int = env.get_int("UPLOAD_CHUNK_SIZE", str(64 * 1024))
+        self.pdf_max_pages: int = env.get_int("PDF_MAX_PAGES", "500")
+        # A leitura do PDF para ao atingir qualquer um destes limites
+        self.pdf_max_chars: int = env.get_int("PDF_MAX_CHARS", "20000")
+        self.pdf_max_read_pages: int = env.get_int("PDF_MAX_READ_PAGES", "20")
+        # Emails .eml: total de bytes decodificados do corpo e dos anexos, e se anexos PDF/TXT entram no texto
+        self.eml_max_body_bytes: int = env.get_int("EML_MAX_BODY_BYTES", "200000")
+        self.eml_attachments: bool = env.get_bool("EML_ATTACHMENTS", "true")
+        # Extração em processos separados (0 desativa o pool)
+        self.extraction_workers: int = env.get_int("EXTRACTION_WORKERS", str(min(2, os.cpu_count() or 1)))
+        self.extraction_timeout: float = env.get_float("EXTRACTION_TIMEOUT", "30")
+        self.extraction_txt_threshold: int = env.get_int("EXTRACTION_TXT_THRESHOLD", str(1024 * 1024))
         
         # CORS Settings
-        self.cors_origins: List[str] = ["*"]
+        self.cors_origins: List[str] = env.get_list("CORS_ORIGINS", "*")
+        
+        self._validate(env.errors)
+    
+    def _validate(self, errors: List[str]) -> None:
+        """Limites e valores permitidos; levanta SettingsError com todos os problemas"""
+        for name, minimum in MINIMUMS.items():
+            if getattr(self, name) < minimum:
+                errors.append(f"{name.upper()}: {getattr(self, name)} é menor que o mínimo {minimum}")
+        for name, (low, high) in RANGES.items():
+            if not low <= getattr(self, name) <= high:
+                errors.append(f"{name.upper()}: {getattr(self, name)} fora do intervalo [{low}, {high}]")
+        if self.local_model_mode not in LOCAL_MODEL_MODES:
+            errors.append(f"LOCAL_MODEL_MODE: use {', '.join(LOCAL_MODEL_MODES)}")
+        unsupported = [ext for ext in self.allowed_extensions if ext not in (".txt", ".pdf", ".eml")]
+        if unsupported or not self.allowed_extensions:
+            errors.append("ALLOWED_EXTENSIONS: use um ou mais de .txt, .pdf, .eml")
+        for model, budget in self.email_token_budgets.items():
+            if not isinstance(budget, int) or isinstance(budget, bool) or budget < 1:
+                errors.append(f"EMAIL_TOKEN_BUDGETS: orçamento inválido para {model}")
+        valid_params = {f"{kind}_{param}" for kind in COMPLETION_KINDS for param in ("max_tokens", "temperature")}
+        for model, params in self.openai_model_params.items():
+            if not isinstance(params, dict) or not set(params) <= valid_params:
+                errors.append(f"OPENAI_MODEL_PARAMS: parâmetros inválidos para {model} (use {', '.join(sorted(valid_params))})")
+                continue
+            # Mesmos tipos e limites das chaves OPENAI_<KIND>_* correspondentes
+            for name, value in params.items():
+                setting = f"openai_{name}"
+                if name.endswith("max_tokens"):
+                    valid = isinstance(value, int) and not isinstance(value, bool) and value >= MINIMUMS[setting]
+                else:
+                    low, high = RANGES[setting]
+                    valid = isinstance(value, (int, float)) and not isinstance(value, bool) and low <= value <= high
+                if not valid:
+                    errors.append(f"OPENAI_MODEL_PARAMS: {name}={value!r} inválido para {model}")
+        if errors:
+            raise SettingsError("Configuração inválida:\n  " + "\n  ".join(errors))
+    
+    def completion_params(self, kind: str) -> dict:
+        """max_tokens e temperature de um tipo de chamada ("classify", "reply" ou "combined")
+        
+        O ajuste de OPENAI_MODEL_PARAMS cujo nome é o prefixo mais longo do
+        modelo configurado tem precedência sobre os valores gerais.
+        """
+        params = {
+            "max_tokens": getattr(self, f"openai_{kind}_max_tokens"),
+            "temperature": getattr(self, f"openai_{kind}_temperature")
+        }
+        matches = [name for name in self.openai_model_params if self.openai_model.startswith(name)]
+        if matches:
+            overrides = self.openai_model_params[max(matches, key=len)]
+            for param in params:
+                params[param] = overrides.get(f"{kind}_{param}", params[param])
+        return params
+    
+    def reload(self) -> dict:
+        """Relê ambiente e SETTINGS_FILE e aplica neste objeto o que pode mudar em execução
+        
+        Se a nova configuração for inválida, nada muda e o SettingsError é
+        propagado. Chaves de RESTART_REQUIRED alteradas não são aplicadas:
+        aparecem em "restart_required" até os workers serem reiniciados.
+        
+        Returns:
+            {"changed": [...], "restart_required": [...]}, com os nomes das chaves
+        """
+        fresh = Settings()
+        changed, restart_required = [], []
+        for name, value in vars(fresh).items():
+            if getattr(self, name, None) == value:
+                continue
+            if name in RESTART_REQUIRED:
+                restart_required.append(name)
+            else:
+                setattr(self, name, value)
+                changed.append(name)
+        return {"changed": sorted(changed), "restart_required": sorted(restart_required)}
+    
+    def public_view(self) -> dict:
+        """Valores efetivos, sem os segredos"""
+        return {
+            name: ("***" if value and name in ("openai_api_key", "admin_token") else value)
+            for name, value in vars(self).items()
+        }
 
 
 # Instância global das configurações
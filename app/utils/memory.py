@@ -0,0 +1,39 @@
+"""
+Pico de memória (RSS) do processo atual
+"""
+
+from typing import Optional
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem getrusage
+    resource = None
+
+
+def reset_peak_rss() -> bool:
+    """Zera o pico de RSS do processo (Linux); retorna False se não for suportado"""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Pico de RSS do processo desde o início ou desde o último reset_peak_rss()
+
+    None quando não há como medir (sem /proc nem o módulo resource).
+    """
+    try:
+        with open("/proc/self/status") as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # Sem /proc: pico desde o início do processo (em KB no Linux)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
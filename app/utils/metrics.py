@@ -0,0 +1,393 @@
+"""
+Métricas no formato de exposição do Prometheus
+
+Cada worker mantém os próprios contadores em memória. O registro é feito no
+event loop sem locks: incrementar um contador é uma soma em um dicionário e
+observar um histograma é uma busca binária nos limites dos buckets.
+
+Com vários workers, cada um grava periodicamente um snapshot em um diretório
+compartilhado e o /metrics soma os snapshots de todos: contadores e
+histogramas são somados, gauges saem por worker (label "pid").
+"""
+
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Limites (em segundos) pensados para etapas de milissegundos a chamadas de LLM
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Contador monotônico com labels"""
+    
+    type_name = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Incrementa o contador para os valores de label informados"""
+        self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+    
+    def state(self) -> list:
+        """Valores atuais, serializáveis em JSON"""
+        return [[list(labels), value] for labels, value in self._values.items()]
+    
+    def samples(self, values: Optional[dict] = None) -> List[Tuple[str, str, float]]:
+        values = self._values if values is None else values
+        return [
+            (self.name, _format_labels(self.labelnames, labels), value)
+            for labels, value in sorted(values.items())
+        ]
+    
+    def merged_samples(self, states: Dict[int, list]) -> List[Tuple[str, str, float]]:
+        """Soma os estados de todos os workers"""
+        merged: dict = {}
+        for state in states.values():
+            for labels, value in state:
+                labels = tuple(labels)
+                merged[labels] = merged.get(labels, 0) + value
+        return self.samples(merged)
+
+
+class _Timer:
+    """Context manager que observa a duração do bloco em um histograma"""
+    
+    __slots__ = ("_histogram", "_labels", "_start")
+    
+    def __init__(self, histogram: "Histogram", labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+        return False
+
+
+class Histogram:
+    """Histograma com buckets fixos e labels"""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (não cumulativa, último = +Inf), soma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, *labels: str) -> None:
+        """Registra uma observação"""
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+    
+    def time(self, *labels: str) -> _Timer:
+        """Mede a duração de um bloco: `with histogram.time("etapa"): ...`"""
+        return _Timer(self, labels)
+    
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+    
+    def state(self) -> list:
+        """Valores atuais, serializáveis em JSON"""
+        return [[list(labels), entry] for labels, entry in self._values.items()]
+    
+    def samples(self, values: Optional[dict] = None) -> List[Tuple[str, str, float]]:
+        values = self._values if values is None else values
+        samples = []
+        for labels, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append((f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative))
+            label_text = _format_labels(self.labelnames, labels)
+            samples.append((f"{self.name}_sum", label_text, total))
+            samples.append((f"{self.name}_count", label_text, cumulative))
+        return samples
+    
+    def merged_samples(self, states: Dict[int, list]) -> List[Tuple[str, str, float]]:
+        """Soma bucket a bucket os estados de todos os workers"""
+        merged: dict = {}
+        for state in states.values():
+            for labels, (counts, total) in state:
+                labels = tuple(labels)
+                entry = merged.get(labels)
+                if entry is None or len(entry[0]) != len(counts):
+                    merged[labels] = [list(counts), total]
+                    continue
+                entry[0] = [current + count for current, count in zip(entry[0], counts)]
+                entry[1] += total
+        return self.samples(merged)
+
+
+class CallbackMetric:
+    """Métrica cujo valor é lido de uma função no momento da coleta"""
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type_name: str,
+        callback: Callable[[], float]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.type_name = type_name
+        self.callback = callback
+    
+    def state(self) -> float:
+        return self.callback()
+    
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [(self.name, "", self.callback())]
+    
+    def merged_samples(self, states: Dict[int, float]) -> List[Tuple[str, str, float]]:
+        """Contadores são somados; gauges saem por worker, só dos que ainda estão vivos"""
+        if self.type_name == "counter":
+            return [(self.name, "", sum(states.values()))]
+        return [
+            (self.name, _format_labels(("pid",), (str(pid),)), value)
+            for pid, value in sorted(states.items())
+            if _pid_alive(pid)
+        ]
+
+
+class MetricsRegistry:
+    """Conjunto de métricas de um worker"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        # Diretório dos snapshots compartilhados entre workers (None = só este worker)
+        self.shared_dir: Optional[str] = None
+    
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica já registrada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def register_callback(self, name: str, documentation: str, type_name: str, callback: Callable[[], float]) -> None:
+        """Registra (ou substitui) uma métrica calculada na coleta"""
+        self._metrics[name] = CallbackMetric(name, documentation, type_name, callback)
+    
+    def unregister(self, name: str) -> None:
+        """Remove uma métrica (por exemplo, callbacks cujo recurso foi fechado)"""
+        self._metrics.pop(name, None)
+    
+    def enable_shared(self, directory: str) -> None:
+        """Passa a agregar as métricas de todos os workers que gravam em `directory`
+        
+        Os snapshots levam o PID do processo pai (o gerenciador do uvicorn) no
+        nome; os de gerenciadores que já terminaram, de execuções anteriores,
+        são removidos.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            parent = name.split("-", 1)[0]
+            if parent.isdigit() and not _pid_alive(int(parent)):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except OSError:
+                    pass
+        self.shared_dir = directory
+    
+    def write_snapshot(self) -> None:
+        """Grava o estado deste worker no diretório compartilhado (troca atômica do arquivo)"""
+        if self.shared_dir is None:
+            return
+        state = {name: metric.state() for name, metric in self._metrics.items()}
+        path = os.path.join(self.shared_dir, f"{os.getppid()}-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as snapshot_file:
+            json.dump(state, snapshot_file)
+        os.replace(path + ".tmp", path)
+    
+    def _read_snapshots(self) -> Dict[int, dict]:
+        """Snapshots dos workers do mesmo gerenciador, por PID"""
+        prefix = f"{os.getppid()}-"
+        snapshots = {}
+        for name in os.listdir(self.shared_dir):
+            if not (name.startswith(prefix) and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(self.shared_dir, name)) as snapshot_file:
+                    snapshots[int(name[len(prefix):-len(".json")])] = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+        return snapshots
+    
+    def render(self) -> str:
+        """Gera o texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        snapshots = None
+        if self.shared_dir is not None:
+            self.write_snapshot()
+            snapshots = self._read_snapshots()
+        
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            if snapshots is None:
+                samples = metric.samples()
+            else:
+                samples = metric.merged_samples({
+                    pid: snapshot[metric.name] for pid, snapshot in snapshots.items() if metric.name in snapshot
+                })
+            for name, labels, value in samples:
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+metrics = MetricsRegistry()
+
+STAGE_DURATION = metrics.histogram(
+    "autou_stage_duration_seconds",
+    "Duração de cada etapa do processamento de um email",
+    ["stage"]
+)
+HTTP_REQUEST_DURATION = metrics.histogram(
+    "autou_http_request_duration_seconds",
+    "Duração das requisições HTTP por rota",
+    ["method", "route", "status"]
+)
+CLASSIFICATIONS = metrics.counter(
+    "autou_classifications_total",
+    "Emails classificados por categoria e tier que decidiu",
+    ["category", "tier"]
+)
+FALLBACKS = metrics.counter(
+    "autou_fallbacks_total",
+    "Degradações por erro do OpenAI (classificação por palavras-chave ou resposta template)",
+    ["to"]
+)
+OPENAI_ERRORS = metrics.counter(
+    "autou_openai_errors_total",
+    "Chamadas ao OpenAI que falharam, por tipo de erro",
+    ["error"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "autou_cache_requests_total",
+    "Consultas ao cache de resultados",
+    ["result"]
+)
+OPENAI_RETRIES = metrics.counter(
+    "autou_openai_retries_total",
+    "Novas tentativas de chamadas ao OpenAI, por motivo",
+    ["reason"]
+)
+OPENAI_RATE_LIMIT_WAIT = metrics.histogram(
+    "autou_openai_rate_limit_wait_seconds",
+    "Espera imposta pelo limite local de RPM/TPM antes de chamar o OpenAI"
+)
+CIRCUIT_REJECTIONS = metrics.counter(
+    "autou_circuit_breaker_rejections_total",
+    "Chamadas ao OpenAI recusadas com o circuito aberto"
+)
+EMAIL_TRUNCATIONS = metrics.counter(
+    "autou_email_truncations_total",
+    "Emails reduzidos para caber no orçamento de tokens do prompt",
+    ["kind"]
+)
+PDF_EXTRACTION_SECONDS = metrics.histogram(
+    "autou_pdf_extraction_seconds",
+    "Tempo de extração de texto por PDF"
+)
+PDF_PAGES_READ = metrics.histogram(
+    "autou_pdf_pages_read",
+    "Páginas com texto lidas por PDF",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+)
+PDF_PEAK_RSS = metrics.histogram(
+    "autou_pdf_peak_rss_bytes",
+    "Pico de RSS do processo de extração durante cada PDF",
+    buckets=tuple(2 ** power * 1024 * 1024 for power in range(5, 12))
+)
+PDF_EARLY_STOPS = metrics.counter(
+    "autou_pdf_early_stops_total",
+    "PDFs cuja leitura parou no limite de caracteres ou páginas"
+)
+JOB_WAIT = metrics.histogram(
+    "autou_job_wait_seconds",
+    "Tempo dos jobs na fila até o início da execução",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+JOBS_FINISHED = metrics.counter(
+    "autou_jobs_finished_total",
+    "Jobs concluídos, por status final",
+    ["status"]
+)
+AUDIT_RECORDS = metrics.counter(
+    "autou_audit_records_total",
+    "Registros do log de auditoria, gravados ou descartados (buffer cheio ou erro de gravação)",
+    ["status"]
+)
+SETTINGS_RELOADS = metrics.counter(
+    "autou_settings_reloads_total",
+    "Recarregamentos das configurações, aplicados ou rejeitados por valores inválidos",
+    ["status"]
+)
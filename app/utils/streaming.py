@@ -0,0 +1,27 @@
+"""
+Respostas em streaming
+"""
+
+from fastapi.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse para endpoints que leem o corpo da requisição enquanto respondem
+    
+    O StreamingResponse padrão escuta http.disconnect chamando receive() em
+    paralelo ao envio, o que consome os blocos do corpo que o gerador ainda
+    não leu. Aqui apenas o gerador chama receive(); uma desconexão do cliente
+    aparece como erro no send.
+    """
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        
+        if self.background is not None:
+            await self.background()
+
+
+def sse_event(event: str, data: str) -> str:
+    """Formata um evento Server-Sent Events; `data` precisa estar em uma linha (ex.: JSON)"""
+    return f"event: {event}\ndata: {data}\n\n"
@@ -0,0 +1,3 @@
+"""
+Benchmarks e testes de carga da aplicação
+"""
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark da classificação por palavras-chave
+
+Compara a implementação antiga (uma varredura com "in" por palavra-chave)
+com o KeywordMatcher compilado em emails de 1KB a 1MB, com o conjunto de
+palavras-chave padrão e com um conjunto 10x maior.
+
+Uso:
+    python -m benchmarks.benchmark_keywords
+"""
+
+import argparse
+import time
+
+from app.services.keyword_matcher import KeywordMatcher
+from app.utils.config import settings
+
+
+LEGACY_PRODUTIVO = [
+    "problema", "erro", "bug", "não funciona", "ajuda", "suporte",
+    "solicitação", "pedido", "reclamação", "dúvida", "questão",
+    "atualização", "status", "andamento", "prazo", "urgente"
+]
+
+LEGACY_IMPRODUTIVO = [
+    "feliz natal", "feliz ano novo", "parabéns", "obrigado",
+    "agradecimento", "spam", "promoção", "oferta"
+]
+
+SAMPLE = (
+    "Olá equipe, segue em anexo o relatório mensal com os números consolidados. "
+    "Na reunião de quinta-feira vamos revisar as metas do próximo trimestre. "
+    "Estou com um problema no sistema desde ontem, aparece uma mensagem de erro. "
+    "Poderiam verificar o status da minha solicitação? Obrigado! "
+)
+
+
+def legacy_classify(text: str, produtivo: list, improdutivo: list) -> bool:
+    text_lower = text.lower()
+    produtivo_count = sum(1 for keyword in produtivo if keyword in text_lower)
+    improdutivo_count = sum(1 for keyword in improdutivo if keyword in text_lower)
+    return produtivo_count > improdutivo_count
+
+
+def _expanded_keywords(factor: int) -> tuple:
+    """Palavras-chave sintéticas para ver como cada abordagem escala com o vocabulário"""
+    produtivo = LEGACY_PRODUTIVO + [f"{word}{i}" for i in range(factor - 1) for word in LEGACY_PRODUTIVO]
+    improdutivo = LEGACY_IMPRODUTIVO + [f"{word}{i}" for i in range(factor - 1) for word in LEGACY_IMPRODUTIVO]
+    return produtivo, improdutivo
+
+
+def _measure(func, text: str, min_time: float) -> float:
+    """Retorna o tempo médio por chamada"""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        func(text)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das palavras-chave")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Tempo mínimo por medição (s)")
+    args = parser.parse_args()
+
+    for factor in (1, 10):
+        if factor == 1:
+            matcher = KeywordMatcher.from_file(settings.keywords_file)
+            produtivo, improdutivo = LEGACY_PRODUTIVO, LEGACY_IMPRODUTIVO
+        else:
+            produtivo, improdutivo = _expanded_keywords(factor)
+            matcher = KeywordMatcher({
+                "produtivo": {keyword: 1.0 for keyword in produtivo},
+                "improdutivo": {keyword: 1.0 for keyword in improdutivo}
+            })
+
+        print(f"\n🔑 {len(produtivo) + len(improdutivo)} palavras-chave")
+        print(f"{'tamanho':>10} | {'antigo (MB/s)':>14} | {'compilado (MB/s)':>17}")
+        for size in (1024, 10 * 1024, 100 * 1024, 1024 * 1024):
+            text = (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+            megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+            legacy = _measure(lambda t: legacy_classify(t, produtivo, improdutivo), text, args.min_time)
+            compiled = _measure(matcher.match, text, args.min_time)
+            print(f"{size // 1024:>8}KB | {megabytes / legacy:>14.1f} | {megabytes / compiled:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Escalabilidade da API com o número de workers do uvicorn
+
+Sobe a API com 1, 2, 4... workers no caminho sem OpenAI (palavras-chave ou
+modelo local), espera todos ficarem prontos e mede a vazão de
+/classify-text com vários processos geradores de carga. Sem cache, para que
+cada requisição pague a normalização e a classificação.
+
+Uso:
+    python -m benchmarks.benchmark_workers --workers 1 2 4 --duration 10
+    python -m benchmarks.benchmark_workers --local-model models/local
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .stats import summarize
+
+
+SAMPLE = (
+    "Olá equipe, estou com um problema no sistema e preciso de ajuda com o acesso. "
+    "Poderiam verificar o status da minha solicitação? O erro aparece desde ontem. "
+)
+
+
+def _client_process(api_url: str, duration: float, concurrency: int, text_size: int, queue) -> None:
+    """Gera carga por `duration` segundos e devolve (requisições, erros, latências)"""
+    async def run():
+        text = (SAMPLE * (text_size // len(SAMPLE) + 1))[:text_size]
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            async def loop(worker: int):
+                nonlocal errors
+                index = 0
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    # Sufixo único: o coalescing e o cache não podem reaproveitar resultados
+                    response = await client.post(
+                        f"{api_url}/classify-text", data={"text": f"{text} #{os.getpid()}-{worker}-{index}"}
+                    )
+                    if response.status_code == 200:
+                        latencies.append(time.perf_counter() - start)
+                    else:
+                        errors += 1
+                    index += 1
+            await asyncio.gather(*(loop(worker) for worker in range(concurrency)))
+        return latencies, errors
+
+    queue.put(asyncio.run(run()))
+
+
+def _wait_ready(api_url: str, timeout: float = 60) -> None:
+    """Espera o /ready responder 200 várias vezes seguidas (as conexões caem em workers diferentes)"""
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        try:
+            with httpx.Client(timeout=2) as client:
+                streak = streak + 1 if client.get(f"{api_url}/ready").status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        if streak >= 20:
+            return
+        time.sleep(0.05)
+    raise RuntimeError("A API não ficou pronta a tempo")
+
+
+def run_workers(workers: int, args) -> dict:
+    api_url = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "",
+        "CACHE_ENABLED": "false",
+        "EXTRACTION_WORKERS": "0",
+        "SHARED_STATE_DIR": tempfile.mkdtemp(prefix="autou-bench-"),
+        "LOCAL_MODEL_MODE": "primary" if args.local_model else "off",
+        "LOCAL_MODEL_PATH": args.local_model or ""
+    })
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(api_url)
+        queue = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(
+                target=_client_process,
+                args=(api_url, args.duration, args.concurrency, args.text_size, queue)
+            )
+            for _ in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        results = [queue.get() for _ in clients]
+        for client in clients:
+            client.join()
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    errors = sum(client_errors for _, client_errors in results)
+    return {"workers": workers, **summarize(latencies, args.duration, errors)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão da API por número de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de carga por rodada")
+    parser.add_argument("--clients", type=int, default=max(os.cpu_count() or 1, 2), help="Processos geradores de carga")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas por processo")
+    parser.add_argument("--text-size", type=int, default=20000, help="Tamanho de cada email, em caracteres")
+    parser.add_argument("--local-model", help="Diretório do modelo local (LOCAL_MODEL_MODE=primary)")
+    parser.add_argument("--port", type=int, default=8077)
+    args = parser.parse_args()
+
+    print(f"🖥️  {os.cpu_count()} CPUs | {args.clients} processos de carga x {args.concurrency} conexões")
+    baseline = None
+    for workers in args.workers:
+        result = run_workers(workers, args)
+        baseline = baseline or result["rps"]
+        print(f"  {workers:>2} worker(s): {result['rps']:8.1f} req/s "
+              f"({result['rps'] / baseline:.2f}x) | p50 {result['p50'] * 1000:.1f}ms | "
+              f"p95 {result['p95'] * 1000:.1f}ms | p99 {result['p99'] * 1000:.1f}ms | erros {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
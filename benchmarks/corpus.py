@@ -0,0 +1,113 @@
+"""
+Corpora sintéticos e determinísticos para os benchmarks
+
+Todos os geradores recebem uma semente: a mesma semente produz os mesmos
+emails, então duas rodadas do benchmark medem exatamente a mesma carga.
+"""
+
+import random
+from typing import List
+
+
+PRODUTIVO_SENTENCES = [
+    "Estou com um problema no sistema desde ontem e aparece uma mensagem de erro.",
+    "Poderiam verificar o status da minha solicitação?",
+    "Preciso de ajuda para acessar minha conta, a senha não funciona.",
+    "Gostaria de saber o andamento do pedido e o prazo de entrega.",
+    "O relatório mensal não está sendo gerado, é urgente.",
+    "Tenho uma dúvida sobre a atualização do contrato.",
+]
+
+IMPRODUTIVO_SENTENCES = [
+    "Feliz Natal a toda a equipe!",
+    "Parabéns pelo excelente trabalho neste trimestre.",
+    "Muito obrigado pela atenção de sempre.",
+    "Desejo um ótimo fim de semana a todos.",
+]
+
+FILLER_SENTENCES = [
+    "Segue em anexo o documento mencionado na reunião de quinta-feira.",
+    "Na próxima semana vamos revisar as metas com a diretoria.",
+    "Os números consolidados estão na planilha compartilhada.",
+    "Fico à disposição para qualquer esclarecimento.",
+]
+
+
+def _email(rng: random.Random, sentences: int) -> str:
+    pool = PRODUTIVO_SENTENCES if rng.random() < 0.7 else IMPRODUTIVO_SENTENCES
+    body = [rng.choice(pool)] + [rng.choice(FILLER_SENTENCES + pool) for _ in range(sentences - 1)]
+    return "Olá equipe, " + " ".join(body)
+
+
+def short_texts(count: int, seed: int = 0) -> List[str]:
+    """Emails curtos (2 a 5 frases), cada um com um sufixo único para não bater no cache"""
+    rng = random.Random(seed)
+    return [f"{_email(rng, rng.randint(2, 5))} (ref {seed}-{index})" for index in range(count)]
+
+
+def long_text(size: int, seed: int = 0) -> str:
+    """Um email longo com cerca de `size` caracteres (várias quebras de linha, como um TXT real)"""
+    rng = random.Random(seed)
+    lines = []
+    total = 0
+    while total < size:
+        line = _email(rng, 4)
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def long_txt_files(count: int, size: int, seed: int = 0) -> List[bytes]:
+    """Arquivos TXT (UTF-8) de `size` caracteres, distintos entre si"""
+    return [f"{long_text(size, seed + index)}\n(ref {seed}-{index})".encode("utf-8") for index in range(count)]
+
+
+def _pdf_string(text: str) -> str:
+    """Texto como string literal de PDF (só ASCII, com parênteses e barras escapados)"""
+    ascii_text = text.encode("ascii", "ignore").decode("ascii")
+    return ascii_text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """PDF mínimo com `pages` páginas de texto (Helvetica), sem dependências externas"""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(pages))}] /Count {pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for page in range(pages):
+        lines = "".join(
+            f"({_pdf_string(rng.choice(PRODUTIVO_SENTENCES + FILLER_SENTENCES))}) Tj 0 -14 Td "
+            for _ in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 40 800 Td (Pagina {page} ref {seed}) Tj 0 -14 Td {lines}ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * page} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def pdf_files(count: int, pages: int, seed: int = 0) -> List[bytes]:
+    """PDFs de `pages` páginas, distintos entre si"""
+    return [make_pdf(pages, seed=seed + index) for index in range(count)]
+
+
+def duplicate_heavy(count: int, unique_ratio: float = 0.1, seed: int = 0) -> List[str]:
+    """Emails curtos em que só `unique_ratio` são distintos (exercita cache e coalescing)"""
+    rng = random.Random(seed)
+    unique = short_texts(max(int(count * unique_ratio), 1), seed)
+    return [rng.choice(unique) for _ in range(count)]
@@ -0,0 +1,89 @@
+"""
+Teste de carga da API contra o servidor OpenAI falso
+
+Dispara requisições concorrentes em /classify-text enquanto mede a
+latência do /health, e ao final consulta o servidor falso para saber
+quantas chamadas ficaram em voo ao mesmo tempo.
+
+Uso:
+    python -m benchmarks.mock_openai_server --latency 0.5
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:9000/v1 python main.py
+    python -m benchmarks.load_test --requests 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from .stats import format_summary, summarize
+
+
+SAMPLE_EMAILS = [
+    "Preciso de ajuda com minha conta. Não consigo fazer login.",
+    "Feliz Natal! Desejo um ótimo fim de ano para toda a equipe.",
+    "Gostaria de saber o status do meu pedido número 12345."
+]
+
+
+async def _classify(client: httpx.AsyncClient, api_url: str, index: int, latencies: list) -> None:
+    text = f"{SAMPLE_EMAILS[index % len(SAMPLE_EMAILS)]} (#{index})"
+    start = time.perf_counter()
+    response = await client.post(f"{api_url}/classify-text", data={"text": text})
+    response.raise_for_status()
+    latencies.append(time.perf_counter() - start)
+
+
+async def _probe_health(client: httpx.AsyncClient, api_url: str, stop: asyncio.Event, latencies: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(f"{api_url}/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+
+
+async def run(api_url: str, mock_url: str, total: int, concurrency: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency + 5)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        await client.post(f"{mock_url}/reset")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        classify_latencies: list = []
+        health_latencies: list = []
+        stop = asyncio.Event()
+
+        async def bounded(i: int) -> None:
+            async with semaphore:
+                await _classify(client, api_url, i, classify_latencies)
+
+        health_task = asyncio.create_task(_probe_health(client, api_url, stop, health_latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await health_task
+
+        stats = (await client.get(f"{mock_url}/stats")).json()
+
+    summary = summarize(classify_latencies, elapsed)
+    print(f"📊 {total} requisições em {elapsed:.2f}s")
+    print(f"   {format_summary(summary)} | max {summary['max']:.3f}s")
+    if health_latencies:
+        print(f"🔍 /health durante a carga: max {max(health_latencies) * 1000:.1f}ms")
+    print(f"🚀 Máximo de chamadas OpenAI em voo: {stats['max_in_flight']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga da API de classificação")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mock-url", default="http://127.0.0.1:9000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.api_url, args.mock_url, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
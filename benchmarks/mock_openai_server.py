@@ -0,0 +1,201 @@
+"""
+Servidor falso compatível com a API de chat do OpenAI
+
+Responde em /v1/chat/completions com latência configurável (fixa ou com
+variação aleatória, para gerar cauda) e registra quantas requisições
+ficaram em voo ao mesmo tempo (GET /stats). Também
+injeta falhas (429, 5xx) em uma fração das chamadas, configurável na linha
+de comando ou em tempo de execução via POST /faults. Com "stream": true, a
+resposta sai em chunks SSE, palavra a palavra (--token-delay entre elas).
+
+Uso:
+    python -m benchmarks.mock_openai_server --port 9000 --latency 0.5
+    python -m benchmarks.mock_openai_server --error-rate 0.3 --error-status 429 --retry-after 1
+    curl -X POST localhost:9000/faults -H 'Content-Type: application/json' -d '{"error_rate": 1, "error_status": 503}'
+
+E na API:
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://127.0.0.1:9000/v1 python main.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+
+class MockState:
+    """Estado compartilhado do servidor falso"""
+
+    def __init__(self, latency: float = 0.5):
+        self.latency = latency
+        # Variação uniforme somada à latência (0 = latência fixa)
+        self.latency_jitter = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_requests = 0
+        self.failed_requests = 0
+        # Injeção de falhas
+        self.error_rate = 0.0
+        self.error_status = 429
+        self.retry_after = 0.0
+        # Intervalo entre os chunks das respostas em streaming
+        self.token_delay = 0.02
+
+    def reset(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_requests = 0
+        self.failed_requests = 0
+
+    def next_latency(self) -> float:
+        return self.latency + (random.uniform(0, self.latency_jitter) if self.latency_jitter > 0 else 0.0)
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+state = MockState()
+app = FastAPI(title="Mock OpenAI")
+
+
+def _completion_content(body: dict) -> str:
+    """Gera um conteúdo plausível para o prompt recebido"""
+    messages = body.get("messages", [])
+    prompt = messages[-1]["content"] if messages else ""
+    lowered = prompt.lower()
+    category = "produtivo"
+    if "feliz" in lowered or "parabéns" in lowered or "obrigado" in lowered:
+        category = "improdutivo"
+    reply = "Obrigado pelo contato. Nossa equipe retornará em breve."
+
+    if body.get("response_format", {}).get("type") == "json_object":
+        return json.dumps({"category": category, "response": reply}, ensure_ascii=False)
+    if "Responda APENAS" in prompt:
+        return category
+    return reply
+
+
+async def _stream_chunks(body: dict):
+    """Chunks chat.completion.chunk: a latência vale até o primeiro, depois token_delay entre eles"""
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    words = _completion_content(body).split(" ")
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        await asyncio.sleep(state.next_latency())
+        for index, word in enumerate(words):
+            if index:
+                await asyncio.sleep(state.token_delay)
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": word if index == 0 else " " + word},
+                    "finish_reason": None
+                }]
+            }
+            yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+        yield "data: [DONE]\n\n"
+    finally:
+        state.in_flight -= 1
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    state.total_requests += 1
+    if state.should_fail():
+        state.failed_requests += 1
+        headers = {"retry-after": f"{state.retry_after:g}"} if state.retry_after else {}
+        return JSONResponse(
+            status_code=state.error_status,
+            headers=headers,
+            content={"error": {
+                "message": f"Falha injetada ({state.error_status})",
+                "type": "rate_limit_error" if state.error_status == 429 else "server_error",
+                "code": None
+            }}
+        )
+    if body.get("stream"):
+        return StreamingResponse(_stream_chunks(body), media_type="text/event-stream")
+
+    state.in_flight += 1
+    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+    try:
+        await asyncio.sleep(state.next_latency())
+    finally:
+        state.in_flight -= 1
+
+    content = _completion_content(body)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "in_flight": state.in_flight,
+        "max_in_flight": state.max_in_flight,
+        "total_requests": state.total_requests,
+        "failed_requests": state.failed_requests
+    }
+
+
+@app.post("/faults")
+async def faults(request: Request):
+    """Altera a injeção de falhas: {"error_rate": 0..1, "error_status": 429, "retry_after": 0}"""
+    body = await request.json()
+    state.error_rate = float(body.get("error_rate", state.error_rate))
+    state.error_status = int(body.get("error_status", state.error_status))
+    state.retry_after = float(body.get("retry_after", state.retry_after))
+    return {"error_rate": state.error_rate, "error_status": state.error_status, "retry_after": state.retry_after}
+
+
+@app.post("/reset")
+async def reset():
+    state.reset()
+    return {"status": "ok"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor OpenAI falso para testes de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="Latência por completion (s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Variação aleatória somada à latência (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração das chamadas que falham (0 a 1)")
+    parser.add_argument("--error-status", type=int, default=429, help="Status HTTP das falhas injetadas")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Cabeçalho Retry-After das falhas (s)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Intervalo entre chunks em streaming (s)")
+    args = parser.parse_args()
+
+    state.latency = args.latency
+    state.latency_jitter = args.latency_jitter
+    state.error_rate = args.error_rate
+    state.error_status = args.error_status
+    state.retry_after = args.retry_after
+    state.token_delay = args.token_delay
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Resumo das latências medidas pelos benchmarks (percentis e vazão)
+"""
+
+from typing import Iterable, Optional
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Percentil (0 a 1) por vizinho mais próximo; a lista já deve estar ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * fraction), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: Iterable[float], elapsed: Optional[float] = None, errors: int = 0) -> dict:
+    """p50/p95/p99, média e máximo (em segundos) e, com `elapsed`, a vazão das chamadas bem-sucedidas"""
+    values = sorted(latencies)
+    summary = {
+        "requests": len(values),
+        "errors": errors,
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else 0.0
+    }
+    if elapsed is not None:
+        summary["elapsed"] = elapsed
+        summary["rps"] = len(values) / elapsed if elapsed > 0 else 0.0
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    """Uma linha com vazão e percentis em milissegundos"""
+    line = (f"p50 {summary['p50'] * 1000:8.2f}ms | p95 {summary['p95'] * 1000:8.2f}ms | "
+            f"p99 {summary['p99'] * 1000:8.2f}ms")
+    if "rps" in summary:
+        line = f"{summary['rps']:8.1f} req/s | " + line
+    if summary.get("errors"):
+        line += f" | erros {summary['errors']}"
+    return line
@@ -0,0 +1,296 @@
+"""
+Suíte de benchmarks reproduzível: carga por endpoint e micro-benchmarks
+
+No modo de carga, cada cenário dispara um corpus determinístico (veja
+benchmarks.corpus) contra um endpoint com concorrência fixa e mede
+p50/p95/p99 e req/s. Com --spawn, a suíte sobe o servidor OpenAI falso e a
+API sozinha, com estado isolado em um diretório temporário, então duas
+rodadas na mesma máquina são comparáveis. No modo --micro, mede em processo
+o FileProcessor e a classificação por palavras-chave, sem HTTP.
+
+Os resultados podem ser gravados em JSON (--output) e comparados com uma
+rodada anterior (--compare).
+
+Uso:
+    python -m benchmarks.suite --spawn --output results/base.json
+    python -m benchmarks.suite --spawn --latency 0.2 --error-rate 0.1 --compare results/base.json
+    python -m benchmarks.suite --api-url http://127.0.0.1:8000 --mock-url http://127.0.0.1:9000
+    python -m benchmarks.suite --micro --output results/micro.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from . import corpus
+from .stats import format_summary, summarize
+
+
+# Cenário -> (endpoint, gerador dos argumentos de cada requisição a partir de (quantidade, semente))
+SCENARIOS: Dict[str, tuple] = {
+    "short_text": (
+        "/classify-text",
+        lambda count, seed: [{"data": {"text": text}} for text in corpus.short_texts(count, seed)]
+    ),
+    "short_text_no_reply": (
+        "/classify-text?include_reply=false",
+        lambda count, seed: [{"data": {"text": text}} for text in corpus.short_texts(count, seed)]
+    ),
+    "long_txt": (
+        "/classify-email",
+        lambda count, seed: [
+            {"files": {"file": (f"email_{index}.txt", content, "text/plain")}}
+            for index, content in enumerate(corpus.long_txt_files(count, 200_000, seed))
+        ]
+    ),
+    "pdf": (
+        "/classify-email",
+        lambda count, seed: [
+            {"files": {"file": (f"email_{index}.pdf", content, "application/pdf")}}
+            for index, content in enumerate(corpus.pdf_files(count, 30, seed))
+        ]
+    ),
+    "duplicates": (
+        "/classify-text",
+        lambda count, seed: [{"data": {"text": text}} for text in corpus.duplicate_heavy(count, 0.1, seed)]
+    ),
+}
+
+
+async def _run_scenario(client: httpx.AsyncClient, api_url: str, endpoint: str,
+                        requests: List[dict], concurrency: int) -> dict:
+    """Dispara as requisições com no máximo `concurrency` em voo e resume as latências"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list = []
+    errors = 0
+
+    async def send(request: dict) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(f"{api_url}{endpoint}", **request)
+            except httpx.HTTPError:
+                errors += 1
+                return
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(send(request) for request in requests))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run_load(args) -> dict:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(timeout=300, limits=limits) as client:
+        # Aquecimento fora da medição (conexões, imports preguiçosos, caches de regex)
+        warm_up = SCENARIOS["short_text"][1](args.warmup, args.seed + 10_000)
+        await _run_scenario(client, args.api_url, "/classify-text", warm_up, args.concurrency)
+
+        for index, name in enumerate(args.scenarios):
+            endpoint, build = SCENARIOS[name]
+            # Semente própria por cenário: nenhum cenário reaproveita o cache de outro
+            requests = build(args.requests, args.seed + index * 1000)
+            if args.mock_url:
+                await client.post(f"{args.mock_url}/reset")
+            summary = await _run_scenario(client, args.api_url, endpoint, requests, args.concurrency)
+            summary["endpoint"] = endpoint
+            if args.mock_url:
+                mock_stats = (await client.get(f"{args.mock_url}/stats")).json()
+                summary["openai_calls"] = mock_stats["total_requests"]
+                summary["openai_failures"] = mock_stats["failed_requests"]
+                summary["openai_max_in_flight"] = mock_stats["max_in_flight"]
+            results[name] = summary
+            print(f"  {name:<20} {format_summary(summary)}")
+    return results
+
+
+def _measure(func: Callable, payload, min_time: float) -> dict:
+    """Chama `func(payload)` repetidamente por `min_time` segundos, medindo cada chamada"""
+    latencies = []
+    start = time.perf_counter()
+    while True:
+        call_start = time.perf_counter()
+        func(payload)
+        latencies.append(time.perf_counter() - call_start)
+        if call_start - start >= min_time:
+            break
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def run_micro(args) -> dict:
+    """FileProcessor e _classify_by_keywords em processo, sem HTTP nem OpenAI"""
+    from app.services.email_classifier import EmailClassifier
+    from app.services.file_processor import FileProcessor
+
+    classifier = EmailClassifier()
+    txt = corpus.long_txt_files(1, 200_000, args.seed)[0]
+    pdf = corpus.make_pdf(30, seed=args.seed)
+    short = corpus.short_texts(1, args.seed)[0]
+    long = corpus.long_text(100_000, args.seed)
+
+    cases = {
+        "file_processor.txt_200k": (lambda content: FileProcessor.process_file_content(content, "email.txt"), txt),
+        "file_processor.txt_200k_cp1252": (
+            lambda content: FileProcessor.process_file_content(content, "email.txt"),
+            txt.decode("utf-8").encode("cp1252", "replace")
+        ),
+        "file_processor.pdf_30p": (lambda content: FileProcessor.process_file_content(content, "email.pdf"), pdf),
+        "clean_text.100k": (FileProcessor.clean_text, long),
+        "keywords.short": (classifier._classify_by_keywords, short),
+        "keywords.100k": (classifier._classify_by_keywords, long),
+    }
+    results = {}
+    for name, (func, payload) in cases.items():
+        summary = _measure(func, payload, args.min_time)
+        results[name] = summary
+        print(f"  {name:<32} {summary['rps']:10.1f} op/s | p50 {summary['p50'] * 1000:8.3f}ms | "
+              f"p99 {summary['p99'] * 1000:8.3f}ms")
+    return results
+
+
+def _wait_ready(api_url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{api_url}/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("A API não ficou pronta a tempo")
+
+
+def _spawn(args) -> list:
+    """Sobe o servidor falso e a API com estado isolado; retorna os processos"""
+    mock_port = 9100
+    args.mock_url = f"http://127.0.0.1:{mock_port}"
+    args.api_url = f"http://127.0.0.1:{args.port}"
+    mock = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_openai_server", "--port", str(mock_port),
+         "--latency", str(args.latency), "--latency-jitter", str(args.latency_jitter),
+         "--error-rate", str(args.error_rate), "--error-status", str(args.error_status)],
+        stdout=subprocess.DEVNULL
+    )
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": "fake",
+        "OPENAI_BASE_URL": f"{args.mock_url}/v1",
+        "SHARED_STATE_DIR": tempfile.mkdtemp(prefix="autou-suite-"),
+        "WEB_CONCURRENCY": str(args.workers)
+    })
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    processes = [api, mock]
+    try:
+        _wait_ready(args.api_url)
+    except Exception:
+        _terminate(processes)
+        raise
+    return processes
+
+
+def _terminate(processes: list) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait(timeout=30)
+
+
+def _metadata(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "mode": "micro" if args.micro else "load",
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+    }
+
+
+def compare(results: dict, baseline_path: str) -> None:
+    """Variação de p50/p95/p99 e vazão em relação a uma rodada anterior"""
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+
+    print(f"\n📈 Comparação com {baseline_path} (negativo = mais rápido nas latências)")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        deltas = []
+        for key in ("p50", "p95", "p99", "rps"):
+            if previous.get(key):
+                deltas.append(f"{key} {(current[key] - previous[key]) / previous[key] * 100:+6.1f}%")
+        print(f"  {name:<24} " + " | ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks da API de classificação")
+    parser.add_argument("--micro", action="store_true", help="Micro-benchmarks em processo (sem HTTP)")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20, help="Requisições de aquecimento (não medidas)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=1.0, help="Tempo mínimo por micro-benchmark (s)")
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--mock-url", help="Servidor falso, para contar as chamadas ao OpenAI por cenário")
+    parser.add_argument("--spawn", action="store_true", help="Sobe o servidor falso e a API automaticamente")
+    parser.add_argument("--port", type=int, default=8090, help="Porta da API com --spawn")
+    parser.add_argument("--workers", type=int, default=1, help="Workers do uvicorn com --spawn")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latência do servidor falso com --spawn (s)")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Variação aleatória da latência (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de falhas do servidor falso")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--output", help="Arquivo JSON com os resultados")
+    parser.add_argument("--compare", help="JSON de uma rodada anterior para comparar")
+    args = parser.parse_args()
+
+    processes: Optional[list] = None
+    try:
+        if args.micro:
+            print("🔬 Micro-benchmarks")
+            results = run_micro(args)
+        else:
+            if args.spawn:
+                processes = _spawn(args)
+            print(f"🚀 {args.requests} requisições por cenário, concorrência {args.concurrency}")
+            results = asyncio.run(run_load(args))
+    finally:
+        if processes:
+            _terminate(processes)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output_file:
+            json.dump({"meta": _metadata(args), "results": results}, output_file, indent=2)
+        print(f"💾 Resultados em {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
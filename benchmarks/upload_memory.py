@@ -0,0 +1,82 @@
+"""
+Mede o pico de memória (RSS) da API sob uploads concorrentes
+
+Sobe a API em um subprocesso, envia vários uploads TXT grandes ao mesmo
+tempo e lê o pico de RSS do processo em /proc/<pid>/status (Linux).
+
+Uso:
+    python -m benchmarks.upload_memory --uploads 20 --size-mb 8
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def _read_status_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _wait_until_up(url: str, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{url}/health", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("API não subiu a tempo")
+
+
+async def _send_uploads(url: str, uploads: int, payload: bytes) -> list:
+    async with httpx.AsyncClient(timeout=300) as client:
+        async def send(index: int) -> int:
+            files = {"file": (f"email_{index}.txt", payload, "text/plain")}
+            response = await client.post(f"{url}/classify-email", files=files)
+            return response.status_code
+
+        return await asyncio.gather(*(send(i) for i in range(uploads)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de RSS sob uploads concorrentes")
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--port", type=int, default=8010)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        env={**os.environ, "OPENAI_API_KEY": ""}
+    )
+    try:
+        _wait_until_up(url)
+        baseline = _read_status_kb(server.pid, "VmRSS")
+
+        line = "Preciso de ajuda com o sistema, está dando erro no login. "
+        payload = (line * int(args.size_mb * 1024 * 1024 / len(line))).encode()
+
+        start = time.perf_counter()
+        statuses = asyncio.run(_send_uploads(url, args.uploads, payload))
+        elapsed = time.perf_counter() - start
+        peak = _read_status_kb(server.pid, "VmHWM")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"📤 {args.uploads} uploads de {args.size_mb:g}MB em {elapsed:.2f}s (status: {sorted(set(statuses))})")
+    print(f"💾 RSS base: {baseline / 1024:.1f}MB | pico: {peak / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
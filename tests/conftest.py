@@ -0,0 +1,70 @@
+"""
+Configuração comum dos testes (pytest)
+
+As configurações da aplicação são lidas na importação de app.utils.config,
+então o ambiente dos testes é definido aqui, antes de qualquer import do app:
+o OpenAI aponta para o servidor falso de benchmarks/ e o estado (fila de
+jobs, cache) fica em um diretório temporário.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import pytest
+
+# Roteiro manual contra a API já rodando: python tests/test_examples.py
+collect_ignore = ["test_examples.py"]
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+MOCK_OPENAI_PORT = _free_port()
+STATE_DIR = tempfile.mkdtemp(prefix="autou-tests-")
+
+for name in ("SETTINGS_FILE", "SHARED_STATE_DIR", "ADMIN_TOKEN", "CACHE_SQLITE_PATH", "REPLY_STORE_SQLITE_PATH"):
+    os.environ.pop(name, None)
+os.environ.update({
+    "OPENAI_API_KEY": "fake",
+    "OPENAI_BASE_URL": f"http://127.0.0.1:{MOCK_OPENAI_PORT}/v1",
+    "WEB_CONCURRENCY": "1",
+    "AUDIT_ENABLED": "false",
+    "JOB_DB_PATH": os.path.join(STATE_DIR, "jobs.sqlite3"),
+    # Um processo de extração, para os testes passarem pelo pool
+    "EXTRACTION_WORKERS": "1",
+})
+
+
+@pytest.fixture(scope="session")
+def mock_openai():
+    """Servidor falso do OpenAI (benchmarks/mock_openai_server.py) durante a sessão"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_openai_server",
+         "--port", str(MOCK_OPENAI_PORT), "--latency", "0.01", "--token-delay", "0"],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{MOCK_OPENAI_PORT}"
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                httpx.get(f"{base_url}/stats").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError("Servidor OpenAI falso não iniciou")
+                time.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
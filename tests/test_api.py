@@ -0,0 +1,245 @@
+"""
+Testes das rotas da API contra o servidor OpenAI falso (benchmarks/mock_openai_server.py)
+
+A aplicação roda com um processo de extração (EXTRACTION_WORKERS=1, ver
+conftest.py), então uploads .eml passam pelo pool como em produção.
+"""
+
+import json
+import time
+from email.message import EmailMessage
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils.config import settings
+
+# Sem palavras-chave conhecidas: a cascata chega ao LLM
+AMBIGUOUS_TEXT = "Segue em anexo o relatório trimestral revisado conforme combinado na reunião."
+
+
+@pytest.fixture(scope="module")
+def client(mock_openai):
+    with TestClient(app) as test_client:
+        deadline = time.monotonic() + 30
+        while test_client.get("/ready").status_code != 200:
+            assert time.monotonic() < deadline, "API não ficou pronta"
+            time.sleep(0.1)
+        yield test_client
+
+
+@pytest.fixture
+def reload_with(client, monkeypatch):
+    """Recarrega as configurações com variáveis de ambiente alteradas; restaura no fim do teste"""
+    def reload(**values):
+        for name, value in values.items():
+            monkeypatch.setenv(name, value)
+        return client.post("/admin/settings/reload")
+
+    yield reload
+    monkeypatch.undo()
+    assert client.post("/admin/settings/reload").status_code == 200
+
+
+def sse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def eml_upload(body: str, attachment: str = None) -> dict:
+    message = EmailMessage()
+    message["Subject"] = "Relatório"
+    message["From"] = "cliente@example.com"
+    message.set_content(body)
+    if attachment is not None:
+        message.add_attachment(attachment.encode("utf-8"), maintype="text", subtype="plain", filename="anexo.txt")
+    return {"file": ("mensagem.eml", message.as_bytes(), "message/rfc822")}
+
+
+def test_classify_text(client):
+    response = client.post("/classify-text", data={"text": AMBIGUOUS_TEXT})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["category"] in ("produtivo", "improdutivo")
+    assert body["suggested_response"]
+    assert body["text_length"] == len(AMBIGUOUS_TEXT)
+
+
+def test_classify_email_stream(client):
+    response = client.post("/classify-email/stream", data={"text": AMBIGUOUS_TEXT + " (stream)"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = sse_events(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "category"
+    assert names[-1] == "done"
+    assert "error" not in names
+    done = events[-1][1]
+    assert done["category"] == events[0][1]["category"]
+    streamed = "".join(data["text"] for name, data in events if name == "token")
+    assert streamed == done["suggested_response"]
+
+
+def test_classify_email_stream_rejects_empty_input(client):
+    assert client.post("/classify-email/stream", data={}).status_code == 400
+
+
+def test_reply_generated_later(client):
+    classified = client.post("/classify-text", params={"include_reply": "false"}, data={"text": AMBIGUOUS_TEXT + " (depois)"})
+    assert classified.status_code == 200
+    body = classified.json()
+    assert body["suggested_response"] is None
+
+    reply = client.post(f"/classifications/{body['classification_id']}/reply")
+    assert reply.status_code == 200
+    assert reply.json()["category"] == body["category"]
+    assert reply.json()["suggested_response"]
+
+    assert client.post("/classifications/inexistente/reply").status_code == 404
+
+
+def test_classify_batch_json_and_multipart(client):
+    response = client.post("/classify-batch", json=[
+        {"id": "a", "text": "Feliz Natal a toda a equipe!"},
+        {"id": "b", "text": "Feliz Natal a toda a equipe!"},
+        {"id": "c", "text": ""},
+    ])
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"], body["unique"]) == (3, 2, 1, 1)
+    assert [item["id"] for item in body["results"]] == ["a", "b", "c"]
+
+    response = client.post(
+        "/classify-batch",
+        files=[("files", ("um.txt", "Preciso de ajuda com um erro no sistema".encode(), "text/plain")),
+               ("files", ("dois.eml", eml_upload(AMBIGUOUS_TEXT)["file"][1], "message/rfc822"))],
+        data={"texts": ["Obrigado pela atenção!"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 3
+
+
+def test_classify_batch_reports_invalid_items_individually(client):
+    response = client.post("/classify-batch", json=[
+        {"id": "a", "text": 123},
+        {"id": "b", "text": "Feliz Natal a toda a equipe!"},
+        {"id": "c", "text": ["lista"]},
+        42,
+    ])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (1, 3)
+    errors = {item["id"]: item["error"] for item in body["results"] if item["status"] == "error"}
+    assert errors["a"] == errors["c"] == "Campo 'text' deve ser uma string"
+
+
+def test_classify_stream_reports_invalid_lines(client):
+    lines = [
+        json.dumps({"id": "a", "text": 123}),
+        json.dumps({"id": "b", "text": "Feliz Natal a toda a equipe!"}),
+        "{nao e json",
+    ]
+    response = client.post("/classify-stream", content="\n".join(lines) + "\n")
+
+    assert response.status_code == 200
+    results = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert results[0]["id"] == "a"
+    assert results[0]["error"] == "Campo 'text' deve ser uma string"
+    assert results[1]["status"] == "ok"
+    assert results[2]["error"] == "Linha não é um JSON válido"
+
+
+def test_classify_batch_body_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_bytes", 1024)
+
+    response = client.post("/classify-batch", json=[AMBIGUOUS_TEXT] * 50)
+    assert response.status_code == 413
+
+
+def test_jobs_long_polling(client):
+    created = client.post("/jobs", data={"text": AMBIGUOUS_TEXT + " (job)"})
+    assert created.status_code == 202
+    job_id = created.json()["id"]
+    assert created.headers["location"] == f"/jobs/{job_id}"
+
+    job = client.get(f"/jobs/{job_id}", params={"wait": 10}).json()
+    assert job["status"] == "succeeded"
+    assert job["result"]["text_length"] == len(AMBIGUOUS_TEXT + " (job)")
+
+    uploaded = client.post("/jobs", files=eml_upload(AMBIGUOUS_TEXT + " (job eml)"))
+    job = client.get(f"/jobs/{uploaded.json()['id']}", params={"wait": 10}).json()
+    assert job["status"] == "succeeded"
+
+    assert client.get("/jobs/inexistente").status_code == 404
+    stats = client.get("/jobs/stats").json()
+    assert stats["succeeded"] >= 2
+
+
+def test_metrics_label_routes_by_template(client):
+    # O valor do parâmetro repete um trecho fixo do caminho
+    assert client.post("/classifications/classifications/reply").status_code == 404
+    client.get("/docs")
+    client.get("/nao-existe")
+
+    metrics = client.get("/metrics").text
+    assert 'route="/classifications/{classification_id}/reply",status="404"' in metrics
+    assert 'route="/docs"' in metrics
+    assert 'route="unmatched"' in metrics
+    assert 'route="/classifications/classifications/reply"' not in metrics
+    assert "{classification_id}/{classification_id}" not in metrics
+
+
+def test_reload_reports_changes(client, reload_with):
+    response = reload_with(PDF_MAX_PAGES="42", JOB_WORKERS="7")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert "pdf_max_pages" in body["changed"]
+    assert "job_workers" in body["restart_required"]
+    assert client.get("/admin/settings").json()["pdf_max_pages"] == 42
+
+
+def test_invalid_reload_is_rejected(client, reload_with):
+    response = reload_with(PDF_MAX_PAGES="42", OPENAI_TIMEOUT="nunca")
+
+    assert response.status_code == 422
+    assert "OPENAI_TIMEOUT" in response.json()["detail"]
+    assert settings.pdf_max_pages == 500
+
+
+def test_admin_routes_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", "segredo")
+
+    assert client.post("/admin/settings/reload").status_code == 403
+    assert client.get("/admin/settings", headers={"X-Admin-Token": "errado"}).status_code == 403
+    view = client.get("/admin/settings", headers={"X-Admin-Token": "segredo"})
+    assert view.status_code == 200
+    assert view.json()["admin_token"] == "***"
+
+
+def test_eml_limit_applies_in_the_extraction_pool_after_reload(client, reload_with):
+    body = "Parágrafo do relatório trimestral. " * 200
+    before = client.post("/classify-email", files=eml_upload(body)).json()
+    assert before["text_length"] > 5000
+
+    assert reload_with(EML_MAX_BODY_BYTES="100").status_code == 200
+    after = client.post("/classify-email", files=eml_upload(body + " (depois)")).json()
+    assert after["text_length"] < 200
+
+
+def test_eml_attachments_can_be_disabled_by_reload(client, reload_with):
+    attachment = "Conteúdo do anexo de texto. " * 20
+    upload = eml_upload(AMBIGUOUS_TEXT + " (anexo)", attachment=attachment)
+    with_attachment = client.post("/classify-email", files=upload).json()
+
+    assert reload_with(EML_ATTACHMENTS="false").status_code == 200
+    without_attachment = client.post("/classify-email", files=upload).json()
+
+    assert with_attachment["text_length"] - without_attachment["text_length"] >= len(attachment)
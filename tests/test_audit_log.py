@@ -0,0 +1,120 @@
+"""
+Testes do log de auditoria: buffer circular, gravação em lotes gzip, rotação e exportação (audit_log, cli)
+"""
+
+import asyncio
+import json
+import os
+
+from app.cli import main
+from app.services.audit_log import FILE_SUFFIX, AuditLog, iter_audit_records
+
+
+def make_log(directory, **options) -> AuditLog:
+    return AuditLog(str(directory), **options)
+
+
+def record(log: AuditLog, text: str, category: str = "produtivo", **fields) -> None:
+    log.record(text, category=category, tier=fields.pop("tier", "llm"), fallback=fields.pop("fallback", False), **fields)
+
+
+def audit_files(directory) -> list:
+    return sorted(name for name in os.listdir(directory) if name.endswith(FILE_SUFFIX))
+
+
+def test_full_buffer_drops_oldest_records(tmp_path):
+    log = make_log(tmp_path, max_buffered=3, batch_size=100)
+    for number in range(5):
+        record(log, f"Email número {number}")
+
+    assert log.stats() == {"buffered": 3, "written": 0, "dropped": 2}
+    asyncio.run(log.flush())
+
+    assert log.stats() == {"buffered": 0, "written": 3, "dropped": 2}
+    assert [entry["text"] for entry in iter_audit_records(str(tmp_path))] == [
+        "Email número 2", "Email número 3", "Email número 4"
+    ]
+
+
+def test_batches_are_appended_as_gzip_members(tmp_path):
+    log = make_log(tmp_path)
+    for batch in range(3):
+        record(log, f"Lote {batch} registro a")
+        record(log, f"Lote {batch} registro b")
+        asyncio.run(log.flush())
+
+    assert len(audit_files(tmp_path)) == 1
+    records = list(iter_audit_records(str(tmp_path)))
+    assert [entry["text"] for entry in records] == [
+        f"Lote {batch} registro {suffix}" for batch in range(3) for suffix in "ab"
+    ]
+    assert all(len(entry["input_hash"]) == 64 and entry["category"] == "produtivo" for entry in records)
+
+
+def test_rotation_starts_new_files_and_reads_back_in_order(tmp_path):
+    log = make_log(tmp_path, rotate_bytes=1)
+    for batch in range(3):
+        record(log, f"Lote {batch}")
+        asyncio.run(log.flush())
+
+    assert len(audit_files(tmp_path)) == 3
+    assert [entry["text"] for entry in iter_audit_records(str(tmp_path))] == ["Lote 0", "Lote 1", "Lote 2"]
+
+
+def test_truncated_batch_keeps_earlier_records(tmp_path):
+    log = make_log(tmp_path)
+    record(log, "Registro completo")
+    asyncio.run(log.flush())
+    path = os.path.join(tmp_path, audit_files(tmp_path)[0])
+    with open(path, "ab") as audit_file:
+        # Início de um membro gzip interrompido por uma queda
+        audit_file.write(b"\x1f\x8b\x08\x00\x00\x00")
+
+    assert [entry["text"] for entry in iter_audit_records(str(tmp_path))] == ["Registro completo"]
+
+
+def test_without_text_only_the_hash_is_kept(tmp_path):
+    log = make_log(tmp_path, include_text=False)
+    record(log, "Texto sigiloso do cliente")
+    asyncio.run(log.flush())
+
+    entry, = iter_audit_records(str(tmp_path))
+    assert "text" not in entry
+    assert len(entry["input_hash"]) == 64
+
+
+def test_background_flusher_writes_on_close(tmp_path):
+    async def scenario():
+        log = make_log(tmp_path, flush_interval=60)
+        log.start()
+        record(log, "Gravado no fechamento")
+        await log.aclose()
+        return log.stats()
+
+    assert asyncio.run(scenario())["written"] == 1
+    assert [entry["text"] for entry in iter_audit_records(str(tmp_path))] == ["Gravado no fechamento"]
+
+
+def test_export_audit_builds_labeled_dataset(tmp_path):
+    audit_dir = tmp_path / "audit"
+    log = make_log(audit_dir, rotate_bytes=1)
+    record(log, "Preciso de ajuda com o sistema", category="improdutivo")
+    asyncio.run(log.flush())
+    # Mesmo texto, classificação mais recente
+    record(log, "Preciso de ajuda com o sistema", category="produtivo")
+    record(log, "Feliz Natal!", category="improdutivo", tier="keywords")
+    record(log, "OpenAI fora do ar", category="produtivo", tier="keywords", fallback=True)
+    asyncio.run(log.flush())
+
+    output = tmp_path / "dataset.jsonl"
+    assert main(["export-audit", "--dir", str(audit_dir), "--output", str(output)]) == 0
+    examples = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [(example["text"], example["label"]) for example in examples] == [
+        ("Preciso de ajuda com o sistema", "produtivo"),
+        ("Feliz Natal!", "improdutivo"),
+    ]
+
+    assert main(["export-audit", "--dir", str(audit_dir), "--output", str(output),
+                 "--tiers", "llm", "--no-dedupe"]) == 0
+    labels = [json.loads(line)["label"] for line in output.read_text(encoding="utf-8").splitlines()]
+    assert labels == ["improdutivo", "produtivo"]
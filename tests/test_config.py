@@ -0,0 +1,140 @@
+"""
+Testes da validação e do recarregamento das configurações (config)
+"""
+
+import json
+
+import pytest
+
+from app.utils.config import Settings, SettingsError
+
+
+def settings_error(values: dict) -> str:
+    with pytest.raises(SettingsError) as error:
+        Settings(values=values)
+    return str(error.value)
+
+
+def test_defaults_are_valid():
+    current = Settings(values={})
+
+    assert current.openai_timeout == 15
+    assert current.eml_attachments is True
+    assert current.allowed_extensions == [".txt", ".pdf", ".eml"]
+
+
+def test_every_invalid_value_is_reported_together():
+    message = settings_error({
+        "OPENAI_TIMEOUT": "rápido",
+        "JOB_WORKERS": "0",
+        "CASCADE_KEYWORD_THRESHOLD": "1.5",
+        "EML_ATTACHMENTS": "talvez",
+        "ALLOWED_EXTENSIONS": ".txt,.docx",
+    })
+
+    for name in ("OPENAI_TIMEOUT", "JOB_WORKERS", "CASCADE_KEYWORD_THRESHOLD", "EML_ATTACHMENTS", "ALLOWED_EXTENSIONS"):
+        assert name in message
+
+
+@pytest.mark.parametrize("params", [
+    {"gpt-4o": {"reply_max_tokens": "200"}},
+    {"gpt-4o": {"reply_max_tokens": 0}},
+    {"gpt-4o": {"reply_max_tokens": True}},
+    {"gpt-4o": {"classify_temperature": 3}},
+    {"gpt-4o": {"classify_temperature": "0.1"}},
+    {"gpt-4o": {"top_p": 0.5}},
+    {"gpt-4o": 200},
+])
+def test_invalid_model_params_are_rejected(params):
+    assert "OPENAI_MODEL_PARAMS" in settings_error({"OPENAI_MODEL_PARAMS": json.dumps(params)})
+
+
+def test_invalid_token_budgets_are_rejected():
+    assert "EMAIL_TOKEN_BUDGETS" in settings_error({"EMAIL_TOKEN_BUDGETS": json.dumps({"gpt-4o": True})})
+
+
+def test_completion_params_use_longest_model_prefix():
+    current = Settings(values={
+        "OPENAI_MODEL": "gpt-4o-mini",
+        "OPENAI_REPLY_MAX_TOKENS": "120",
+        "OPENAI_MODEL_PARAMS": json.dumps({
+            "gpt-4": {"reply_max_tokens": 300, "reply_temperature": 0.2},
+            "gpt-4o-mini": {"reply_max_tokens": 80},
+        }),
+    })
+
+    assert current.completion_params("reply") == {"max_tokens": 80, "temperature": 0.7}
+    assert current.completion_params("classify") == {"max_tokens": 10, "temperature": 0.1}
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    """Ambiente isolado para Settings() e reload(), sem as variáveis dos testes"""
+    for name in ("JOB_WORKERS", "PDF_MAX_PAGES", "OPENAI_BASE_URL", "EML_ATTACHMENTS", "SETTINGS_FILE"):
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
+
+def test_settings_file_overrides_environment(environment, tmp_path):
+    environment.setenv("PDF_MAX_PAGES", "10")
+    environment.setenv("JOB_WORKERS", "3")
+
+    json_file = tmp_path / "settings.json"
+    json_file.write_text(json.dumps({"PDF_MAX_PAGES": 20, "EMAIL_TOKEN_BUDGETS": {"gpt-4o": 6000}}))
+    environment.setenv("SETTINGS_FILE", str(json_file))
+    current = Settings()
+    assert (current.pdf_max_pages, current.job_workers) == (20, 3)
+    assert current.email_token_budgets == {"gpt-4o": 6000}
+
+    env_file = tmp_path / "settings.env"
+    env_file.write_text("PDF_MAX_PAGES=30\n")
+    environment.setenv("SETTINGS_FILE", str(env_file))
+    assert Settings().pdf_max_pages == 30
+
+
+def test_unreadable_settings_file_is_an_error(environment, tmp_path):
+    environment.setenv("SETTINGS_FILE", str(tmp_path / "missing.json"))
+
+    with pytest.raises(SettingsError):
+        Settings()
+
+
+def test_reload_applies_live_keys_and_reports_restart_required(environment):
+    environment.setenv("PDF_MAX_PAGES", "10")
+    current = Settings()
+
+    environment.setenv("PDF_MAX_PAGES", "50")
+    environment.setenv("EML_ATTACHMENTS", "false")
+    environment.setenv("JOB_WORKERS", "9")
+    environment.setenv("OPENAI_BASE_URL", "http://127.0.0.1:1/v1")
+    result = current.reload()
+
+    assert result == {
+        "changed": ["eml_attachments", "pdf_max_pages"],
+        "restart_required": ["job_workers", "openai_base_url"],
+    }
+    assert current.pdf_max_pages == 50
+    assert current.eml_attachments is False
+    # Chaves que exigem reinício continuam com o valor antigo
+    assert current.job_workers == 4
+    assert current.openai_base_url is None
+
+
+def test_rejected_reload_keeps_current_values(environment):
+    environment.setenv("PDF_MAX_PAGES", "10")
+    current = Settings()
+
+    environment.setenv("PDF_MAX_PAGES", "50")
+    environment.setenv("JOB_WORKERS", "zero")
+    with pytest.raises(SettingsError):
+        current.reload()
+
+    assert current.pdf_max_pages == 10
+
+
+def test_public_view_hides_secrets():
+    view = Settings(values={"OPENAI_API_KEY": "sk-segredo", "ADMIN_TOKEN": "admin"}).public_view()
+
+    assert view["openai_api_key"] == "***"
+    assert view["admin_token"] == "***"
+    assert view["pdf_max_pages"] == 500
@@ -0,0 +1,151 @@
+"""
+Testes da cascata de classificação e da chamada única contra o servidor OpenAI falso (email_classifier)
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.models.email_models import EmailCategory
+from app.services.email_classifier import EmailClassifier
+from app.utils.config import settings
+
+# Sem palavras-chave conhecidas: confiança 0 no tier de palavras-chave
+AMBIGUOUS_TEXT = "Segue em anexo o relatório trimestral revisado conforme combinado na reunião."
+
+
+class StubLocalModel:
+    """Modelo local com resposta fixa, que registra os textos recebidos"""
+
+    version = "stub"
+
+    def __init__(self, category: EmailCategory, confidence: float):
+        self.result = (category, confidence)
+        self.texts = []
+
+    def classify(self, texts):
+        self.texts.extend(texts)
+        return [self.result for _ in texts]
+
+
+@pytest.fixture
+def classify(mock_openai, monkeypatch):
+    """Classifica um texto só com os tiers baratos e o LLM (sem cache nem resposta sugerida)
+
+    Retorna o resultado e quantas vezes o LLM foi chamado.
+    """
+    monkeypatch.setattr(settings, "cascade_enabled", True)
+    monkeypatch.setattr(settings, "local_model_mode", "prefilter")
+
+    def run(text: str, local_model=None):
+        async def scenario():
+            classifier = EmailClassifier()
+            classifier.local_model = local_model
+            llm_calls = []
+            classify_llm = classifier._classify_llm_async
+
+            async def counting(prompt_text):
+                llm_calls.append(prompt_text)
+                return await classify_llm(prompt_text)
+
+            classifier._classify_llm_async = counting
+            try:
+                result, _, _ = await classifier.classify_category_async(text)
+                return result, len(llm_calls), classifier.tier_counts
+            finally:
+                await classifier.aclose()
+
+        return asyncio.run(scenario())
+
+    return run
+
+
+def test_confident_keywords_short_circuit_the_cascade(classify):
+    local_model = StubLocalModel(EmailCategory.PRODUTIVO, 0.99)
+
+    result, llm_calls, tier_counts = classify("Feliz Natal a toda a equipe!", local_model)
+    assert (result.tier, result.category, result.confidence) == ("keywords", EmailCategory.IMPRODUTIVO, 0.6)
+    assert llm_calls == 0
+    # O modelo local nem chega a ser consultado
+    assert local_model.texts == []
+    assert tier_counts == {"keywords": 1, "local": 0, "llm": 0}
+
+
+def test_confident_local_model_decides_when_keywords_are_not(classify):
+    local_model = StubLocalModel(EmailCategory.PRODUTIVO, 0.95)
+
+    result, llm_calls, tier_counts = classify(AMBIGUOUS_TEXT, local_model)
+    assert (result.tier, result.category, result.confidence) == ("local", EmailCategory.PRODUTIVO, 0.95)
+    assert llm_calls == 0
+    assert local_model.texts == [AMBIGUOUS_TEXT]
+    assert tier_counts["local"] == 1
+
+
+def test_unsure_tiers_escalate_to_the_llm(classify):
+    local_model = StubLocalModel(EmailCategory.PRODUTIVO, settings.local_model_threshold - 0.1)
+
+    result, llm_calls, tier_counts = classify(AMBIGUOUS_TEXT, local_model)
+    assert result.tier == "llm"
+    assert not result.fallback
+    assert llm_calls == 1
+    assert local_model.texts == [AMBIGUOUS_TEXT]
+    assert tier_counts == {"keywords": 0, "local": 0, "llm": 1}
+
+
+def test_keyword_threshold_above_the_score_escalates(classify, monkeypatch):
+    monkeypatch.setattr(settings, "cascade_keyword_threshold", 0.9)
+
+    result, llm_calls, _ = classify("Feliz Natal a toda a equipe!")
+    assert result.tier == "llm"
+    assert llm_calls == 1
+
+
+def test_combined_result_is_parsed_and_normalized():
+    content = json.dumps({"category": " Produtivo ", "response": "  Vamos verificar o erro.  "})
+
+    assert EmailClassifier._parse_combined_result(content) == (EmailCategory.PRODUTIVO, "Vamos verificar o erro.")
+
+
+@pytest.mark.parametrize("content", [
+    "",
+    "{nao e json",
+    json.dumps(["produtivo", "Vamos verificar."]),
+    json.dumps({"response": "Vamos verificar."}),
+    json.dumps({"category": "spam", "response": "Vamos verificar."}),
+    json.dumps({"category": "produtivo"}),
+    json.dumps({"category": "produtivo", "response": "   "}),
+    json.dumps({"category": "produtivo", "response": 42}),
+])
+def test_invalid_combined_result_is_rejected(content):
+    with pytest.raises(ValueError):
+        EmailClassifier._parse_combined_result(content)
+
+
+def test_invalid_single_call_falls_back_to_two_calls(mock_openai, monkeypatch):
+    monkeypatch.setattr(settings, "openai_single_call", True)
+
+    async def scenario():
+        classifier = EmailClassifier()
+        completions = []
+        create_completion = classifier._create_completion
+
+        async def corrupting(**kwargs):
+            response = await create_completion(**kwargs)
+            completions.append("combined" if "response_format" in kwargs else "separate")
+            if "response_format" in kwargs:
+                # Categoria fora do enum, como um modelo que ignora o formato pedido
+                response.choices[0].message.content = json.dumps({"category": "spam", "response": "Ok"})
+            return response
+
+        classifier._create_completion = corrupting
+        try:
+            return await classifier.classify_detailed_async(AMBIGUOUS_TEXT + " (chamada única)"), completions
+        finally:
+            await classifier.aclose()
+
+    result, completions = asyncio.run(scenario())
+    assert completions == ["combined", "separate", "separate"]
+    assert result.tier == "llm"
+    assert result.category in (EmailCategory.PRODUTIVO, EmailCategory.IMPRODUTIVO)
+    assert result.suggested_response and result.suggested_response != "Ok"
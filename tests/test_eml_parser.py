@@ -0,0 +1,158 @@
+"""
+Testes da leitura de .eml: árvore MIME, corpo, anexos e orçamento de bytes (eml_parser)
+"""
+
+from email.message import EmailMessage
+
+from app.services.eml_parser import MAX_DEPTH, extract_eml_text, iter_parts
+
+
+def make_message(body: str = "Olá, preciso de ajuda com o pedido 123.", html: str = None) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = "Pedido atrasado"
+    message["From"] = "cliente@example.com"
+    message.set_content(body, cte="quoted-printable")
+    if html is not None:
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+def leaf_types(buffer: bytes) -> list:
+    return [part.content_type for part in iter_parts(buffer)]
+
+
+def test_plain_body_with_headers():
+    text = extract_eml_text(make_message().as_bytes(), max_bytes=10_000)
+
+    assert text.splitlines() == [
+        "Assunto: Pedido atrasado",
+        "Remetente: cliente@example.com",
+        "Olá, preciso de ajuda com o pedido 123.",
+    ]
+
+
+def test_plain_body_preferred_over_html():
+    message = make_message(html="<p>Versão <b>HTML</b></p>")
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=10_000)
+    assert "pedido 123" in text
+    assert "HTML" not in text
+
+
+def test_html_only_body_is_converted_to_text():
+    message = EmailMessage()
+    message.set_content("<p>Status do <b>pedido</b>?</p>", subtype="html", cte="base64")
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=10_000)
+    assert "Status do" in text
+    assert "pedido" in text
+    assert "<b>" not in text
+
+
+def test_nested_multipart_with_attachments():
+    message = make_message(html="<p>html</p>")
+    message.add_attachment("Notas da reunião".encode("utf-8"), maintype="text", subtype="plain", filename="notas.txt")
+    message.add_attachment(b"\x89PNG\r\n\x1a\n" + bytes(range(256)), maintype="image", subtype="png", filename="logo.png")
+
+    buffer = message.as_bytes()
+    assert leaf_types(buffer) == ["text/plain", "text/html", "text/plain", "image/png"]
+
+    text = extract_eml_text(buffer, max_bytes=10_000)
+    assert "Anexo notas.txt: Notas da reunião" in text
+    assert "logo.png" not in text
+
+
+def test_forwarded_message_is_walked():
+    original = make_message(body="Texto da mensagem original.")
+    message = EmailMessage()
+    message["Subject"] = "Fwd: Pedido atrasado"
+    message.add_attachment(original)
+
+    buffer = message.as_bytes()
+    assert "text/plain" in leaf_types(buffer)
+    assert "Texto da mensagem original." in extract_eml_text(buffer, max_bytes=10_000)
+
+
+def test_missing_closing_boundary():
+    buffer = (
+        b"Subject: corte\r\n"
+        b"Content-Type: multipart/mixed; boundary=XYZ\r\n\r\n"
+        b"--XYZ\r\nContent-Type: text/plain\r\n\r\nCorpo sem fechamento\r\n"
+    )
+    assert "Corpo sem fechamento" in extract_eml_text(buffer, max_bytes=10_000)
+
+
+def test_deeply_nested_multipart_stops_at_max_depth():
+    body = b"Content-Type: text/plain\r\n\r\nfundo\r\n"
+    for level in range(MAX_DEPTH + 5):
+        boundary = f"b{level}".encode()
+        body = (
+            b"Content-Type: multipart/mixed; boundary=" + boundary + b"\r\n\r\n"
+            b"--" + boundary + b"\r\n" + body + b"\r\n--" + boundary + b"--\r\n"
+        )
+    parts = list(iter_parts(body))
+    assert len(parts) == 1
+    assert parts[0].content_type == "multipart/mixed"
+
+
+def test_body_is_limited_by_the_budget():
+    message = make_message(body="x" * 5000)
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=100)
+    assert text.splitlines()[-1] == "x" * 100
+
+
+def test_attachments_share_the_budget():
+    message = make_message(body="a" * 59)
+    message.add_attachment(b"b" * 100, maintype="text", subtype="plain", filename="um.txt")
+    message.add_attachment(b"c" * 100, maintype="text", subtype="plain", filename="dois.txt")
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=100)
+    assert "Anexo um.txt: " + "b" * 40 in text
+    assert "b" * 41 not in text
+    assert "dois.txt" not in text
+
+
+def test_budget_counts_utf8_bytes():
+    # 40 caracteres acentuados ocupam 81 bytes com a quebra de linha final
+    message = make_message(body="é" * 40)
+    message.add_attachment(b"b" * 100, maintype="text", subtype="plain", filename="um.txt")
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=100)
+    assert "é" * 40 in text
+    assert "Anexo um.txt: " + "b" * 19 in text
+    assert "b" * 20 not in text
+
+
+def test_attachments_can_be_disabled():
+    message = make_message()
+    message.add_attachment(b"conteudo do anexo", maintype="text", subtype="plain", filename="anexo.txt")
+    message.add_attachment(b"%PDF-1.4", maintype="application", subtype="pdf", filename="anexo.pdf")
+    calls = []
+
+    def extract_pdf(content: bytes, budget: int) -> str:
+        calls.append(content)
+        return "texto do pdf"
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=10_000, extract_pdf=extract_pdf, include_attachments=False)
+    assert "pedido 123" in text
+    assert "anexo" not in text.lower()
+    assert calls == []
+
+
+def test_pdf_attachments_use_the_extractor():
+    message = make_message()
+    message.add_attachment(b"%PDF-1.4 conteudo", maintype="application", subtype="pdf", filename="fatura.pdf")
+    calls = []
+
+    def extract_pdf(content: bytes, budget: int) -> str:
+        calls.append((content, budget))
+        return "texto do pdf"
+
+    text = extract_eml_text(message.as_bytes(), max_bytes=1000, extract_pdf=extract_pdf)
+    assert "Anexo fatura.pdf: texto do pdf" in text
+    assert calls[0][0] == b"%PDF-1.4 conteudo"
+    assert calls[0][1] < 1000
+
+    # Sem extrator, o PDF é ignorado
+    assert "fatura.pdf" not in extract_eml_text(message.as_bytes(), max_bytes=1000)
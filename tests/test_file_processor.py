@@ -0,0 +1,118 @@
+"""
+Testes da extração e da limpeza do texto dos arquivos (file_processor)
+"""
+
+import re
+
+import PyPDF2
+import pytest
+
+from app.services.file_processor import FileProcessor
+from app.utils.config import settings
+
+
+def make_pdf(page_texts: list) -> bytes:
+    """PDF mínimo com uma linha de texto (Helvetica) por página"""
+    font_id = 3 + 2 * len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(len(page_texts)))
+        + b"] /Count %d >>" % len(page_texts),
+    ]
+    for index, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode("latin-1") + b") Tj ET"
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, 4 + 2 * index)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+@pytest.fixture
+def extracted_pages(monkeypatch):
+    """Conta as chamadas a extract_text, a parte cara da leitura do PDF"""
+    calls = []
+    original = PyPDF2.PageObject.extract_text
+
+    def counting(page, *args, **kwargs):
+        calls.append(page)
+        return original(page, *args, **kwargs)
+
+    monkeypatch.setattr(PyPDF2.PageObject, "extract_text", counting)
+    return calls
+
+
+PAGES = [f"Pagina {number} do relatorio" for number in range(1, 11)]
+
+
+def test_pdf_reads_every_page_without_limits(extracted_pages):
+    stats = {}
+    text = FileProcessor.extract_text_from_pdf(make_pdf(PAGES), stats=stats)
+
+    assert text.splitlines() == PAGES
+    assert len(extracted_pages) == 10
+    assert stats == {"pages_read": 10, "truncated": False}
+
+
+def test_pdf_page_limit_stops_extraction(extracted_pages):
+    stats = {}
+    text = FileProcessor.extract_text_from_pdf(make_pdf(PAGES), max_pages=3, stats=stats)
+
+    assert text.splitlines() == PAGES[:3]
+    assert len(extracted_pages) == 3
+    assert stats == {"pages_read": 3, "truncated": True}
+
+
+def test_pdf_char_limit_stops_extraction(extracted_pages):
+    stats = {}
+    text = FileProcessor.extract_text_from_pdf(make_pdf(PAGES), max_chars=len(PAGES[0]) + 5, stats=stats)
+
+    assert text.splitlines() == PAGES[:2]
+    assert len(extracted_pages) == 2
+    assert stats["truncated"] is True
+
+
+def legacy_clean_text(text: str) -> str:
+    """clean_text original: três re.sub, uma cópia do texto por passada"""
+    if not text:
+        return ""
+    text = re.sub(r'\n+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s\.\,\!\?\:\;\-\(\)]', '', text)
+    return text.strip()
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   \n\t  ",
+    "Olá equipe,\n\nsegue o relatório.\t\tErro #42!\r\nPoderiam verificar? Obrigado!\n\n",
+    # Poucos caracteres distintos a remover (str.replace) e muitos (regex)
+    "custo: 10€ (aprox.) — ok",
+    "a@b.com #1 $2 %3 &4 *5 +6 =7 [8] {9} <10> ~11 `12` ^13 | 14 \\ 15 / 16",
+    "“aspas” ‘simples’ 👍 emoji\u00a0espaço\u2028linha\u3000ideográfico",
+    "<html><body><p>Olá &amp; bem-vindo</p></body></html>",
+    "Em seg., 3 de jun. de 2024, Suporte escreveu:\n> citação\n\nAtenciosamente,\nFulano",
+])
+def test_clean_text_matches_the_legacy_implementation(text):
+    # Remoções opcionais desligadas, o padrão das configurações
+    assert FileProcessor.clean_text(text) == legacy_clean_text(text)
+
+
+def test_clean_text_applies_the_configured_boilerplate_removal(monkeypatch):
+    monkeypatch.setattr(settings, "clean_strip_html", True)
+    monkeypatch.setattr(settings, "clean_strip_quotes", True)
+    text = "<p>Preciso de ajuda com o suporte</p>\nEm seg., 3 de jun. de 2024, Suporte escreveu:\n> citação"
+
+    assert FileProcessor.clean_text(text) == "Preciso de ajuda com o suporte"
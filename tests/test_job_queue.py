@@ -0,0 +1,165 @@
+"""
+Testes da fila de jobs em SQLite: lease, retomada e devolução à fila (job_queue)
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.models.email_models import EmailCategory, EmailResponse
+from app.services.job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    job_store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield job_store
+    job_store.close()
+
+
+def test_claim_takes_oldest_job_once(store):
+    store.insert("second", "b", None, None, created_at=2.0)
+    store.insert("first", "a", None, None, created_at=1.0)
+
+    row = store.claim(lease_seconds=60, max_attempts=3)
+    assert row["id"] == "first"
+    assert row["status"] == RUNNING
+    assert row["attempts"] == 1
+
+    assert store.claim(lease_seconds=60, max_attempts=3)["id"] == "second"
+    assert store.claim(lease_seconds=60, max_attempts=3) is None
+
+
+def test_two_workers_never_claim_the_same_job(store):
+    other = JobStore(store.path)
+    try:
+        store.insert("only", "a", None, None, created_at=1.0)
+        claims = [store.claim(60, 3), other.claim(60, 3)]
+        assert sum(row is not None for row in claims) == 1
+    finally:
+        other.close()
+
+
+def test_expired_lease_is_claimed_again(store):
+    store.insert("job", "a", None, None, created_at=1.0)
+    # Lease já vencido: o worker que pegou o job "morreu"
+    store.claim(lease_seconds=-1, max_attempts=3)
+
+    row = store.claim(lease_seconds=60, max_attempts=3)
+    assert row["id"] == "job"
+    assert row["attempts"] == 2
+
+
+def test_live_lease_is_not_claimed_again(store):
+    store.insert("job", "a", None, None, created_at=1.0)
+    store.claim(lease_seconds=60, max_attempts=3)
+
+    assert store.claim(lease_seconds=60, max_attempts=3) is None
+
+
+def test_job_fails_after_max_attempts(store):
+    store.insert("job", "a", None, None, created_at=1.0)
+    store.claim(lease_seconds=-1, max_attempts=2)
+    store.claim(lease_seconds=-1, max_attempts=2)
+
+    assert store.claim(lease_seconds=60, max_attempts=2) is None
+    row = store.get("job")
+    assert row["status"] == FAILED
+    assert row["lease_until"] is None
+
+
+def test_requeue_returns_running_job_to_queue(store):
+    store.insert("job", "a", None, None, created_at=1.0)
+    store.claim(lease_seconds=60, max_attempts=3)
+
+    store.requeue("job")
+    row = store.get("job")
+    assert row["status"] == QUEUED
+    assert row["lease_until"] is None
+
+    assert store.claim(lease_seconds=60, max_attempts=3)["attempts"] == 2
+
+
+def test_finish_discards_input_and_ignores_jobs_not_running(store):
+    store.insert("job", "a", None, None, created_at=1.0)
+    store.finish("job", SUCCEEDED, "{}", None)
+    assert store.get("job")["status"] == QUEUED
+
+    store.claim(lease_seconds=60, max_attempts=3)
+    store.finish("job", SUCCEEDED, '{"category": "Produtivo"}', None)
+    row = store.get("job")
+    assert row["status"] == SUCCEEDED
+    assert row["text"] is None
+    assert store.counts() == {SUCCEEDED: 1}
+
+
+def test_purge_removes_only_old_finished_jobs(store):
+    store.insert("done", "a", None, None, created_at=1.0)
+    store.insert("waiting", "b", None, None, created_at=2.0)
+    store.claim(lease_seconds=60, max_attempts=3)
+    store.finish("done", SUCCEEDED, "{}", None)
+
+    assert store.purge(finished_before=time.time() - 60) == 0
+    assert store.purge(finished_before=time.time() + 1) == 1
+    assert store.get("done") is None
+    assert store.get("waiting")["status"] == QUEUED
+
+
+class FakeEmailService:
+    """Classificação que espera `release` (para segurar o job em execução)"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = asyncio.Event()
+
+    def validate_input(self, text, file) -> None:
+        pass
+
+    async def process_email_classification(self, text=None, file=None) -> EmailResponse:
+        self.started.set()
+        await self.release.wait()
+        return EmailResponse(category=EmailCategory.PRODUTIVO, processing_time=0.0, text_length=len(text))
+
+
+def test_queue_runs_jobs_and_reports_stats(tmp_path):
+    async def scenario():
+        service = FakeEmailService()
+        service.release.set()
+        queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), service, workers=1)
+        queue.start()
+        try:
+            job = await queue.submit(text="olá")
+            finished = await queue.wait(job.id, timeout=5)
+            stats = await queue.stats()
+        finally:
+            await queue.aclose()
+        return finished, stats
+
+    finished, stats = asyncio.run(scenario())
+    assert finished.status == SUCCEEDED
+    assert finished.result.text_length == 3
+    assert stats.succeeded == 1
+    assert stats.queued == 0
+
+
+def test_shutdown_requeues_running_jobs(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+
+    async def scenario():
+        service = FakeEmailService()
+        queue = JobQueue(JobStore(path), service, workers=1)
+        queue.start()
+        job = await queue.submit(text="olá")
+        await asyncio.wait_for(service.started.wait(), 5)
+        await queue.aclose()
+        return job.id
+
+    job_id = asyncio.run(scenario())
+    store = JobStore(path)
+    try:
+        row = store.get(job_id)
+        assert row["status"] == QUEUED
+        assert row["attempts"] == 1
+    finally:
+        store.close()
@@ -0,0 +1,86 @@
+"""
+Testes do matcher de palavras-chave: normalização sem acentos e regex em trie (keyword_matcher)
+"""
+
+import json
+import random
+import re
+
+import pytest
+
+from app.services.keyword_matcher import KeywordMatcher, _trie_pattern, fold_text
+
+KEYWORDS = {
+    "produtivo": {"problema*": 1.0, "erro*": 1.0, "não funciona*": 1.5, "questão": 1.0, "status": 1.0},
+    "improdutivo": {"feliz natal": 1.5, "obrigad*": 1.0, "parabéns": 1.0},
+}
+
+
+@pytest.fixture(scope="module")
+def matcher() -> KeywordMatcher:
+    return KeywordMatcher(KEYWORDS)
+
+
+def test_fold_text_removes_accents_and_case():
+    assert fold_text("AÇÃO Também É Útil, Não? Pão à Moça") == b"acao tambem e util, nao? pao a moca"
+    assert fold_text("ÀÁÂÃÄÈÉÊËÌÍÎÏÒÓÔÕÖÙÚÛÜÇÑ") == b"aaaaaeeeeiiiiooooouuuucn"
+
+
+def test_fold_text_keeps_positions():
+    text = "Olá — “ação” 👍 ok"
+    folded = fold_text(text)
+
+    assert len(folded) == len(text)
+    assert folded.index(b"acao") == text.index("ação")
+    assert folded.endswith(b" ok")
+
+
+def test_trie_pattern_matches_like_plain_alternation():
+    generator = random.Random(8)
+    alphabet = "abc "
+    for _ in range(200):
+        words = {
+            "".join(generator.choice(alphabet) for _ in range(generator.randint(1, 6))).strip() or "a"
+            for _ in range(generator.randint(1, 12))
+        }
+        words = [b" ".join(word.encode().split()) for word in words]
+        trie = re.compile(_trie_pattern(words))
+        plain = re.compile(b"|".join(rb"\s+".join(map(re.escape, word.split(b" "))) for word in words))
+        for _ in range(30):
+            candidate = "".join(generator.choice(alphabet) for _ in range(generator.randint(1, 8))).encode()
+            assert bool(trie.fullmatch(candidate)) == bool(plain.fullmatch(candidate)), (words, candidate)
+
+
+def test_accented_and_plain_text_score_the_same(matcher):
+    accented = matcher.match("Olá, o sistema NÃO FUNCIONA e a questão do status segue. Obrigada!")
+    plain = matcher.match("Ola, o sistema nao funciona e a questao do status segue. obrigada!")
+
+    assert accented.scores == plain.scores
+    assert accented.counts == plain.counts
+    assert accented.scores == {"produtivo": 3.5, "improdutivo": 1.0}
+
+
+def test_positions_point_into_the_original_text(matcher):
+    text = "Feliz   Natal!\nO erro persiste."
+    found = matcher.match(text)
+
+    (start, end), = found.positions["feliz natal"]
+    assert text[start:end] == "Feliz   Natal"
+    (start, end), = found.positions["erro*"]
+    assert text[start:end] == "erro"
+
+
+def test_wildcard_accepts_suffixes_and_literals_do_not(matcher):
+    found = matcher.match("Problemas e erros; os status e as questões")
+
+    assert found.counts == {"problema*": 1, "erro*": 1, "status": 1}
+    assert matcher.match("superproblema").total_matches == 0
+
+
+def test_from_file_rejects_unknown_categories(tmp_path):
+    path = tmp_path / "keywords.json"
+    path.write_text(json.dumps({"spam": {"oferta": 1.0}}), encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        KeywordMatcher.from_file(str(path), categories=["produtivo", "improdutivo"])
+    assert KeywordMatcher.from_file(str(path)).match("Oferta!").scores == {"spam": 1.0}
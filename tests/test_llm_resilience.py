@@ -0,0 +1,205 @@
+"""
+Testes do rate limiter, do circuit breaker e das novas tentativas (llm_resilience)
+"""
+
+import asyncio
+
+import httpx
+import openai
+import pytest
+
+from app.services import llm_resilience
+from app.services.llm_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RateLimiter,
+    ResilientCaller,
+    TokenBucket
+)
+
+
+class FakeClock:
+    """Substitui time.monotonic; avança só quando o teste manda"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(llm_resilience.time, "monotonic", fake)
+    return fake
+
+
+def status_error(status: int, headers: dict = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://openai.test/v1/chat/completions")
+    response = httpx.Response(status, headers=headers, request=request)
+    return openai.APIStatusError(f"status {status}", response=response, body=None)
+
+
+class FlakyCall:
+    """Chamada que levanta os erros dados, em ordem, e depois responde "ok" """
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def make_caller(max_retries: int = 2, failure_threshold: int = 3) -> ResilientCaller:
+    return ResilientCaller(
+        RateLimiter(),
+        CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=30),
+        max_retries=max_retries,
+        base_delay=0,
+        max_delay=0
+    )
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(rate_per_minute=60)  # 1 por segundo, rajada de 6
+
+    assert bucket.reserve(6) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+    clock.advance(2)
+    assert bucket.reserve(1) == 0
+
+
+def test_token_bucket_refund_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate_per_minute=60)
+
+    bucket.reserve(3)
+    bucket.refund(100)
+    assert bucket.reserve(6) == 0
+    assert bucket.reserve(1) > 0
+
+
+def test_rate_limiter_pause_holds_every_call(clock):
+    limiter = RateLimiter()
+    assert limiter.reserve(100) == 0
+
+    limiter.pause(5)
+    assert limiter.reserve(100) == pytest.approx(5)
+
+    clock.advance(2)
+    assert limiter.reserve(100) == pytest.approx(3)
+
+
+def test_circuit_opens_after_threshold_and_probes_once(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    clock.advance(10)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    # Só uma sondagem por vez
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_circuit_failed_probe_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.advance(10)
+
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    clock.advance(9)
+    assert not breaker.allow()
+
+
+def test_circuit_release_frees_the_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock.advance(10)
+
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_retries_server_errors_until_success():
+    caller = make_caller(max_retries=2)
+    call = FlakyCall(status_error(503), status_error(500))
+
+    assert asyncio.run(caller.call(call, estimated_tokens=10)) == "ok"
+    assert call.calls == 3
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_errors_are_not_retried():
+    caller = make_caller(max_retries=2)
+    call = FlakyCall(status_error(400))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(caller.call(call, estimated_tokens=10))
+    assert call.calls == 1
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_outage_opens_circuit_and_rejects_without_calling():
+    caller = make_caller(max_retries=1, failure_threshold=1)
+    call = FlakyCall(status_error(503), status_error(503))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(caller.call(call, estimated_tokens=10))
+    assert call.calls == 2
+    assert caller.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(caller.call(call, estimated_tokens=10))
+    assert call.calls == 2
+
+
+def test_rate_limited_does_not_count_as_outage():
+    caller = make_caller(max_retries=0, failure_threshold=1)
+    call = FlakyCall(status_error(429))
+
+    with pytest.raises(openai.APIStatusError):
+        asyncio.run(caller.call(call, estimated_tokens=10))
+    assert caller.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_after_pauses_the_limiter():
+    caller = make_caller(max_retries=1)
+    caller.max_delay = 60
+
+    caller._backoff(0, status_error(429, {"retry-after": "20"}))
+    assert caller.limiter.reserve(1) > 15
+
+
+def test_call_sync_retries_like_call():
+    caller = make_caller(max_retries=1)
+    errors = [status_error(502)]
+
+    def call():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    assert caller.call_sync(call, estimated_tokens=10) == "ok"
+    assert not errors
@@ -0,0 +1,90 @@
+"""
+Testes do classificador local: treino, salvamento, carga via mmap e predição (local_classifier, cli)
+"""
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from app.cli import main
+from app.models.email_models import EmailCategory
+from app.services.email_classifier import EmailClassifier
+from app.services.local_classifier import LocalClassifier
+from app.utils.config import settings
+
+CORPUS = [
+    ("Preciso de ajuda com o erro no sistema de faturamento", EmailCategory.PRODUTIVO),
+    ("Não consigo acessar minha conta, podem verificar?", EmailCategory.PRODUTIVO),
+    ("Qual o status do chamado aberto ontem?", EmailCategory.PRODUTIVO),
+    ("O relatório apresenta erro ao exportar, preciso de suporte", EmailCategory.PRODUTIVO),
+    ("Feliz Natal a toda a equipe!", EmailCategory.IMPRODUTIVO),
+    ("Obrigado pela atenção de sempre", EmailCategory.IMPRODUTIVO),
+    ("Parabéns pelo aniversário da empresa", EmailCategory.IMPRODUTIVO),
+    ("Desejo um ótimo ano novo a todos", EmailCategory.IMPRODUTIVO),
+]
+
+SAMPLES = ["Preciso de suporte com um erro no sistema", "Feliz ano novo e obrigado!"]
+
+
+def train(**options) -> LocalClassifier:
+    options = {"n_features": 2 ** 10, "epochs": 100, **options}
+    return LocalClassifier.train([text for text, _ in CORPUS], [label for _, label in CORPUS], **options)
+
+
+def test_saved_model_is_memory_mapped_and_predicts_the_same(tmp_path):
+    model = train()
+    before = model.predict_proba(SAMPLES)
+    model.save(str(tmp_path))
+
+    loaded = LocalClassifier.load(str(tmp_path))
+    assert isinstance(loaded.weights, np.memmap)
+    assert isinstance(loaded.idf, np.memmap)
+    assert loaded.version == model.version == str(model.meta["trained_at"])
+    np.testing.assert_allclose(loaded.predict_proba(SAMPLES), before, rtol=1e-5)
+    assert [category for category, _ in loaded.classify(SAMPLES)] == [
+        EmailCategory.PRODUTIVO, EmailCategory.IMPRODUTIVO
+    ]
+
+
+def test_training_without_examples_is_an_error():
+    with pytest.raises(ValueError):
+        LocalClassifier.train([], [])
+
+
+def test_train_local_command_writes_a_loadable_model(tmp_path):
+    data = tmp_path / "emails.jsonl"
+    data.write_text(
+        "".join(json.dumps({"text": text, "label": label.value}) + "\n" for text, label in CORPUS),
+        encoding="utf-8"
+    )
+    output = tmp_path / "modelo"
+
+    assert main(["train-local", "--data", str(data), "--output", str(output),
+                 "--features-bits", "10", "--epochs", "100", "--holdout", "0"]) == 0
+    model = LocalClassifier.load(str(output))
+    assert model.meta["n_samples"] == len(CORPUS)
+    assert len(model.weights) == 2 ** 10
+    assert model.classify(SAMPLES)[1][0] == EmailCategory.IMPRODUTIVO
+
+
+def test_model_version_is_part_of_the_cache_namespace(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "local_model_mode", "prefilter")
+    monkeypatch.setattr(settings, "local_model_path", str(tmp_path))
+
+    def namespace_for(trained_at: int) -> str:
+        model = train()
+        model.meta["trained_at"] = trained_at
+        model.save(str(tmp_path))
+        classifier = EmailClassifier()
+        try:
+            assert classifier.local_model.version == str(trained_at)
+            return classifier.cache_namespace
+        finally:
+            asyncio.run(classifier.aclose())
+
+    first = namespace_for(1700000000)
+    assert f":local-prefilter-{settings.local_model_threshold}-1700000000" in first
+    # Um modelo retreinado não reaproveita resultados do anterior
+    assert namespace_for(1700000100) != first
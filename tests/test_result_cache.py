@@ -0,0 +1,94 @@
+"""
+Testes do cache de resultados: chave por conteúdo, TTL e despejo LRU (result_cache)
+"""
+
+import asyncio
+
+import pytest
+
+from app.services import result_cache
+from app.services.result_cache import ResultCache
+
+
+class FakeClock:
+    """Substitui time.time; avança só quando o teste manda"""
+
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(result_cache.time, "time", fake)
+    return fake
+
+
+def get(cache: ResultCache, key: str):
+    return asyncio.run(cache.get(key))
+
+
+def put(cache: ResultCache, key: str, value: dict) -> None:
+    asyncio.run(cache.set(key, value))
+
+
+def test_key_ignores_formatting_but_not_identifiers():
+    key = ResultCache.build_key("Olá,   preciso de ajuda\n\n", "gpt-3.5-turbo", "v1")
+
+    assert key == ResultCache.build_key("Olá, preciso de ajuda", "gpt-3.5-turbo", "v1")
+    assert key != ResultCache.build_key("Olá, preciso de ajuda", "gpt-4o", "v1")
+    assert key != ResultCache.build_key("Olá, preciso de ajuda", "gpt-3.5-turbo", "v2")
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    put(cache, "a", {"category": "produtivo"})
+
+    clock.now += 59
+    assert get(cache, "a") == {"category": "produtivo"}
+
+    clock.now += 2
+    assert get(cache, "a") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    put(cache, "a", {"n": 1})
+    put(cache, "b", {"n": 2})
+
+    # Lido agora, "a" passa a ser o mais recente e "b" sai no lugar dele
+    assert get(cache, "a") == {"n": 1}
+    put(cache, "c", {"n": 3})
+
+    assert get(cache, "b") is None
+    assert get(cache, "a") == {"n": 1}
+    assert get(cache, "c") == {"n": 3}
+    assert cache.stats()["entries"] == 2
+
+
+def test_sqlite_backend_is_shared_and_respects_ttl(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = ResultCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+    reader = ResultCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+    try:
+        put(writer, "a", {"category": "improdutivo"})
+
+        assert get(reader, "a") == {"category": "improdutivo"}
+        assert reader.disk_hits == 1
+
+        clock.now += 61
+        other = ResultCache(max_entries=10, ttl_seconds=60, sqlite_path=path)
+        try:
+            assert get(other, "a") is None
+        finally:
+            other.close()
+        # A cópia em memória leva o prazo original do disco
+        assert get(reader, "a") is None
+    finally:
+        writer.close()
+        reader.close()
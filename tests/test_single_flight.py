@@ -0,0 +1,114 @@
+"""
+Testes da coalescência de chamadas idênticas em andamento (single_flight)
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class SlowCall:
+    """Trabalho que só termina quando o teste libera; conta as execuções"""
+
+    def __init__(self, result="ok", error: Exception = None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        work = SlowCall(result={"category": "produtivo"})
+        callers = [asyncio.create_task(flight.run("email", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+        work.release.set()
+        results = await asyncio.gather(*callers)
+        return flight, work, results
+
+    flight, work, results = asyncio.run(scenario())
+    assert work.calls == 1
+    assert flight.coalesced == 4
+    assert flight.in_flight == 0
+    assert all(result is results[0] for result in results)
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        first, second = SlowCall("a"), SlowCall("b")
+        callers = [asyncio.create_task(flight.run("a", first)), asyncio.create_task(flight.run("b", second))]
+        await asyncio.sleep(0)
+        first.release.set()
+        second.release.set()
+        return flight, await asyncio.gather(*callers)
+
+    flight, results = asyncio.run(scenario())
+    assert results == ["a", "b"]
+    assert flight.coalesced == 0
+
+
+def test_exception_reaches_every_waiter_and_is_not_kept():
+    async def scenario():
+        flight = SingleFlight()
+        work = SlowCall(error=RuntimeError("OpenAI indisponível"))
+        callers = [asyncio.create_task(flight.run("email", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        work.release.set()
+        outcomes = await asyncio.gather(*callers, return_exceptions=True)
+
+        # Depois da falha, a próxima chamada executa de novo
+        retry = SlowCall(result="ok")
+        retry.release.set()
+        return outcomes, await flight.run("email", retry), retry.calls
+
+    outcomes, retried, retry_calls = asyncio.run(scenario())
+    assert [type(outcome) for outcome in outcomes] == [RuntimeError] * 3
+    assert all(str(outcome) == "OpenAI indisponível" for outcome in outcomes)
+    assert (retried, retry_calls) == ("ok", 1)
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = SingleFlight()
+        work = SlowCall(result="ok")
+        cancelled = asyncio.create_task(flight.run("email", work))
+        waiting = asyncio.create_task(flight.run("email", work))
+        await asyncio.sleep(0)
+
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        work.release.set()
+        return await waiting, work.calls
+
+    assert asyncio.run(scenario()) == ("ok", 1)
+
+
+def test_work_finishes_when_every_caller_is_cancelled():
+    async def scenario():
+        flight = SingleFlight()
+        work = SlowCall(error=RuntimeError("falha sem ninguém esperando"))
+        caller = asyncio.create_task(flight.run("email", work))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+
+        assert flight.in_flight == 1
+        work.release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return flight.in_flight
+
+    assert asyncio.run(scenario()) == 0
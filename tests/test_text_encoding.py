@@ -0,0 +1,49 @@
+"""
+Testes da detecção de encoding e da decodificação (text_encoding)
+"""
+
+import codecs
+
+import pytest
+
+from app.services.text_encoding import SNIFF_BYTES, decode_text, detect_encoding
+
+
+@pytest.mark.parametrize("content, encoding", [
+    (b"plain ascii", "utf-8"),
+    ("ação".encode("utf-8"), "utf-8"),
+    (codecs.BOM_UTF8 + "ação".encode("utf-8"), "utf-8-sig"),
+    ("ação".encode("utf-16"), "utf-16"),
+    ("ação".encode("utf-32"), "utf-32"),
+    ("ação “citação”".encode("cp1252"), "cp1252"),
+])
+def test_detect_encoding(content, encoding):
+    assert detect_encoding(content) == encoding
+
+
+def test_prefix_cut_inside_a_character_is_still_utf8():
+    content = "ação".encode("utf-8")
+    assert detect_encoding(content[:2]) == "utf-8"
+
+
+def test_decode_text_windows_1252():
+    content = "“Olá” – 10€".encode("cp1252")
+    assert decode_text(content) == "“Olá” – 10€"
+
+
+def test_decode_text_undefined_windows_1252_bytes_fall_back_to_latin1():
+    assert decode_text(b"caf\xe9 \x81") == "café \x81"
+
+
+def test_decode_text_strips_bom():
+    assert decode_text(codecs.BOM_UTF8 + "olá".encode("utf-8")) == "olá"
+
+
+def test_decode_text_invalid_byte_after_the_sniffed_prefix():
+    # Acentos (2 bytes em UTF-8), "€" (3 bytes) e emoji (4 bytes)
+    sample = "Olá, a reunião é às 9h — custo: 10€ 👍\n"
+    head = sample * (SNIFF_BYTES // len(sample.encode("utf-8")) + 1)
+    content = head.encode("utf-8") + "fim da mensagem, até já".encode("cp1252")
+
+    assert decode_text(content) == head + "fim da mensagem, até já"
+
@@ -0,0 +1,84 @@
+"""
+Testes do orçamento de tokens do texto enviado ao LLM (token_budget)
+"""
+
+from app.services.token_budget import (
+    CHARS_PER_TOKEN,
+    TRUNCATION_MARKER,
+    budget_for_model,
+    estimate_tokens,
+    fit_to_budget
+)
+
+
+def test_text_under_budget_is_unchanged():
+    text = "Olá, preciso de ajuda com o acesso ao sistema."
+
+    fitted, info = fit_to_budget(text, max_tokens=100)
+    assert fitted == text
+    assert not info.truncated
+    assert not info.quoted_reply_removed
+    assert info.prompt_tokens == info.original_tokens == estimate_tokens(text)
+    assert info.budget_tokens == 100
+
+
+def test_quoted_reply_is_removed():
+    text = (
+        "Ainda não recebi a nota fiscal do pedido 123.\n\n"
+        "Em seg., 3 de jun. de 2024 às 10:00, Suporte <suporte@example.com> escreveu:\n"
+        "> Olá, a nota será enviada em breve.\n"
+    )
+
+    fitted, info = fit_to_budget(text, max_tokens=1000)
+    assert fitted == "Ainda não recebi a nota fiscal do pedido 123."
+    assert info.quoted_reply_removed
+    assert not info.truncated
+
+
+def test_text_that_is_only_a_quote_is_kept():
+    text = "> linha citada sem nada antes"
+
+    fitted, info = fit_to_budget(text, max_tokens=1000)
+    assert fitted == text
+    assert not info.quoted_reply_removed
+
+
+def test_long_body_is_cut_with_marker_and_subject_kept():
+    body = "palavra " * 2000
+    text = "De: cliente@example.com\nAssunto: Erro no faturamento\n\n" + body
+
+    fitted, info = fit_to_budget(text, max_tokens=100)
+    assert info.truncated
+    assert fitted.startswith("Assunto: Erro no faturamento\n")
+    assert fitted.endswith(TRUNCATION_MARKER)
+    assert fitted.count("Assunto:") == 1
+    assert "De: cliente@example.com" in fitted
+    assert len(fitted) <= int(100 * CHARS_PER_TOKEN)
+    assert info.prompt_tokens <= 100 < info.original_tokens
+
+
+def test_subject_on_normalized_text_ends_at_next_header():
+    text = "Assunto: Pedido atrasado De: cliente@example.com " + "texto " * 1000
+
+    fitted, info = fit_to_budget(text, max_tokens=50)
+    assert fitted.startswith("Assunto: Pedido atrasado\n")
+    assert info.truncated
+
+
+def test_cut_without_subject_keeps_the_start():
+    text = "início " + "x" * 5000
+
+    fitted, _ = fit_to_budget(text, max_tokens=20)
+    assert fitted.startswith("início ")
+    assert fitted.endswith(TRUNCATION_MARKER)
+    assert len(fitted) == int(20 * CHARS_PER_TOKEN)
+
+
+def test_budget_for_model_uses_longest_prefix():
+    budgets = {"gpt-4": 4000, "gpt-4o": 6000, "gpt-4o-mini": 8000}
+
+    assert budget_for_model("gpt-4o-mini", budgets, default=1500) == 8000
+    assert budget_for_model("gpt-4o-2024-08-06", budgets, default=1500) == 6000
+    assert budget_for_model("gpt-4-turbo", budgets, default=1500) == 4000
+    assert budget_for_model("gpt-3.5-turbo", budgets, default=1500) == 1500
+    assert budget_for_model("gpt-4o", {}, default=1500) == 1500